@@ -1,57 +1,65 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from models import Admins
 from starlette import status
-from database import SessionLocal
-from schema import AdminRequest
+from database import db_dependency
+from integrity import commit_or_400
+from auth import forget_principal, hash_password
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import AdminRequest, AdminResponse, Page
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Admins)
+AdminPatch = patch_body(AdminRequest)
 
-@app.get("/admin", operation_id="get_admin")
-async def read_all(db: db_dependency):
-    return db.query(Admins).all()
+@router.get("/admin", operation_id="get_admin", response_model=Page[AdminResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Admins, page, query=query, item_model=AdminResponse))
 
-@app.post("/admin", status_code=status.HTTP_201_CREATED)
+@router.post("/admin", status_code=status.HTTP_201_CREATED)
 async def create_admin(db: db_dependency, admin_request: AdminRequest):
-    admin_model = Admins(**admin_request.model_dump())
+    admin_model = Admins(**{**admin_request.model_dump(), "hashed_password": await hash_password(admin_request.hashed_password)})
     db.add(admin_model)
-    db.commit()
-    db.refresh(admin_model)
+    await db.commit()
+    await db.refresh(admin_model)
     return admin_model
 
-@app.get("/admin/{admin_id}", status_code=status.HTTP_200_OK)
+@router.get("/admin/{admin_id}", status_code=status.HTTP_200_OK)
 async def read_admins(db: db_dependency, admin_id: UUID):
-    admin_model = db.query(Admins).filter(Admins.admins_id == admin_id).first()
+    admin_model = await db.get(Admins, admin_id)
     if admin_model is not None:
         return admin_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Admin not found.')
 
-@app.put("/admin/{admin_id}")
+@router.put("/admin/{admin_id}")
 async def update_admin(db: db_dependency, admin_request: AdminRequest, admin_id: UUID):
-    admin_model = db.query(Admins).filter(Admins.admins_id == admin_id).first()
+    admin_model = await db.get(Admins, admin_id)
     if admin_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Admin not found.')
 
     admin_model.username = admin_request.username
-    admin_model.hashed_password = admin_request.hashed_password
+    admin_model.hashed_password = await hash_password(admin_request.hashed_password)
     admin_model.email = admin_request.email
+    admin_model.token_version = Admins.token_version + 1
     
     db.add(admin_model)
-    db.commit()
-    db.refresh(admin_model)
+    await db.commit()
+    await forget_principal('admin', admin_id)
+    await db.refresh(admin_model)
     return admin_model
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+@router.patch("/admin/{admin_id}", response_model=AdminResponse)
+async def patch_admin(db: db_dependency, admin_request: AdminPatch, admin_id: UUID):
+    values, expected = patch_values(admin_request)
+    if "hashed_password" in values:
+        values["hashed_password"] = await hash_password(values["hashed_password"])
+        values["token_version"] = Admins.token_version + 1
+
+    row = await patch_row(db, Admins, admin_id, values, 'Admin not found.', expected)
+    await commit_or_400(db)
+    await forget_principal('admin', admin_id)
+    return patched(row, AdminResponse)
\ No newline at end of file
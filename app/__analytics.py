@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Query
+from models import StudentRisk
+from starlette import status
+from database import db_dependency
+from analytics import cohort_summary, past_threshold, risk_flags
+from filters import ListQuery
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from schema import Page, StudentRiskResponse
+
+router = APIRouter()
+
+@router.get("/analytics/risk", operation_id="get_student_risk", response_model=Page[StudentRiskResponse])
+async def read_risk(
+    db: db_dependency,
+    page: page_dependency,
+    min_score: float | None = Query(None, ge=0, le=1),
+    flagged: bool = False,
+):
+    # the snapshot written by `python analytics.py refresh`, highest risk first
+    criteria = []
+    if min_score is not None:
+        criteria.append(StudentRisk.risk_score >= min_score)
+    if flagged:
+        criteria.append(past_threshold())
+    query = ListQuery(criteria, StudentRisk.risk_score, descending=True)
+    risk = await paginate(db, StudentRisk, page, query=query, item_model=StudentRiskResponse)
+    for item in risk["items"]:
+        item["flags"] = risk_flags(item)
+    return ORJSONResponse(risk)
+
+@router.get("/analytics/risk/cohort", status_code=status.HTTP_200_OK, operation_id="get_risk_cohort")
+async def read_risk_cohort(db: db_dependency):
+    return await cohort_summary(db)
\ No newline at end of file
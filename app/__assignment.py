@@ -0,0 +1,140 @@
+from uuid import UUID
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from models import AssignmentGrades, Assignments, Enrollments, Submissions
+from starlette import status
+from database import db_dependency
+from integrity import commit_or_400, flush_or_400
+from expand import expand_param, read_expanded
+from filters import filter_params
+from gradebook import apply_grade_changes, grade_summary, move_assignment
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import AssignmentRequest, AssignmentResponse, GradeUploadRequest, Page
+
+router = APIRouter()
+
+list_filters = filter_params(Assignments)
+AssignmentPatch = patch_body(AssignmentRequest)
+
+@router.get("/assignment", operation_id="get_all_assignments", response_model=Page[AssignmentResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Assignments, page, query=query, item_model=AssignmentResponse))
+
+@router.post("/assignment", status_code=status.HTTP_201_CREATED)
+async def create_assignment(db: db_dependency, assignment_request: AssignmentRequest):
+    assignment_model = Assignments(**assignment_request.model_dump())
+    db.add(assignment_model)
+    await commit_or_400(db)
+    return assignment_model
+
+@router.get("/assignment/{assignment_id}", status_code=status.HTTP_200_OK)
+async def read_assignment(db: db_dependency, assignment_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Assignments, assignment_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Assignment not found.')
+        return expanded
+
+    assignment_model = await db.get(Assignments, assignment_id)
+    if assignment_model is not None:
+        return assignment_model
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Assignment not found.')
+
+@router.put("/assignment/{assignment_id}")
+async def update_assignment(db: db_dependency, assignment_request: AssignmentRequest, assignment_id: UUID):
+    assignment_model = await db.get(Assignments, assignment_id)
+    if assignment_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Assignment not found.')
+
+    previous_course_id = assignment_model.course_id
+    assignment_model.title = assignment_request.title
+    assignment_model.description = assignment_request.description
+    assignment_model.course_id = assignment_request.course_id
+    assignment_model.teacher_id = assignment_request.teacher_id
+
+    db.add(assignment_model)
+    await flush_or_400(db)
+    await move_assignment(db, assignment_id, previous_course_id, assignment_model.course_id)
+    await commit_or_400(db)
+    await db.refresh(assignment_model)
+    return assignment_model
+
+@router.patch("/assignment/{assignment_id}", response_model=AssignmentResponse)
+async def patch_assignment(db: db_dependency, assignment_request: AssignmentPatch, assignment_id: UUID):
+    values, expected = patch_values(assignment_request)
+    row = await patch_row(db, Assignments, assignment_id, values, 'Assignment not found.', expected, previous=[Assignments.course_id])
+    await move_assignment(db, assignment_id, row.previous_course_id, row.course_id)
+    await commit_or_400(db)
+    return patched(row, AssignmentResponse)
+
+@router.delete("/assignment/{assignment_id}", status_code=status.HTTP_200_OK)
+async def delete_assignment(db: db_dependency, assignment_id: UUID):
+    assignment_model = await db.get(Assignments, assignment_id)
+    if assignment_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Assignment not found.')
+    if await db.scalar(select(exists().where(Submissions.assignment_id == assignment_id))):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Assignment has submissions.')
+    await db.execute(delete(AssignmentGrades).where(AssignmentGrades.assignment_id == assignment_id))
+    await db.delete(assignment_model)
+    await db.commit()
+    return {"detail": "Assignment deleted successfully"}
+
+@router.put("/assignment/{assignment_id}/grades", status_code=status.HTTP_200_OK)
+async def upload_grades(db: db_dependency, upload: GradeUploadRequest, assignment_id: UUID):
+    # grades for a whole assignment in one upsert; students without a submission get one.
+    # Uploads for the assignment take turns on its row, as roll calls do on their class's
+    assignment_model = await db.get(Assignments, assignment_id, with_for_update={"key_share": True})
+    if assignment_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Assignment not found.')
+
+    student_ids = [record.student_id for record in upload.grades]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Each student may appear only once in a grade upload.")
+
+    enrolled = set(await db.scalars(
+        select(Enrollments.student_id)
+        .where(Enrollments.course_id == assignment_model.course_id, Enrollments.student_id.in_(student_ids))
+    ))
+    not_enrolled = [str(student_id) for student_id in student_ids if student_id not in enrolled]
+    if not_enrolled:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Students not enrolled in this course.", "student_ids": not_enrolled})
+
+    previous = (await db.execute(
+        select(Submissions.student_id, Submissions.grade)
+        .where(Submissions.assignment_id == assignment_id, Submissions.student_id.in_(student_ids))
+        .with_for_update()
+    )).all()
+
+    stmt = insert(Submissions).values([
+        {"student_id": record.student_id, "assignment_id": assignment_id, "grade": record.grade}
+        for record in upload.grades
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Submissions.student_id, Submissions.assignment_id],
+        set_={"grade": stmt.excluded.grade},
+    )
+    await db.execute(stmt)
+    course_id = assignment_model.course_id
+    await apply_grade_changes(
+        db,
+        removed=[(student_id, course_id, assignment_id, grade) for student_id, grade in previous],
+        added=[(record.student_id, course_id, assignment_id, record.grade) for record in upload.grades],
+    )
+    await db.commit()
+    return {"assignment_id": assignment_id, "recorded": len(upload.grades)}
+
+@router.get("/assignment/{assignment_id}/grades", status_code=status.HTTP_200_OK)
+async def read_assignment_grades(db: db_dependency, assignment_id: UUID):
+    # score distribution from the running totals; submissions are not read
+    row = (await db.execute(
+        select(Assignments.assignments_id, AssignmentGrades)
+        .outerjoin(AssignmentGrades, AssignmentGrades.assignment_id == Assignments.assignments_id)
+        .where(Assignments.assignments_id == assignment_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Assignment not found.')
+    totals = row.AssignmentGrades or AssignmentGrades(graded=0, grade_sum=0, grade_sum_squares=0)
+    return {"assignment_id": assignment_id, **grade_summary(totals)}
\ No newline at end of file
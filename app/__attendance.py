@@ -1,72 +1,182 @@
-from typing import Annotated
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException, Path
-from models import Enrollments, Students, Courses
+from datetime import date
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from fastapi import APIRouter, HTTPException, Query
+from models import Attendance, AttendanceDaily, AttendanceMonthly, Classes, Enrollments
 from starlette import status
-from database import SessionLocal
-from schema import EnrollmentRequest
-
-app = FastAPI()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
-
-@app.get("/enrollment", operation_id="get_all_enrollments")
-async def read_all(db: db_dependency):
-    return db.query(Enrollments).all()
-
-@app.post("/enrollment", status_code=status.HTTP_201_CREATED)
-async def create_enrollment(db: db_dependency, enrollment_request: EnrollmentRequest):
-    student = db.query(Students).filter(Students.students_id == enrollment_request.student_id_).first()
-    if not student:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid student ID")
-    
-    course = db.query(Courses).filter(Courses.courses_id == enrollment_request.course_id_).first()
-    if not course:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID")
-    
-    enrollment_model = Enrollments(**enrollment_request.model_dump())
-    db.add(enrollment_model)
-    db.commit()
-    db.refresh(enrollment_model)
-    return enrollment_model
-    
-@app.get("/enrollment/{enrollment_id}", status_code=status.HTTP_200_OK)
-async def read_enrollment(db: db_dependency, enrollment_id: int = Path(gt=0)):
-    enrollment_model = db.query(Enrollments).filter(Enrollments.enrollments_id == enrollment_id).first()
-    if enrollment_model is not None:
-        return enrollment_model
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
-
-@app.put("/enrollment/{enrollment_id}")
-async def update_enrollment(db: db_dependency, enrollment_request: EnrollmentRequest, enrollment_id: int = Path(gt=0)):
-    enrollment_model = db.query(Enrollments).filter(Enrollments.enrollments_id == enrollment_id).first()
-    if enrollment_model is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
-
-    enrollment_model.student_id_ = enrollment_request.student_id_
-    enrollment_model.course_id_ = enrollment_request.course_id_
-    
-    db.add(enrollment_model)
-    db.commit()
-    db.refresh(enrollment_model)
-    return enrollment_model
-    
-@app.delete("/enrollment/{enrollment_id}", status_code=status.HTTP_200_OK)
-async def delete_enrollment(db: db_dependency, enrollment_id: int = Path(gt=0)):
-    enrollment_model = db.query(Enrollments).filter(Enrollments.enrollments_id == enrollment_id).first()
-    if enrollment_model is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
-    db.delete(enrollment_model)
-    db.commit()
-    return {"detail": "Enrollment deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+from database import db_dependency
+from integrity import commit_or_400, flush_or_400
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from rollups import apply_attendance_changes, attendance_key
+from schema import AttendanceRequest, AttendanceResponse, Page, RollCallRequest
+
+router = APIRouter()
+
+list_filters = filter_params(Attendance)
+AttendancePatch = patch_body(AttendanceRequest, versioned=False)
+
+@router.get("/attendance", operation_id="get_all_attendances", response_model=Page[AttendanceResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Attendance, page, Attendance.date, query=query, item_model=AttendanceResponse))
+
+@router.post("/attendance", status_code=status.HTTP_201_CREATED)
+async def create_attendance(db: db_dependency, attendance_request: AttendanceRequest):
+    # foreign keys and uq_attendances_student_class_date do the checking; the row is flushed
+    # before the rollups are touched so a rejected insert never reaches them
+    attendance_model = Attendance(**attendance_request.model_dump())
+    db.add(attendance_model)
+    await flush_or_400(db)
+    await apply_attendance_changes(db, added=[attendance_key(attendance_model)])
+    await commit_or_400(db)
+    return attendance_model
+
+@router.post("/class/{class_id}/attendance", status_code=status.HTTP_200_OK)
+async def record_class_attendance(db: db_dependency, roll_call: RollCallRequest, class_id: UUID):
+    # roll calls of a class take turns on its row, so each one reads the statuses the previous
+    # one wrote before counting its own. FOR NO KEY UPDATE still lets rows referencing the
+    # class be written
+    class_model = await db.get(Classes, class_id, with_for_update={"key_share": True})
+    if class_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Class not found.')
+
+    student_ids = [record.student_id for record in roll_call.records]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Each student may appear only once in a roll call.")
+
+    # a student belongs to the class when enrolled in the class's course
+    enrolled = set(await db.scalars(
+        select(Enrollments.student_id)
+        .where(Enrollments.course_id == class_model.course_id, Enrollments.student_id.in_(student_ids))
+    ))
+    not_enrolled = [str(student_id) for student_id in student_ids if student_id not in enrolled]
+    if not_enrolled:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Students not enrolled in this class.", "student_ids": not_enrolled})
+
+    previous = (await db.execute(
+        select(Attendance.student_id, Attendance.status)
+        .where(Attendance.class_id == class_id, Attendance.date == roll_call.date, Attendance.student_id.in_(student_ids))
+        .with_for_update()
+    )).all()
+
+    stmt = insert(Attendance).values([
+        {"student_id": record.student_id, "class_id": class_id, "date": roll_call.date, "status": record.status}
+        for record in roll_call.records
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attendance.student_id, Attendance.class_id, Attendance.date],
+        set_={"status": stmt.excluded.status},
+    )
+    await db.execute(stmt)
+    await apply_attendance_changes(
+        db,
+        removed=[(student_id, class_id, roll_call.date, old_status) for student_id, old_status in previous],
+        added=[(record.student_id, class_id, roll_call.date, record.status) for record in roll_call.records],
+    )
+    await db.commit()
+    return {"class_id": class_id, "date": roll_call.date, "recorded": len(roll_call.records)}
+
+@router.get("/attendance/{attendance_id}", status_code=status.HTTP_200_OK)
+async def read_attendance(db: db_dependency, attendance_id: UUID):
+    attendance_model = await db.get(Attendance, attendance_id)
+    if attendance_model is not None:
+        return attendance_model
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Attendance not found.')
+
+@router.put("/attendance/{attendance_id}")
+async def update_attendance(db: db_dependency, attendance_request: AttendanceRequest, attendance_id: UUID):
+    # locked, so the rollups lose the values the row still has when it commits
+    attendance_model = await db.get(Attendance, attendance_id, with_for_update=True)
+    if attendance_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Attendance not found.')
+
+    previous = attendance_key(attendance_model)
+    attendance_model.student_id = attendance_request.student_id
+    attendance_model.class_id = attendance_request.class_id
+    attendance_model.date = attendance_request.date
+    attendance_model.status = attendance_request.status
+
+    db.add(attendance_model)
+    await flush_or_400(db)
+    await apply_attendance_changes(db, removed=[previous], added=[attendance_key(attendance_model)])
+    await commit_or_400(db)
+    await db.refresh(attendance_model)
+    return attendance_model
+
+@router.patch("/attendance/{attendance_id}", response_model=AttendanceResponse)
+async def patch_attendance(db: db_dependency, attendance_request: AttendancePatch, attendance_id: UUID):
+    values, _ = patch_values(attendance_request)
+    row = await patch_row(
+        db, Attendance, attendance_id, values, 'Attendance not found.',
+        previous=[Attendance.student_id, Attendance.class_id, Attendance.date, Attendance.status],
+    )
+    previous = (row.previous_student_id, row.previous_class_id, row.previous_date, row.previous_status)
+    await apply_attendance_changes(db, removed=[previous], added=[attendance_key(row)])
+    await commit_or_400(db)
+    return patched(row, AttendanceResponse)
+
+@router.delete("/attendance/{attendance_id}", status_code=status.HTTP_200_OK)
+async def delete_attendance(db: db_dependency, attendance_id: UUID):
+    attendance_model = await db.get(Attendance, attendance_id, with_for_update=True)
+    if attendance_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Attendance not found.')
+    await db.delete(attendance_model)
+    await apply_attendance_changes(db, removed=[attendance_key(attendance_model)])
+    await commit_or_400(db)
+    return {"detail": "Attendance deleted successfully"}
+
+def month_range(month):
+    start = date.fromisoformat(f"{month}-01")
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+def percentage(present, total):
+    return round(present * 100 / total, 2) if total else None
+
+@router.get("/student/{student_id}/attendance/summary", status_code=status.HTTP_200_OK)
+async def read_student_attendance_summary(db: db_dependency, student_id: UUID, month: str = Query(pattern=r"^\d{4}-(0[1-9]|1[0-2])$")):
+    start, _ = month_range(month)
+    rows = (await db.execute(
+        select(AttendanceMonthly.class_id, AttendanceMonthly.present, AttendanceMonthly.total)
+        .where(AttendanceMonthly.student_id == student_id, AttendanceMonthly.month == start)
+    )).all()
+
+    present = sum(row.present for row in rows)
+    total = sum(row.total for row in rows)
+    return {
+        "student_id": student_id,
+        "month": month,
+        "present": present,
+        "total": total,
+        "percentage": percentage(present, total),
+        "classes": [
+            {"class_id": row.class_id, "present": row.present, "total": row.total, "percentage": percentage(row.present, row.total)}
+            for row in rows
+        ],
+    }
+
+@router.get("/class/{class_id}/attendance/summary", status_code=status.HTTP_200_OK)
+async def read_class_attendance_summary(db: db_dependency, class_id: UUID, month: str = Query(pattern=r"^\d{4}-(0[1-9]|1[0-2])$")):
+    start, end = month_range(month)
+    rows = (await db.execute(
+        select(AttendanceDaily.date, AttendanceDaily.present, AttendanceDaily.total)
+        .where(AttendanceDaily.class_id == class_id, AttendanceDaily.date >= start, AttendanceDaily.date < end)
+        .order_by(AttendanceDaily.date)
+    )).all()
+
+    present = sum(row.present for row in rows)
+    total = sum(row.total for row in rows)
+    return {
+        "class_id": class_id,
+        "month": month,
+        "present": present,
+        "total": total,
+        "percentage": percentage(present, total),
+        "days": [
+            {"date": row.date, "present": row.present, "total": row.total, "percentage": percentage(row.present, row.total)}
+            for row in rows
+        ],
+    }
\ No newline at end of file
@@ -0,0 +1,70 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, update
+from models import Admins, Users
+from starlette import status
+from database import db_dependency
+from auth import Principal, authenticate, authorize, forget_principal, hash_password, needs_rehash, principal_cache_stats, token_cache_stats, token_response, unauthorized, verify_password
+from schema import LoginRequest
+
+router = APIRouter()
+
+async def current_principal(principal: Principal | None = Depends(authenticate)):
+    if principal is None:
+        raise unauthorized('Not authenticated.')
+    return principal
+
+def invalid_credentials():
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Incorrect username or password.', headers={"WWW-Authenticate": "Bearer"})
+
+@router.post("/auth/token", status_code=status.HTTP_200_OK)
+async def login(db: db_dependency, login_request: LoginRequest):
+    user_model = await db.scalar(select(Users).where(Users.username == login_request.username))
+    if not await verify_password(user_model.hashed_password if user_model else None, login_request.password) or user_model is None:
+        raise invalid_credentials()
+
+    # upgrades rows stored before hashing, and hashes made with older argon2 parameters
+    if needs_rehash(user_model.hashed_password):
+        user_model.hashed_password = await hash_password(login_request.password)
+        await db.commit()
+    return token_response(user_model.users_id, 'user', user_model.role.value if user_model.role else None, user_model.token_version)
+
+@router.post("/auth/admin/token", status_code=status.HTTP_200_OK)
+async def admin_login(db: db_dependency, login_request: LoginRequest):
+    admin_model = await db.scalar(select(Admins).where(Admins.email == login_request.username))
+    if not await verify_password(admin_model.hashed_password if admin_model else None, login_request.password) or admin_model is None:
+        raise invalid_credentials()
+
+    if needs_rehash(admin_model.hashed_password):
+        admin_model.hashed_password = await hash_password(login_request.password)
+        await db.commit()
+    return token_response(admin_model.admins_id, 'admin', version=admin_model.token_version)
+
+@router.get("/auth/me", status_code=status.HTTP_200_OK)
+async def read_token(principal: Principal = Depends(current_principal)):
+    return {"sub": principal.subject, "kind": principal.kind, "role": principal.role}
+
+async def revoke(db, kind, subject):
+    model = Admins if kind == 'admin' else Users
+    key = Admins.admins_id if kind == 'admin' else Users.users_id
+    revoked = await db.scalar(update(model).where(key == subject).values(token_version=model.token_version + 1).returning(key))
+    await db.commit()
+    await forget_principal(kind, subject)
+    return revoked is not None
+
+@router.post("/auth/revoke", status_code=status.HTTP_200_OK)
+async def revoke_own_tokens(db: db_dependency, principal: Principal = Depends(current_principal)):
+    await revoke(db, principal.kind, principal.subject)
+    return {"detail": "Tokens revoked."}
+
+@router.post("/auth/revoke/{user_id}", status_code=status.HTTP_200_OK)
+async def revoke_user_tokens(db: db_dependency, user_id: UUID, principal: Principal = Depends(current_principal)):
+    if principal.role != 'admin':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not allowed.')
+    if not await revoke(db, 'user', user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found.')
+    return {"detail": "Tokens revoked."}
+
+@router.get("/auth/stats", status_code=status.HTTP_200_OK, operation_id="get_auth_stats", dependencies=[Depends(authorize("auth"))])
+async def read_auth_stats():
+    return {"token_cache": token_cache_stats(), "principal_cache": principal_cache_stats()}
\ No newline at end of file
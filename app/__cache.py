@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from starlette import status
+from cache import get_cache
+
+router = APIRouter()
+
+@router.get("/cache/stats", status_code=status.HTTP_200_OK, operation_id="get_cache_stats")
+async def read_cache_stats():
+    return get_cache().stats()
\ No newline at end of file
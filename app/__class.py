@@ -1,53 +1,59 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import Classes, Courses, Teachers
+from fastapi import APIRouter, HTTPException, Request, Response
+from models import Classes
 from starlette import status
-from database import SessionLocal
-from schema import ClassRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from conditional import entity_validators, is_not_modified, list_validators, not_modified_response, set_validators, validator_headers
+from cache import cache_key, invalidate, read_through
+from rollups import remove_class
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import ClassRequest, ClassResponse, Page
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Classes)
+ClassPatch = patch_body(ClassRequest)
 
-@app.get("/class", operation_id="get_all_classes")
-async def read_all(db: db_dependency):
-    return db.query(Classes).all()
+@router.get("/class", operation_id="get_all_classes", response_model=Page[ClassResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters, request: Request):
+    etag, last_modified = await list_validators(db, Classes, request)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    body = await paginate(db, Classes, page, query=query, item_model=ClassResponse)
+    return ORJSONResponse(body, headers=validator_headers(etag, last_modified))
 
-@app.post("/class", status_code=status.HTTP_201_CREATED)
+@router.post("/class", status_code=status.HTTP_201_CREATED)
 async def create_class(db: db_dependency, class_request: ClassRequest):
-    teacher = db.query(Teachers).filter(Teachers.teachers_id == class_request.teacher_id).first()
-    if not teacher:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid teacher ID")
-    
-    course = db.query(Courses).filter(Courses.courses_id == class_request.course_id).first()
-    if not course:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID")
-            
-    class_model = Teachers(**class_request.model_dump())
+    class_model = Classes(**class_request.model_dump())
     db.add(class_model)
-    db.commit()
-    db.refresh(class_model)
+    await commit_or_400(db)
     return class_model
     
-@app.get("/class/{class_id}", status_code=status.HTTP_200_OK)
-async def read_class(db: db_dependency, class_id: UUID):
-    class_model = db.query(Classes).filter(Classes.classes_id == class_id).first()
+@router.get("/class/{class_id}", status_code=status.HTTP_200_OK)
+async def read_class(db: db_dependency, class_id: UUID, request: Request, response: Response, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Classes, class_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Class not found.')
+        return expanded
+
+    class_model = await read_through(cache_key('class', class_id), lambda: db.get(Classes, class_id), ClassResponse)
     if class_model is not None:
+        etag, last_modified = entity_validators('classes', class_id, class_model['updated_at'])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        set_validators(response, etag, last_modified)
         return class_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Class not found.')
 
-@app.put("/class/{class_id}")
+@router.put("/class/{class_id}")
 async def update_class(db: db_dependency, class_request: ClassRequest, class_id: UUID):
-    class_model = db.query(Classes).filter(Classes.classes_id == class_id).first()
+    class_model = await db.get(Classes, class_id)
     if class_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Class not found.')
 
@@ -56,19 +62,26 @@ async def update_class(db: db_dependency, class_request: ClassRequest, class_id:
     class_model.course_id = class_request.course_id
     
     db.add(class_model)
-    db.commit()
-    db.refresh(class_model)
+    await commit_or_400(db)
+    await invalidate(cache_key('class', class_id))
+    await db.refresh(class_model)
     return class_model
     
-@app.delete("/class/{class_id}", status_code=status.HTTP_200_OK)
+@router.patch("/class/{class_id}", response_model=ClassResponse)
+async def patch_class(db: db_dependency, class_request: ClassPatch, class_id: UUID):
+    values, expected = patch_values(class_request)
+    row = await patch_row(db, Classes, class_id, values, 'Class not found.', expected)
+    await commit_or_400(db)
+    await invalidate(cache_key('class', class_id))
+    return patched(row, ClassResponse)
+
+@router.delete("/class/{class_id}", status_code=status.HTTP_200_OK)
 async def delete_class(db: db_dependency, class_id: UUID):
-    class_model = db.query(Classes).filter(Classes.teacher_id == class_id).first()
+    class_model = await db.get(Classes, class_id)
     if class_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Class not found.')
-    db.delete(class_model)
-    db.commit()
-    return {"detail": "Class deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await remove_class(db, class_id)
+    await db.delete(class_model)
+    await commit_or_400(db)
+    await invalidate(cache_key('class', class_id))
+    return {"detail": "Class deleted successfully"}
\ No newline at end of file
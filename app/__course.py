@@ -1,45 +1,59 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from models import Courses
 from starlette import status
-from database import SessionLocal
-from schema import CourseRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from conditional import entity_validators, is_not_modified, list_validators, not_modified_response, set_validators, validator_headers
+from cache import cache_key, invalidate, read_through
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import CourseRequest, CourseResponse, Page
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Courses)
+CoursePatch = patch_body(CourseRequest)
 
-@app.get("/course", operation_id="get_course")
-async def read_all(db: db_dependency):
-    return db.query(Courses).all()
+@router.get("/course", operation_id="get_course", response_model=Page[CourseResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters, request: Request):
+    etag, last_modified = await list_validators(db, Courses, request)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    body = await paginate(db, Courses, page, query=query, item_model=CourseResponse)
+    return ORJSONResponse(body, headers=validator_headers(etag, last_modified))
 
-@app.post("/course", status_code=status.HTTP_201_CREATED)
+@router.post("/course", status_code=status.HTTP_201_CREATED)
 async def create_course(db: db_dependency, course_request: CourseRequest):
     course_model = Courses(**course_request.model_dump())
     db.add(course_model)
-    db.commit()
-    db.refresh(course_model)  
+    await db.commit()
+    await db.refresh(course_model)  
     return course_model
     
-@app.get("/course/{course_id}", status_code=status.HTTP_200_OK)
-async def read_courses(db: db_dependency, course_id: UUID):
-    course_model = db.query(Courses).filter(Courses.courses_id == course_id).first()
+@router.get("/course/{course_id}", status_code=status.HTTP_200_OK)
+async def read_courses(db: db_dependency, course_id: UUID, request: Request, response: Response, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Courses, course_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Course not found.')
+        return expanded
+
+    course_model = await read_through(cache_key('course', course_id), lambda: db.get(Courses, course_id), CourseResponse)
     if course_model is not None:
+        etag, last_modified = entity_validators('courses', course_id, course_model['updated_at'])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        set_validators(response, etag, last_modified)
         return course_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Course not found.')
 
-@app.put("/course/{course_id}")
+@router.put("/course/{course_id}")
 async def update_course(db: db_dependency, course_request: CourseRequest, course_id: UUID):
-    course_model = db.query(Courses).filter(Courses.courses_id == course_id).first()
+    course_model = await db.get(Courses, course_id)
     if course_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Course not found.')
 
@@ -47,19 +61,25 @@ async def update_course(db: db_dependency, course_request: CourseRequest, course
     course_model.description = course_request.description
     
     db.add(course_model)
-    db.commit()
-    db.refresh(course_model)  
+    await db.commit()
+    await invalidate(cache_key('course', course_id))
+    await db.refresh(course_model)  
     return course_model
     
-@app.delete("/course/{course_id}", status_code=status.HTTP_200_OK)
+@router.patch("/course/{course_id}", response_model=CourseResponse)
+async def patch_course(db: db_dependency, course_request: CoursePatch, course_id: UUID):
+    values, expected = patch_values(course_request)
+    row = await patch_row(db, Courses, course_id, values, 'Course not found.', expected)
+    await commit_or_400(db)
+    await invalidate(cache_key('course', course_id))
+    return patched(row, CourseResponse)
+
+@router.delete("/course/{course_id}", status_code=status.HTTP_200_OK)
 async def delete_course(db: db_dependency, course_id: UUID):
-    course_model = db.query(Courses).filter(Courses.courses_id == course_id).first()
+    course_model = await db.get(Courses, course_id)
     if course_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Course not found.')
-    db.delete(course_model)
-    db.commit()
-    return {"detail": "Course deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(course_model)
+    await db.commit()
+    await invalidate(cache_key('course', course_id))
+    return {"detail": "Course deleted successfully"}
\ No newline at end of file
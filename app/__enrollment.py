@@ -1,57 +1,49 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import Enrollments, Students, Courses
+from fastapi import APIRouter, HTTPException
+from models import Enrollments
 from starlette import status
-from database import SessionLocal
-from schema import EnrollmentRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import EnrollmentRequest, EnrollmentResponse, Page
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Enrollments)
+EnrollmentPatch = patch_body(EnrollmentRequest, versioned=False)
 
-@app.get("/enrollment", operation_id="get_all_enrollments")
-async def read_all(db: db_dependency):
-    return db.query(Enrollments).all()
+@router.get("/enrollment", operation_id="get_all_enrollments", response_model=Page[EnrollmentResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Enrollments, page, Enrollments.enrolled_at, query=query, item_model=EnrollmentResponse))
 
-@app.post("/enrollment", status_code=status.HTTP_201_CREATED)
+@router.post("/enrollment", status_code=status.HTTP_201_CREATED)
 async def create_enrollment(db: db_dependency, enrollment_request: EnrollmentRequest):
-    student = db.query(Students).filter(Students.students_id == enrollment_request.student_id).first()
-    if not student:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid student ID")
-    
-    course = db.query(Courses).filter(Courses.courses_id == enrollment_request.course_id).first()
-    if not course:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID")
-    
-    existing_student = db.query(Enrollments).filter(Enrollments.student_id == enrollment_request.student_id).first()
-    if existing_student:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Student already enrolled in a course.")
-        
+    # foreign keys and uq_enrollments_student_id_course_id do the checking
     enrollment_model = Enrollments(**enrollment_request.model_dump())
     db.add(enrollment_model)
-    db.commit()
-    db.refresh(enrollment_model)
+    await commit_or_400(db)
     return enrollment_model
     
-@app.get("/enrollment/{enrollment_id}", status_code=status.HTTP_200_OK)
-async def read_enrollment(db: db_dependency, enrollment_id: UUID):
-    enrollment_model = db.query(Enrollments).filter(Enrollments.enrollments_id == enrollment_id).first()
+@router.get("/enrollment/{enrollment_id}", status_code=status.HTTP_200_OK)
+async def read_enrollment(db: db_dependency, enrollment_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Enrollments, enrollment_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
+        return expanded
+
+    enrollment_model = await db.get(Enrollments, enrollment_id)
     if enrollment_model is not None:
         return enrollment_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
 
-@app.put("/enrollment/{enrollment_id}")
+@router.put("/enrollment/{enrollment_id}")
 async def update_enrollment(db: db_dependency, enrollment_request: EnrollmentRequest, enrollment_id: UUID):
-    enrollment_model = db.query(Enrollments).filter(Enrollments.enrollments_id == enrollment_id).first()
+    enrollment_model = await db.get(Enrollments, enrollment_id)
     if enrollment_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
 
@@ -59,19 +51,22 @@ async def update_enrollment(db: db_dependency, enrollment_request: EnrollmentReq
     enrollment_model.course_id = enrollment_request.course_id
     
     db.add(enrollment_model)
-    db.commit()
-    db.refresh(enrollment_model)
+    await commit_or_400(db)
+    await db.refresh(enrollment_model)
     return enrollment_model
     
-@app.delete("/enrollment/{enrollment_id}", status_code=status.HTTP_200_OK)
+@router.patch("/enrollment/{enrollment_id}", response_model=EnrollmentResponse)
+async def patch_enrollment(db: db_dependency, enrollment_request: EnrollmentPatch, enrollment_id: UUID):
+    values, _ = patch_values(enrollment_request)
+    row = await patch_row(db, Enrollments, enrollment_id, values, 'Enrollment not found.')
+    await commit_or_400(db)
+    return patched(row, EnrollmentResponse)
+
+@router.delete("/enrollment/{enrollment_id}", status_code=status.HTTP_200_OK)
 async def delete_enrollment(db: db_dependency, enrollment_id: UUID):
-    enrollment_model = db.query(Enrollments).filter(Enrollments.enrollments_id == enrollment_id).first()
+    enrollment_model = await db.get(Enrollments, enrollment_id)
     if enrollment_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Enrollment not found.')
-    db.delete(enrollment_model)
-    db.commit()
-    return {"detail": "Enrollment deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(enrollment_model)
+    await db.commit()
+    return {"detail": "Enrollment deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import inspect, select
+from models import Attendance, Fees, Students
+from starlette import status
+from database import AsyncSessionLocal
+from schema import AttendanceRequest, FeeRequest, StudentRequest
+
+router = APIRouter()
+
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORTS = {
+    "students": (Students, StudentRequest),
+    "fees": (Fees, FeeRequest),
+    "attendances": (Attendance, AttendanceRequest),
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def export_columns(model, request_model):
+    # primary key first, then the request model's field order, then whatever the table adds
+    table_columns = model.__table__.columns
+    names = [column.name for column in inspect(model).primary_key]
+    names += [name for name in request_model.model_fields if name in table_columns and name not in names]
+    names += [column.name for column in table_columns if column.name not in names]
+    return [table_columns[name] for name in names]
+
+async def stream_rows(columns):
+    stmt = select(*columns).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+async def stream_ndjson(columns):
+    names = [column.name for column in columns]
+    async for partition in stream_rows(columns):
+        yield "".join(json.dumps(dict(zip(names, row)), default=str) + "\n" for row in partition)
+
+async def stream_csv(columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    async for partition in stream_rows(columns):
+        writer.writerows(partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+@router.get("/export/{entity}", operation_id="export_entity")
+async def export_entity(entity: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    if entity not in EXPORTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Unknown export entity.')
+
+    columns = export_columns(*EXPORTS[entity])
+    rows = stream_ndjson(columns) if format == "ndjson" else stream_csv(columns)
+    headers = {"Content-Disposition": f'attachment; filename="{entity}.{format}"'}
+    return StreamingResponse(rows, media_type=MEDIA_TYPES[format], headers=headers)
@@ -1,71 +1,140 @@
-from typing import Annotated
+from datetime import date
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import Fees, Students
+from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy import select
+from models import FeeBalances, Fees, Students
 from starlette import status
-from database import SessionLocal
-from schema import FeeRequest
+from database import db_dependency
+from integrity import commit_or_400, flush_or_400
+from expand import expand_param, read_expanded
+from bulk import bulk_upsert, parse_bulk_rows, row_error
+from filters import ListQuery, filter_params
+from ledger import apply_fee_changes, fee_key, money, school_aging, student_aging
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import FeeRequest, FeeResponse, Page
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Fees)
+FeePatch = patch_body(FeeRequest)
 
-@app.get("/fee", operation_id="get_all_fees")
-async def read_all(db: db_dependency):
-    return db.query(Fees).all()
+@router.get("/fee", operation_id="get_all_fees", response_model=Page[FeeResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Fees, page, query=query, item_model=FeeResponse))
 
-@app.post("/fee", status_code=status.HTTP_201_CREATED)
+@router.post("/fee", status_code=status.HTTP_201_CREATED)
 async def create_fee(db: db_dependency, fee_request: FeeRequest):
-    student = db.query(Students).filter(Students.students_id == fee_request.student_id).first()
-    if not student:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid student ID")
-        
+    # fees_student_id_fkey does the checking, before the ledger is touched
     fee_model = Fees(**fee_request.model_dump())
     db.add(fee_model)
-    db.commit()
-    db.refresh(fee_model)
+    await flush_or_400(db)
+    await apply_fee_changes(db, added=[fee_key(fee_model)])
+    await commit_or_400(db)
     return fee_model
     
-@app.get("/fee/{fee_id}", status_code=status.HTTP_200_OK)
-async def read_fee(db: db_dependency, fee_id: UUID):
-    fee_model = db.query(Fees).filter(Fees.fees_id == fee_id).first()
+@router.post("/fee/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_fees(db: db_dependency, request: Request):
+    rows, results = await parse_bulk_rows(request, FeeRequest)
+    student_ids = {row.student_id for row in rows.values()}
+    students = set(await db.scalars(select(Students.students_id).where(Students.students_id.in_(student_ids))))
+
+    values = {}
+    for index, row in rows.items():
+        if row.student_id not in students:
+            results[index] = row_error(index, 'Invalid student ID')
+        else:
+            values[index] = row.model_dump()
+
+    # plain inserts, so every row in values is added to the ledger in the same transaction
+    await apply_fee_changes(db, added=[(row["student_id"], row["due_date"], row["status"], row["amount"]) for row in values.values()])
+    return await bulk_upsert(db, Fees, values, results)
+    
+@router.get("/fee/{fee_id}", status_code=status.HTTP_200_OK)
+async def read_fee(db: db_dependency, fee_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Fees, fee_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Fee not found.')
+        return expanded
+
+    fee_model = await db.get(Fees, fee_id)
     if fee_model is not None:
         return fee_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Fee not found.')
 
-@app.put("/fee/{fee_id}")
+@router.put("/fee/{fee_id}")
 async def update_fee(db: db_dependency, fee_request: FeeRequest, fee_id: UUID):
-    fee_model = db.query(Fees).filter(Fees.fees_id == fee_id).first()
+    # locked, so the values taken out of the ledger are still the row's when it commits
+    fee_model = await db.get(Fees, fee_id, with_for_update=True)
     if fee_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Fee not found.')
 
+    previous = fee_key(fee_model)
     fee_model.student_id = fee_request.student_id
     fee_model.amount = fee_request.amount
     fee_model.status = fee_request.status
     fee_model.due_date = fee_request.due_date
     
     db.add(fee_model)
-    db.commit()
-    db.refresh(fee_model)
+    await flush_or_400(db)
+    await apply_fee_changes(db, removed=[previous], added=[fee_key(fee_model)])
+    await commit_or_400(db)
+    await db.refresh(fee_model)
     return fee_model
     
-@app.delete("/fee/{fee_id}", status_code=status.HTTP_200_OK)
+@router.patch("/fee/{fee_id}", response_model=FeeResponse)
+async def patch_fee(db: db_dependency, fee_request: FeePatch, fee_id: UUID):
+    values, expected = patch_values(fee_request)
+    row = await patch_row(
+        db, Fees, fee_id, values, 'Fee not found.', expected,
+        previous=[Fees.student_id, Fees.due_date, Fees.status, Fees.amount],
+    )
+    previous = (row.previous_student_id, row.previous_due_date, row.previous_status, row.previous_amount)
+    await apply_fee_changes(db, removed=[previous], added=[fee_key(row)])
+    await commit_or_400(db)
+    return patched(row, FeeResponse)
+
+@router.delete("/fee/{fee_id}", status_code=status.HTTP_200_OK)
 async def delete_fee(db: db_dependency, fee_id: UUID):
-    fee_model = db.query(Fees).filter(Fees.fees_id == fee_id).first()
+    fee_model = await db.get(Fees, fee_id, with_for_update=True)
     if fee_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Fee not found.')
-    db.delete(fee_model)
-    db.commit()
+    await db.delete(fee_model)
+    await flush_or_400(db)
+    await apply_fee_changes(db, removed=[fee_key(fee_model)])
+    await commit_or_400(db)
     return {"detail": "Fee deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+
+@router.get("/fee/ledger/aging", status_code=status.HTTP_200_OK, operation_id="get_fee_aging")
+async def read_fee_aging(db: db_dependency, as_of: date | None = None):
+    return await school_aging(db, as_of or date.today())
+
+@router.get("/fee/ledger/students", status_code=status.HTTP_200_OK, operation_id="get_fee_balances")
+async def read_fee_balances(db: db_dependency, page: page_dependency, as_of: date | None = None):
+    # students with pending fees, largest balance first, each with their own aging
+    query = ListQuery([FeeBalances.pending_count > 0], FeeBalances.pending_amount, descending=True)
+    balances = await paginate(db, FeeBalances, page, query=query)
+    aging = await student_aging(db, [item["student_id"] for item in balances["items"]], as_of or date.today())
+    for item in balances["items"]:
+        if "pending_amount" in item:
+            item["pending_amount"] = money(item["pending_amount"])
+        item["aging"] = aging[item["student_id"]]
+    return balances
+
+@router.get("/student/{student_id}/fees/balance", status_code=status.HTTP_200_OK)
+async def read_student_fee_balance(db: db_dependency, student_id: UUID, as_of: date | None = None):
+    student = await db.get(Students, student_id)
+    if student is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
+
+    balance = await db.get(FeeBalances, student_id)
+    aging = await student_aging(db, [student_id], as_of or date.today())
+    return {
+        "student_id": student_id,
+        "as_of": as_of or date.today(),
+        "pending_amount": money(balance.pending_amount if balance else 0),
+        "pending_count": balance.pending_count if balance else 0,
+        "aging": aging[student_id],
+    }
\ No newline at end of file
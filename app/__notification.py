@@ -1,68 +1,219 @@
-from typing import Annotated
+import asyncio
+import json
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import Notifications, Users
+from fastapi import APIRouter, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
+from models import Classes, Courses, NotificationJobs, Notifications, RoleEnum, Users
 from starlette import status
-from database import SessionLocal
-from schema import NotificationRequest
+from database import db_dependency
+from integrity import commit_or_400, flush_or_400
+from filters import ListQuery, filter_params
+from inbox import apply_unread_changes, hub, publish, push_payload, unread_count
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from broadcast import get_queue
+from schema import BroadcastRequest, InboxPage, NotificationRequest, NotificationResponse, Page
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+STREAM_KEEPALIVE = 15  # seconds between keep-alive comments on an idle stream
 
-@app.get("/notification", operation_id="get_notifications")
-async def read_all(db: db_dependency):
-    return db.query(Notifications).all()
+list_filters = filter_params(Notifications)
+NotificationPatch = patch_body(NotificationRequest, versioned=False)
 
-@app.post("/notification", status_code=status.HTTP_201_CREATED)
+@router.get("/notification", operation_id="get_notifications", response_model=Page[NotificationResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Notifications, page, query=query, item_model=NotificationResponse))
+
+@router.post("/notification", status_code=status.HTTP_201_CREATED)
 async def create_notification(db: db_dependency, notification_request: NotificationRequest):
-    user = db.query(Users).filter(Users.users_id == notification_request.user_id).first()
+    user = await db.get(Users, notification_request.user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid user ID.')
     notification_model = Notifications(**notification_request.model_dump())
     db.add(notification_model)
-    db.commit()
-    db.refresh(notification_model)  
+    await db.flush()
+    await db.refresh(notification_model)
+    await apply_unread_changes(db, added=[notification_model.user_id])
+    await publish(db, [push_payload(notification_model.notifications_id, notification_model.user_id, notification_model.message, notification_model.created_at)])
+    await db.commit()
     return notification_model
     
-@app.get("/notification/{notification_id}", status_code=status.HTTP_200_OK)
+@router.post("/notification/broadcast", status_code=status.HTTP_202_ACCEPTED)
+async def create_broadcast(db: db_dependency, broadcast_request: BroadcastRequest):
+    role = None
+    if broadcast_request.target == 'role':
+        valid_roles = [role.value for role in RoleEnum]
+        if broadcast_request.role is None or broadcast_request.role.lower() not in valid_roles:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"role must be one of: {', '.join(valid_roles)}.")
+        role = RoleEnum(broadcast_request.role.lower())
+    else:
+        model = Courses if broadcast_request.target == 'course' else Classes
+        if broadcast_request.target_id is None or await db.get(model, broadcast_request.target_id) is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {broadcast_request.target} ID.")
+
+    job_model = NotificationJobs(
+        target=broadcast_request.target,
+        target_id=broadcast_request.target_id if role is None else None,
+        role=role,
+        audience=broadcast_request.audience,
+        message=broadcast_request.message,
+    )
+    db.add(job_model)
+    await db.commit()
+    await db.refresh(job_model)
+    await get_queue().put(job_model.jobs_id)
+    return {"jobs_id": job_model.jobs_id, "status": job_model.status}
+
+@router.get("/notification/broadcast/{job_id}", status_code=status.HTTP_200_OK)
+async def read_broadcast(db: db_dependency, job_id: UUID):
+    job_model = await db.get(NotificationJobs, job_id)
+    if job_model is not None:
+        return job_model
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Broadcast job not found.')
+
+@router.get("/notification/{notification_id}", status_code=status.HTTP_200_OK)
 async def read_notification(db: db_dependency, notification_id: UUID):
-    notification_model = db.query(Notifications).filter(Notifications.notifications_id == notification_id).first()
+    notification_model = await db.get(Notifications, notification_id)
     if notification_model is not None:
         return notification_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Notification not found.')
 
-@app.put("/notification/{notification_id}")
+@router.put("/notification/{notification_id}")
 async def update_notification(db: db_dependency, notification_request: NotificationRequest, notification_id: UUID):
-    notification_model = db.query(Notifications).filter(Notifications.courses_id == notification_id).first()
+    # locked, so a concurrent mark-read waits and the read_at seen here still holds at commit
+    notification_model = await db.get(Notifications, notification_id, with_for_update=True)
     if notification_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Notification not found.')
 
+    previous_user_id = notification_model.user_id
     notification_model.user_id = notification_request.user_id
     notification_model.message = notification_request.message
     
     db.add(notification_model)
-    db.commit()
-    db.refresh(notification_model)  
+    await flush_or_400(db)
+    if notification_model.read_at is None and previous_user_id != notification_request.user_id:
+        await apply_unread_changes(db, removed=[previous_user_id], added=[notification_request.user_id])
+    await commit_or_400(db)
+    await db.refresh(notification_model)  
     return notification_model
     
-@app.delete("/notification/{notification_id}", status_code=status.HTTP_200_OK)
+@router.patch("/notification/{notification_id}", response_model=NotificationResponse)
+async def patch_notification(db: db_dependency, notification_request: NotificationPatch, notification_id: UUID):
+    values, _ = patch_values(notification_request)
+    row = await patch_row(db, Notifications, notification_id, values, 'Notification not found.', previous=[Notifications.user_id])
+    if row.read_at is None and row.previous_user_id != row.user_id:
+        await apply_unread_changes(db, removed=[row.previous_user_id], added=[row.user_id])
+    await commit_or_400(db)
+    return patched(row, NotificationResponse)
+
+@router.delete("/notification/{notification_id}", status_code=status.HTTP_200_OK)
 async def delete_notification(db: db_dependency, notification_id: UUID):
-    notification_model = db.query(Notifications).filter(Notifications.courses_id == notification_id).first()
+    notification_model = await db.get(Notifications, notification_id, with_for_update=True)
     if notification_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Notification not found.')
-    db.delete(notification_model)
-    db.commit()
-    return {"detail": "Course deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(notification_model)
+    if notification_model.read_at is None:
+        await apply_unread_changes(db, removed=[notification_model.user_id])
+    await commit_or_400(db)
+    return {"detail": "Notification deleted successfully"}
+
+@router.get("/user/{user_id}/notifications", status_code=status.HTTP_200_OK, response_model=InboxPage)
+async def read_inbox(db: db_dependency, page: page_dependency, user_id: UUID, unread: bool = False):
+    # newest first; keyset pages over the (user_id, created_at, notifications_id) index
+    criteria = [Notifications.user_id == user_id]
+    if unread:
+        criteria.append(Notifications.read_at.is_(None))
+    inbox = await paginate(db, Notifications, page, query=ListQuery(criteria, Notifications.created_at, descending=True), item_model=NotificationResponse)
+    inbox["unread"] = await unread_count(db, user_id)
+    return ORJSONResponse(inbox)
+
+@router.get("/user/{user_id}/notifications/unread", status_code=status.HTTP_200_OK)
+async def read_unread_count(db: db_dependency, user_id: UUID):
+    return {"user_id": user_id, "unread": await unread_count(db, user_id)}
+
+@router.post("/user/{user_id}/notifications/read", status_code=status.HTTP_200_OK)
+async def mark_all_read(db: db_dependency, user_id: UUID):
+    result = await db.execute(
+        update(Notifications)
+        .where(Notifications.user_id == user_id, Notifications.read_at.is_(None))
+        .values(read_at=func.now())
+    )
+    await apply_unread_changes(db, removed=[user_id] * result.rowcount)
+    await db.commit()
+    return {"user_id": user_id, "marked": result.rowcount, "unread": await unread_count(db, user_id)}
+
+@router.post("/user/{user_id}/notifications/{notification_id}/read", status_code=status.HTTP_200_OK)
+async def mark_read(db: db_dependency, user_id: UUID, notification_id: UUID):
+    # only the request that flips read_at decrements the counter, so repeats are harmless
+    marked = await db.scalar(
+        update(Notifications)
+        .where(Notifications.notifications_id == notification_id, Notifications.user_id == user_id, Notifications.read_at.is_(None))
+        .values(read_at=func.now())
+        .returning(Notifications.notifications_id)
+    )
+    if marked is None:
+        exists = await db.scalar(select(Notifications.notifications_id).where(Notifications.notifications_id == notification_id, Notifications.user_id == user_id))
+        if exists is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Notification not found.')
+    else:
+        await apply_unread_changes(db, removed=[user_id])
+    await db.commit()
+    return {"notifications_id": notification_id, "unread": await unread_count(db, user_id)}
+
+def sse_event(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/user/{user_id}/notifications/stream", status_code=status.HTTP_200_OK)
+async def stream_inbox(db: db_dependency, request: Request, user_id: UUID, last_event_id: str | None = Header(None)):
+    # Server-Sent Events: the unread count, anything missed since Last-Event-ID, then a
+    # "notification" event per new row pushed through LISTEN/NOTIFY
+    user = await db.get(Users, user_id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found.')
+
+    queue = await hub.subscribe(user_id)
+    missed = []
+    if last_event_id:
+        try:
+            last_id = UUID(last_event_id)
+        except ValueError:
+            last_id = None
+        if last_id is not None:
+            last_created_at = select(Notifications.created_at).where(Notifications.notifications_id == last_id).scalar_subquery()
+            missed = (await db.scalars(
+                select(Notifications)
+                .where(Notifications.user_id == user_id, Notifications.created_at > last_created_at)
+                .order_by(Notifications.created_at, Notifications.notifications_id)
+                .limit(500)
+            )).all()
+    unread = await unread_count(db, user_id)
+    await db.close()
+
+    async def events():
+        try:
+            yield sse_event("unread", {"unread": unread})
+            for notification in missed:
+                yield sse_event("notification", {
+                    "notifications_id": notification.notifications_id,
+                    "user_id": notification.user_id,
+                    "message": notification.message,
+                    "created_at": notification.created_at,
+                }, notification.notifications_id)
+            while not await request.is_disconnected():
+                try:
+                    notification = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_event("notification", notification, notification["notifications_id"])
+        finally:
+            hub.unsubscribe(user_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
\ No newline at end of file
@@ -1,61 +1,52 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import RoleEnum, Parents, Users, Students
+from fastapi import APIRouter, HTTPException
+from models import RoleEnum, Parents
+from auth import user_role
 from starlette import status
-from database import SessionLocal
-from schema import ParentsRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, ParentsRequest, ParentsResponse
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Parents)
+ParentsPatch = patch_body(ParentsRequest)
 
-@app.get("/parents", operation_id="get_all_parents")
-async def read_all(db: db_dependency):
-    return db.query(Parents).all()
+@router.get("/parents", operation_id="get_all_parents", response_model=Page[ParentsResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Parents, page, query=query, item_model=ParentsResponse))
 
-@app.post("/parents", status_code=status.HTTP_201_CREATED)
+@router.post("/parents", status_code=status.HTTP_201_CREATED)
 async def create_parents(db: db_dependency, parent_request: ParentsRequest):
-    user = db.query(Users).filter(Users.users_id == parent_request.user_id).first()
-    if user is None or user.role != RoleEnum.PARENT:
+    if await user_role(parent_request.user_id) != RoleEnum.PARENT.value:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid user ID. User must be a parent.')
-    
-    student = db.query(Students).filter(Students.students_id == parent_request.student_id).first()
-    if student is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid student ID.')
-    
-    existing_user_parents = db.query(Parents).filter(Parents.user_id == parent_request.user_id).first()
-    if existing_user_parents:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parent already exists for this user.")
-    
-    existing_student_parents = db.query(Parents).filter(Parents.student_id == parent_request.student_id).first()
-    if existing_student_parents:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parent already exists for this student.")
 
     parent_model = Parents(**parent_request.model_dump())
     db.add(parent_model)
-    db.commit()
-    db.refresh(parent_model)
+    await commit_or_400(db)
     return parent_model
     
-@app.get("/parents/{parent_id}", status_code=status.HTTP_200_OK)
-async def read_parents(db: db_dependency, parent_id: UUID):
-    parent_model = db.query(Parents).filter(Parents.parents_id == parent_id).first()
+@router.get("/parents/{parent_id}", status_code=status.HTTP_200_OK)
+async def read_parents(db: db_dependency, parent_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Parents, parent_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Parents not found.')
+        return expanded
+
+    parent_model = await db.get(Parents, parent_id)
     if parent_model is not None:
         return parent_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Parents not found.')
 
-@app.put("/parents/{parent_id}")
+@router.put("/parents/{parent_id}")
 async def update_parents(db: db_dependency, parent_request: ParentsRequest, parent_id: UUID):
-    parent_model = db.query(Parents).filter(Parents.parents_id == parent_id).first()
+    parent_model = await db.get(Parents, parent_id)
     if parent_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Parents not found.')
 
@@ -68,19 +59,22 @@ async def update_parents(db: db_dependency, parent_request: ParentsRequest, pare
     parent_model.relation = parent_request.relation
     
     db.add(parent_model)
-    db.commit()
-    db.refresh(parent_model)
+    await commit_or_400(db)
+    await db.refresh(parent_model)
     return parent_model
     
-@app.delete("/parents/{parent_id}", status_code=status.HTTP_200_OK)
+@router.patch("/parents/{parent_id}", response_model=ParentsResponse)
+async def patch_parents(db: db_dependency, parent_request: ParentsPatch, parent_id: UUID):
+    values, expected = patch_values(parent_request)
+    row = await patch_row(db, Parents, parent_id, values, 'Parents not found.', expected)
+    await commit_or_400(db)
+    return patched(row, ParentsResponse)
+
+@router.delete("/parents/{parent_id}", status_code=status.HTTP_200_OK)
 async def delete_parents(db: db_dependency, parent_id: UUID):
-    parent_model = db.query(Parents).filter(Parents.parents_id == parent_id).first()
+    parent_model = await db.get(Parents, parent_id)
     if parent_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
-    db.delete(parent_model)
-    db.commit()
-    return {"detail": "Parents deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(parent_model)
+    await db.commit()
+    return {"detail": "Parents deleted successfully"}
\ No newline at end of file
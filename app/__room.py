@@ -0,0 +1,64 @@
+from uuid import UUID
+from fastapi import APIRouter, HTTPException
+from models import Rooms
+from starlette import status
+from database import db_dependency
+from integrity import DELETE_ERRORS, commit_or_400
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, RoomRequest, RoomResponse
+
+router = APIRouter()
+
+list_filters = filter_params(Rooms)
+RoomPatch = patch_body(RoomRequest)
+
+@router.get("/room", operation_id="get_all_rooms", response_model=Page[RoomResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Rooms, page, query=query, item_model=RoomResponse))
+
+@router.post("/room", status_code=status.HTTP_201_CREATED)
+async def create_room(db: db_dependency, room_request: RoomRequest):
+    room_model = Rooms(**room_request.model_dump())
+    db.add(room_model)
+    await commit_or_400(db)
+    return room_model
+
+@router.get("/room/{room_id}", status_code=status.HTTP_200_OK)
+async def read_room(db: db_dependency, room_id: UUID):
+    room_model = await db.get(Rooms, room_id)
+    if room_model is not None:
+        return room_model
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Room not found.')
+
+@router.put("/room/{room_id}")
+async def update_room(db: db_dependency, room_request: RoomRequest, room_id: UUID):
+    room_model = await db.get(Rooms, room_id)
+    if room_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Room not found.')
+
+    room_model.name = room_request.name
+
+    db.add(room_model)
+    await commit_or_400(db)
+    await db.refresh(room_model)
+    return room_model
+
+@router.patch("/room/{room_id}", response_model=RoomResponse)
+async def patch_room(db: db_dependency, room_request: RoomPatch, room_id: UUID):
+    values, expected = patch_values(room_request)
+    row = await patch_row(db, Rooms, room_id, values, 'Room not found.', expected)
+    await commit_or_400(db)
+    return patched(row, RoomResponse)
+
+@router.delete("/room/{room_id}", status_code=status.HTTP_200_OK)
+async def delete_room(db: db_dependency, room_id: UUID):
+    room_model = await db.get(Rooms, room_id)
+    if room_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Room not found.')
+    # class_sessions_room_id_fkey of a room that is still booked is a 400
+    await db.delete(room_model)
+    await commit_or_400(db, DELETE_ERRORS)
+    return {"detail": "Room deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException, Query
+from starlette import status
+from database import db_dependency
+from search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, SEARCHABLE, search_people
+
+router = APIRouter()
+
+@router.get("/search", status_code=status.HTTP_200_OK, operation_id="search_people")
+async def search(
+    db: db_dependency,
+    q: str = Query(min_length=3, max_length=100, description="Part of a name, email or phone number"),
+    types: str | None = Query(None, description="Comma separated subset of student, teacher, parent"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+):
+    kinds = None
+    if types:
+        kinds = [kind.strip() for kind in types.split(",") if kind.strip()]
+        unknown = [kind for kind in kinds if kind not in SEARCHABLE]
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown search types: {', '.join(unknown)}.")
+    return {"query": q, "items": await search_people(db, q, kinds, limit)}
\ No newline at end of file
@@ -1,53 +1,87 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
+from sqlalchemy import select
+from fastapi import APIRouter, HTTPException, Request
 from models import RoleEnum, Students, Users
+from auth import user_role
+from archive import lock_students, remove_students
 from starlette import status
-from database import SessionLocal
-from schema import StudentRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from cache import cache_key, invalidate, read_through
+from bulk import bulk_upsert, parse_bulk_rows, row_error
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, StudentRequest, StudentResponse
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Students)
+StudentPatch = patch_body(StudentRequest)
 
-@app.get("/student", operation_id="get_all_students")
-async def read_all(db: db_dependency):
-    return db.query(Students).all()
+@router.get("/student", operation_id="get_all_students", response_model=Page[StudentResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Students, page, query=query, item_model=StudentResponse))
 
-@app.post("/student", status_code=status.HTTP_201_CREATED)
+@router.post("/student", status_code=status.HTTP_201_CREATED)
 async def create_student(db: db_dependency, std_request: StudentRequest):
-    user = db.query(Users).filter(Users.users_id == std_request.user_id).first()
-    if user is None or user.role != RoleEnum.STUDENT:
+    if await user_role(std_request.user_id) != RoleEnum.STUDENT.value:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid user ID. User must be a student.')
-    
-    existing_student = db.query(Students).filter(Students.user_id == std_request.user_id).first()
-    if existing_student:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Student already exists for this user.")
 
     std_model = Students(**std_request.model_dump())
     db.add(std_model)
-    db.commit()
-    db.refresh(std_model)
+    await commit_or_400(db)
     return std_model
     
-@app.get("/student/{student_id}", status_code=status.HTTP_200_OK)
-async def read_students(db: db_dependency, student_id: UUID):
-    std_model = db.query(Students).filter(Students.students_id == student_id).first()
+@router.post("/student/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_students(db: db_dependency, request: Request):
+    rows, results = await parse_bulk_rows(request, StudentRequest)
+    user_ids = {row.user_id for row in rows.values()}
+
+    student_users = set(await db.scalars(select(Users.users_id).where(Users.users_id.in_(user_ids), Users.role == RoleEnum.STUDENT)))
+    existing_students = dict((await db.execute(select(Students.user_id, Students.email).where(Students.user_id.in_(user_ids)))).all())
+    emails = {row.email for row in rows.values()}
+    email_owners = dict((await db.execute(select(Students.email, Students.user_id).where(Students.email.in_(emails)))).all())
+
+    values, seen_users, seen_emails = {}, set(), set()
+    for index, row in rows.items():
+        if row.user_id not in student_users:
+            results[index] = row_error(index, 'Invalid user ID. User must be a student.')
+        elif existing_students.get(row.user_id, row.email) != row.email:
+            results[index] = row_error(index, 'Student already exists for this user.')
+        elif email_owners.get(row.email, row.user_id) != row.user_id:
+            results[index] = row_error(index, 'Email already belongs to another student.')
+        elif row.user_id in seen_users or row.email in seen_emails:
+            results[index] = row_error(index, 'Duplicate user ID or email in batch.')
+        else:
+            seen_users.add(row.user_id)
+            seen_emails.add(row.email)
+            values[index] = row.model_dump()
+
+    # a row only updates the student its email already belongs to, and never moves it to another user
+    update_columns = [name for name in StudentRequest.model_fields if name not in ('email', 'user_id')]
+    summary = await bulk_upsert(db, Students, values, results, Students.email, update_columns)
+    await invalidate(*(cache_key('student', result['students_id']) for result in results if result['status'] == 'updated'))
+    return summary
+    
+@router.get("/student/{student_id}", status_code=status.HTTP_200_OK)
+async def read_students(db: db_dependency, student_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Students, student_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
+        return expanded
+
+    std_model = await read_through(cache_key('student', student_id), lambda: db.get(Students, student_id), StudentResponse)
     if std_model is not None:
         return std_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
 
-@app.put("/student/{student_id}")
+@router.put("/student/{student_id}")
 async def update_student(db: db_dependency, std_request: StudentRequest, student_id: UUID):
-    std_model = db.query(Students).filter(Students.students_id == student_id).first()
+    std_model = await db.get(Students, student_id)
     if std_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
 
@@ -61,19 +95,25 @@ async def update_student(db: db_dependency, std_request: StudentRequest, student
     std_model.address = std_request.address
     
     db.add(std_model)
-    db.commit()
-    db.refresh(std_model)
+    await commit_or_400(db)
+    await invalidate(cache_key('student', student_id))
+    await db.refresh(std_model)
     return std_model
     
-@app.delete("/student/{student_id}", status_code=status.HTTP_200_OK)
+@router.patch("/student/{student_id}", response_model=StudentResponse)
+async def patch_student(db: db_dependency, std_request: StudentPatch, student_id: UUID):
+    values, expected = patch_values(std_request)
+    row = await patch_row(db, Students, student_id, values, 'Student not found.', expected)
+    await commit_or_400(db)
+    await invalidate(cache_key('student', student_id))
+    return patched(row, StudentResponse)
+
+@router.delete("/student/{student_id}", status_code=status.HTTP_200_OK)
 async def delete_student(db: db_dependency, student_id: UUID):
-    std_model = db.query(Students).filter(Students.students_id == student_id).first()
-    if std_model is None:
+    # a single DELETE; the student's rows go with it through ON DELETE CASCADE
+    if not await lock_students(db, select(Students.students_id).where(Students.students_id == student_id)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
-    db.delete(std_model)
-    db.commit()
-    return {"detail": "Student deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await remove_students(db, [student_id])
+    await db.commit()
+    await invalidate(cache_key('student', student_id))
+    return {"detail": "Student deleted successfully"}
\ No newline at end of file
@@ -1,53 +1,57 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import Subjects, Courses, Teachers
+from fastapi import APIRouter, HTTPException, Request, Response
+from models import Subjects
 from starlette import status
-from database import SessionLocal
-from schema import SubjectRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from conditional import entity_validators, is_not_modified, list_validators, not_modified_response, set_validators, validator_headers
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, SubjectRequest, SubjectResponse
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Subjects)
+SubjectPatch = patch_body(SubjectRequest)
 
-@app.get("/subject", operation_id="get_all_subjects")
-async def read_all(db: db_dependency):
-    return db.query(Subjects).all()
+@router.get("/subject", operation_id="get_all_subjects", response_model=Page[SubjectResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters, request: Request):
+    etag, last_modified = await list_validators(db, Subjects, request)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    body = await paginate(db, Subjects, page, query=query, item_model=SubjectResponse)
+    return ORJSONResponse(body, headers=validator_headers(etag, last_modified))
 
-@app.post("/subject", status_code=status.HTTP_201_CREATED)
+@router.post("/subject", status_code=status.HTTP_201_CREATED)
 async def create_subject(db: db_dependency, subject_request: SubjectRequest):
-    teacher = db.query(Teachers).filter(Teachers.teachers_id == subject_request.teacher_id).first()
-    if not teacher:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid teacher ID")
-    
-    course = db.query(Courses).filter(Courses.courses_id == subject_request.course_id).first()
-    if not course:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid course ID")
-            
     subject_model = Subjects(**subject_request.model_dump())
     db.add(subject_model)
-    db.commit()
-    db.refresh(subject_model)
+    await commit_or_400(db)
     return subject_model
     
-@app.get("/subject/{subject_id}", status_code=status.HTTP_200_OK)
-async def read_subject(db: db_dependency, subject_id: UUID):
-    subject_model = db.query(Subjects).filter(Subjects.subjects_id == subject_id).first()
+@router.get("/subject/{subject_id}", status_code=status.HTTP_200_OK)
+async def read_subject(db: db_dependency, subject_id: UUID, request: Request, response: Response, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Subjects, subject_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Subject not found.')
+        return expanded
+
+    subject_model = await db.get(Subjects, subject_id)
     if subject_model is not None:
+        etag, last_modified = entity_validators('subjects', subject_id, subject_model.updated_at)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        set_validators(response, etag, last_modified)
         return subject_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Subject not found.')
 
-@app.put("/subject/{subject_id}")
+@router.put("/subject/{subject_id}")
 async def update_subject(db: db_dependency, subject_request: SubjectRequest, subject_id: UUID):
-    subject_model = db.query(Subjects).filter(Subjects.subjects_id == subject_id).first()
+    subject_model = await db.get(Subjects, subject_id)
     if subject_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Subject not found.')
 
@@ -57,19 +61,22 @@ async def update_subject(db: db_dependency, subject_request: SubjectRequest, sub
     subject_model.course_id = subject_request.course_id
     
     db.add(subject_model)
-    db.commit()
-    db.refresh(subject_model)
+    await commit_or_400(db)
+    await db.refresh(subject_model)
     return subject_model
     
-@app.delete("/subject/{subject_id}", status_code=status.HTTP_200_OK)
+@router.patch("/subject/{subject_id}", response_model=SubjectResponse)
+async def patch_subject(db: db_dependency, subject_request: SubjectPatch, subject_id: UUID):
+    values, expected = patch_values(subject_request)
+    row = await patch_row(db, Subjects, subject_id, values, 'Subject not found.', expected)
+    await commit_or_400(db)
+    return patched(row, SubjectResponse)
+
+@router.delete("/subject/{subject_id}", status_code=status.HTTP_200_OK)
 async def delete_subject(db: db_dependency, subject_id: UUID):
-    subject_model = db.query(Subjects).filter(Subjects.subjects_id == subject_id).first()
+    subject_model = await db.get(Subjects, subject_id)
     if subject_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Subject not found.')
-    db.delete(subject_model)
-    db.commit()
-    return {"detail": "Enrollment deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(subject_model)
+    await db.commit()
+    return {"detail": "Enrollment deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,110 @@
+from uuid import UUID
+from fastapi import APIRouter, HTTPException
+from models import Courses, Students, Submissions
+from starlette import status
+from database import db_dependency
+from integrity import commit_or_400, flush_or_400
+from expand import expand_param, read_expanded
+from filters import filter_params
+from gradebook import apply_grade_changes, course_ids, course_ranking, student_grades, submission_key
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, SubmissionRequest, SubmissionResponse
+
+router = APIRouter()
+
+list_filters = filter_params(Submissions)
+SubmissionPatch = patch_body(SubmissionRequest, versioned=False)
+
+@router.get("/submission", operation_id="get_all_submissions", response_model=Page[SubmissionResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Submissions, page, Submissions.submission_date, query=query, item_model=SubmissionResponse))
+
+@router.post("/submission", status_code=status.HTTP_201_CREATED)
+async def create_submission(db: db_dependency, submission_request: SubmissionRequest):
+    courses = await course_ids(db, [submission_request.assignment_id])
+    if submission_request.assignment_id not in courses:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid assignment ID.')
+
+    submission_model = Submissions(**submission_request.model_dump())
+    db.add(submission_model)
+    await flush_or_400(db)
+    await apply_grade_changes(db, added=[submission_key(submission_model, courses[submission_model.assignment_id])])
+    await db.commit()
+    return submission_model
+
+@router.get("/submission/{submission_id}", status_code=status.HTTP_200_OK)
+async def read_submission(db: db_dependency, submission_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Submissions, submission_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Submission not found.')
+        return expanded
+
+    submission_model = await db.get(Submissions, submission_id)
+    if submission_model is not None:
+        return submission_model
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Submission not found.')
+
+@router.put("/submission/{submission_id}")
+async def update_submission(db: db_dependency, submission_request: SubmissionRequest, submission_id: UUID):
+    # locked, so the gradebook loses the grade the row still has when it commits
+    submission_model = await db.get(Submissions, submission_id, with_for_update=True)
+    if submission_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Submission not found.')
+
+    courses = await course_ids(db, [submission_model.assignment_id, submission_request.assignment_id])
+    if submission_request.assignment_id not in courses:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid assignment ID.')
+
+    previous = submission_key(submission_model, courses[submission_model.assignment_id])
+    submission_model.student_id = submission_request.student_id
+    submission_model.assignment_id = submission_request.assignment_id
+    submission_model.grade = submission_request.grade
+
+    db.add(submission_model)
+    await flush_or_400(db)
+    await apply_grade_changes(db, removed=[previous], added=[submission_key(submission_model, courses[submission_model.assignment_id])])
+    await db.commit()
+    await db.refresh(submission_model)
+    return submission_model
+
+@router.patch("/submission/{submission_id}", response_model=SubmissionResponse)
+async def patch_submission(db: db_dependency, submission_request: SubmissionPatch, submission_id: UUID):
+    values, _ = patch_values(submission_request)
+    row = await patch_row(
+        db, Submissions, submission_id, values, 'Submission not found.',
+        previous=[Submissions.student_id, Submissions.assignment_id, Submissions.grade],
+    )
+    courses = await course_ids(db, [row.previous_assignment_id, row.assignment_id])
+    previous = (row.previous_student_id, courses[row.previous_assignment_id], row.previous_assignment_id, row.previous_grade)
+    await apply_grade_changes(db, removed=[previous], added=[submission_key(row, courses[row.assignment_id])])
+    await commit_or_400(db)
+    return patched(row, SubmissionResponse)
+
+@router.delete("/submission/{submission_id}", status_code=status.HTTP_200_OK)
+async def delete_submission(db: db_dependency, submission_id: UUID):
+    submission_model = await db.get(Submissions, submission_id, with_for_update=True)
+    if submission_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Submission not found.')
+    courses = await course_ids(db, [submission_model.assignment_id])
+    await db.delete(submission_model)
+    await apply_grade_changes(db, removed=[submission_key(submission_model, courses[submission_model.assignment_id])])
+    await db.commit()
+    return {"detail": "Submission deleted successfully"}
+
+@router.get("/student/{student_id}/grades", status_code=status.HTTP_200_OK)
+async def read_student_grades(db: db_dependency, student_id: UUID):
+    # per-course average, spread and rank from the gradebook totals; submissions are not read
+    student = await db.get(Students, student_id)
+    if student is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Student not found.')
+    return {"student_id": student_id, "courses": await student_grades(db, student_id)}
+
+@router.get("/course/{course_id}/grades", status_code=status.HTTP_200_OK)
+async def read_course_grades(db: db_dependency, course_id: UUID):
+    course = await db.get(Courses, course_id)
+    if course is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Course not found.')
+    return {"course_id": course_id, "students": await course_ranking(db, course_id)}
\ No newline at end of file
@@ -1,58 +1,56 @@
-from typing import Annotated
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
-from models import RoleEnum, Teachers, Users
+from fastapi import APIRouter, HTTPException
+from models import RoleEnum, Teachers
+from auth import user_role
 from starlette import status
-from database import SessionLocal
-from schema import TeacherRequest
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, TeacherRequest, TeacherResponse
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Teachers)
+TeacherPatch = patch_body(TeacherRequest)
 
-@app.get("/teacher", operation_id="get_all_teachers")
-async def read_all(db: db_dependency):
-    return db.query(Teachers).all()
+@router.get("/teacher", operation_id="get_all_teachers", response_model=Page[TeacherResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Teachers, page, query=query, item_model=TeacherResponse))
 
-@app.post("/teacher", status_code=status.HTTP_201_CREATED)
+@router.post("/teacher", status_code=status.HTTP_201_CREATED)
 async def create_teacher(db: db_dependency, teacher_request: TeacherRequest):
-    user = db.query(Users).filter(Users.users_id == teacher_request.user_id).first()
-    if user is None or user.role != RoleEnum.TEACHER:
+    if await user_role(teacher_request.user_id) != RoleEnum.TEACHER.value:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid user ID. User must be a teacher.')
-        
-    existing_student = db.query(Teachers).filter(Teachers.user_id == teacher_request.user_id).first()
-    if existing_student:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Teacher already exists for this user.")
-        
+
     teacher_model = Teachers(**teacher_request.model_dump())
     db.add(teacher_model)
-    db.commit()
-    db.refresh(teacher_model)
+    await commit_or_400(db)
     return teacher_model
     
-@app.get("/teacher/{teacher_id}", status_code=status.HTTP_200_OK)
-async def read_teacher(db: db_dependency, teacher_id: UUID):
-    teacher_model = db.query(Teachers).filter(Teachers.teachers_id == teacher_id).first()
+@router.get("/teacher/{teacher_id}", status_code=status.HTTP_200_OK)
+async def read_teacher(db: db_dependency, teacher_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Teachers, teacher_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Teacher not found.')
+        return expanded
+
+    teacher_model = await db.get(Teachers, teacher_id)
     if teacher_model is not None:
         return teacher_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Teacher not found.')
 
-@app.put("/teacher/{teacher_id}")
+@router.put("/teacher/{teacher_id}")
 async def update_teacher(db: db_dependency, teacher_request: TeacherRequest, teacher_id: UUID):
-    teacher_model = db.query(Teachers).filter(Teachers.teachers_id == teacher_id).first()
+    teacher_model = await db.get(Teachers, teacher_id)
     if teacher_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Teacher not found.')
 
-    user = db.query(Users).filter(Users.users_id == teacher_request.user_id).first()
-    if user is None or user.role != RoleEnum.TEACHER:
+    if await user_role(teacher_request.user_id) != RoleEnum.TEACHER.value:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid user ID. User must be a teacher.')
 
     teacher_model.user_id = teacher_request.user_id
@@ -62,19 +60,25 @@ async def update_teacher(db: db_dependency, teacher_request: TeacherRequest, tea
     teacher_model.phone = teacher_request.phone
     
     db.add(teacher_model)
-    db.commit()
-    db.refresh(teacher_model)
+    await commit_or_400(db)
+    await db.refresh(teacher_model)
     return teacher_model
     
-@app.delete("/teacher/{teacher_id}", status_code=status.HTTP_200_OK)
+@router.patch("/teacher/{teacher_id}", response_model=TeacherResponse)
+async def patch_teacher(db: db_dependency, teacher_request: TeacherPatch, teacher_id: UUID):
+    values, expected = patch_values(teacher_request)
+    if "user_id" in values and await user_role(values["user_id"]) != RoleEnum.TEACHER.value:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid user ID. User must be a teacher.')
+
+    row = await patch_row(db, Teachers, teacher_id, values, 'Teacher not found.', expected)
+    await commit_or_400(db)
+    return patched(row, TeacherResponse)
+
+@router.delete("/teacher/{teacher_id}", status_code=status.HTTP_200_OK)
 async def delete_teacher(db: db_dependency, teacher_id: UUID):
-    teacher_model = db.query(Teachers).filter(Teachers.teachers_id == teacher_id).first()
+    teacher_model = await db.get(Teachers, teacher_id)
     if teacher_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Teacher not found.')
-    db.delete(teacher_model)
-    db.commit()
-    return {"detail": "Teacher deleted successfully"}
-    
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(teacher_model)
+    await db.commit()
+    return {"detail": "Teacher deleted successfully"}
\ No newline at end of file
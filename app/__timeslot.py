@@ -0,0 +1,66 @@
+from uuid import UUID
+from fastapi import APIRouter, HTTPException
+from models import TimeSlots
+from starlette import status
+from database import db_dependency
+from integrity import DELETE_ERRORS, commit_or_400
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
+from schema import Page, TimeSlotRequest, TimeSlotResponse
+
+router = APIRouter()
+
+list_filters = filter_params(TimeSlots)
+TimeSlotPatch = patch_body(TimeSlotRequest)
+
+@router.get("/timeslot", operation_id="get_all_time_slots", response_model=Page[TimeSlotResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, TimeSlots, page, query=query, item_model=TimeSlotResponse))
+
+@router.post("/timeslot", status_code=status.HTTP_201_CREATED)
+async def create_time_slot(db: db_dependency, time_slot_request: TimeSlotRequest):
+    time_slot_model = TimeSlots(**time_slot_request.model_dump())
+    db.add(time_slot_model)
+    await commit_or_400(db)
+    return time_slot_model
+
+@router.get("/timeslot/{time_slot_id}", status_code=status.HTTP_200_OK)
+async def read_time_slot(db: db_dependency, time_slot_id: UUID):
+    time_slot_model = await db.get(TimeSlots, time_slot_id)
+    if time_slot_model is not None:
+        return time_slot_model
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Time slot not found.')
+
+@router.put("/timeslot/{time_slot_id}")
+async def update_time_slot(db: db_dependency, time_slot_request: TimeSlotRequest, time_slot_id: UUID):
+    time_slot_model = await db.get(TimeSlots, time_slot_id)
+    if time_slot_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Time slot not found.')
+
+    time_slot_model.weekday = time_slot_request.weekday
+    time_slot_model.start_time = time_slot_request.start_time
+    time_slot_model.end_time = time_slot_request.end_time
+
+    db.add(time_slot_model)
+    await commit_or_400(db)
+    await db.refresh(time_slot_model)
+    return time_slot_model
+
+@router.patch("/timeslot/{time_slot_id}", response_model=TimeSlotResponse)
+async def patch_time_slot(db: db_dependency, time_slot_request: TimeSlotPatch, time_slot_id: UUID):
+    values, expected = patch_values(time_slot_request)
+    row = await patch_row(db, TimeSlots, time_slot_id, values, 'Time slot not found.', expected)
+    await commit_or_400(db)
+    return patched(row, TimeSlotResponse)
+
+@router.delete("/timeslot/{time_slot_id}", status_code=status.HTTP_200_OK)
+async def delete_time_slot(db: db_dependency, time_slot_id: UUID):
+    time_slot_model = await db.get(TimeSlots, time_slot_id)
+    if time_slot_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Time slot not found.')
+    # class_sessions_time_slot_id_fkey of a slot that is still used is a 400
+    await db.delete(time_slot_model)
+    await commit_or_400(db, DELETE_ERRORS)
+    return {"detail": "Time slot deleted successfully"}
\ No newline at end of file
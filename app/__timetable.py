@@ -0,0 +1,148 @@
+import asyncio
+from uuid import UUID, uuid4
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from models import ClassSessions, Classes, Rooms, Teachers, TimeSlots
+from starlette import status
+from database import db_dependency
+from integrity import execute_or_400
+from bulk import BULK_CHUNK_SIZE
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from timetable import solve, solver_pool
+from schema import ClassSessionRequest, ClassSessionResponse, Page, TimetableSolveRequest
+
+router = APIRouter()
+
+list_filters = filter_params(ClassSessions)
+
+@router.get("/timetable/session", operation_id="get_all_class_sessions", response_model=Page[ClassSessionResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, ClassSessions, page, query=query, item_model=ClassSessionResponse))
+
+@router.post("/timetable/session", status_code=status.HTTP_201_CREATED)
+async def create_session(db: db_dependency, session_request: ClassSessionRequest):
+    # the teacher is copied from the class in the same statement, and the unique indexes on
+    # (class, slot), (teacher, slot) and (room, slot) turn a double booking into a 400
+    table = ClassSessions.__table__
+    stmt = insert(ClassSessions).from_select(
+        ["class_sessions_id", "class_id", "teacher_id", "room_id", "time_slot_id", "created_at"],
+        select(
+            literal(uuid4(), table.c.class_sessions_id.type),
+            Classes.classes_id,
+            Classes.teacher_id,
+            literal(session_request.room_id, table.c.room_id.type),
+            literal(session_request.time_slot_id, table.c.time_slot_id.type),
+            func.now(),
+        ).where(Classes.classes_id == session_request.class_id),
+    ).returning(*table.columns)
+    row = (await execute_or_400(db, stmt)).first()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid class ID.')
+    await db.commit()
+    return dict(row._mapping)
+
+@router.delete("/timetable/session/{session_id}", status_code=status.HTTP_200_OK)
+async def delete_session(db: db_dependency, session_id: UUID):
+    session_model = await db.get(ClassSessions, session_id)
+    if session_model is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Session not found.')
+    await db.delete(session_model)
+    await db.commit()
+    return {"detail": "Session deleted successfully"}
+
+async def timetable(db, *criteria):
+    # in week order; each lookup is served by one of the (…, time_slot_id) unique indexes
+    rows = await db.execute(
+        select(
+            ClassSessions.class_sessions_id,
+            ClassSessions.time_slot_id,
+            TimeSlots.weekday,
+            TimeSlots.start_time,
+            TimeSlots.end_time,
+            ClassSessions.class_id,
+            Classes.name.label("class_name"),
+            ClassSessions.teacher_id,
+            ClassSessions.room_id,
+            Rooms.name.label("room_name"),
+        )
+        .join(TimeSlots, TimeSlots.time_slots_id == ClassSessions.time_slot_id)
+        .join(Classes, Classes.classes_id == ClassSessions.class_id)
+        .join(Rooms, Rooms.rooms_id == ClassSessions.room_id)
+        .where(*criteria)
+        .order_by(TimeSlots.weekday, TimeSlots.start_time)
+    )
+    return [dict(row._mapping) for row in rows]
+
+@router.get("/class/{class_id}/timetable", status_code=status.HTTP_200_OK)
+async def read_class_timetable(db: db_dependency, class_id: UUID):
+    if await db.get(Classes, class_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Class not found.')
+    return {"class_id": class_id, "sessions": await timetable(db, ClassSessions.class_id == class_id)}
+
+@router.get("/teacher/{teacher_id}/timetable", status_code=status.HTTP_200_OK)
+async def read_teacher_timetable(db: db_dependency, teacher_id: UUID):
+    if await db.get(Teachers, teacher_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Teacher not found.')
+    return {"teacher_id": teacher_id, "sessions": await timetable(db, ClassSessions.teacher_id == teacher_id)}
+
+@router.get("/room/{room_id}/timetable", status_code=status.HTTP_200_OK)
+async def read_room_timetable(db: db_dependency, room_id: UUID):
+    if await db.get(Rooms, room_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Room not found.')
+    return {"room_id": room_id, "sessions": await timetable(db, ClassSessions.room_id == room_id)}
+
+@router.post("/timetable/solve", status_code=status.HTTP_200_OK)
+async def solve_timetable(db: db_dependency, solve_request: TimetableSolveRequest):
+    # Sessions other than the requested classes' stay put and the solver works around them.
+    # The lock holds off other timetable writes, not reads, until the commit, so what the
+    # solver was given still holds when its sessions go in. The solve itself runs in a
+    # worker process and the event loop keeps serving other requests meanwhile
+    await db.execute(text("LOCK TABLE class_sessions IN SHARE ROW EXCLUSIVE MODE"))
+
+    class_stmt = select(Classes.classes_id, Classes.teacher_id)
+    if solve_request.class_ids is not None:
+        class_stmt = class_stmt.where(Classes.classes_id.in_(solve_request.class_ids))
+    classes = (await db.execute(class_stmt)).all()
+    if solve_request.class_ids is not None:
+        found = {class_id for class_id, _ in classes}
+        missing = [str(class_id) for class_id in solve_request.class_ids if class_id not in found]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Invalid class IDs.", "class_ids": missing})
+
+    if solve_request.replace:
+        stmt = delete(ClassSessions)
+        if solve_request.class_ids is not None:
+            stmt = stmt.where(ClassSessions.class_id.in_(solve_request.class_ids))
+        await db.execute(stmt)
+
+    slots = (await db.execute(select(TimeSlots.time_slots_id, TimeSlots.weekday).order_by(TimeSlots.weekday, TimeSlots.start_time))).all()
+    rooms = (await db.scalars(select(Rooms.rooms_id).order_by(Rooms.name))).all()
+    fixed = (await db.execute(select(ClassSessions.class_id, ClassSessions.teacher_id, ClassSessions.room_id, ClassSessions.time_slot_id))).all()
+
+    have = {}
+    for class_id, *_ in fixed:
+        have[class_id] = have.get(class_id, 0) + 1
+    wanted = [
+        (class_id, teacher_id, solve_request.periods_per_week - have.get(class_id, 0))
+        for class_id, teacher_id in classes
+        if have.get(class_id, 0) < solve_request.periods_per_week
+    ]
+
+    sessions, unscheduled = await asyncio.get_running_loop().run_in_executor(
+        solver_pool, solve, [tuple(slot) for slot in slots], list(rooms), wanted, [tuple(session) for session in fixed],
+    )
+
+    for start in range(0, len(sessions), BULK_CHUNK_SIZE):
+        await execute_or_400(db, insert(ClassSessions).values([
+            {"class_id": class_id, "teacher_id": teacher_id, "room_id": room_id, "time_slot_id": slot_id}
+            for class_id, teacher_id, room_id, slot_id in sessions[start:start + BULK_CHUNK_SIZE]
+        ]))
+    await db.commit()
+    return {
+        "scheduled": len(sessions),
+        "unscheduled": [{"class_id": class_id, "periods": periods} for class_id, periods in unscheduled.items()],
+    }
\ No newline at end of file
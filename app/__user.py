@@ -1,22 +1,25 @@
-from typing import Annotated
+import asyncio
 from uuid import UUID
-from sqlalchemy.orm import Session
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy import select
 from models import Users, Admins, RoleEnum
-from schema import UserRequest
+from schema import Page, UserRequest, UserResponse
 from starlette import status
-from database import SessionLocal
+from database import db_dependency
+from integrity import commit_or_400
+from expand import expand_param, read_expanded
+from cache import cache_key, invalidate, read_through
+from auth import forget_principal, hash_password
+from bulk import bulk_upsert, parse_bulk_rows, row_error
+from filters import filter_params
+from pagination import page_dependency, paginate
+from serialization import ORJSONResponse
+from patch import patch_body, patch_row, patch_values, patched
 
-app = FastAPI()
+router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-db_dependency = Annotated[Session, Depends(get_db)]
+list_filters = filter_params(Users)
+UserPatch = patch_body(UserRequest)
 
 def is_valid_role(role):
     formatted_role = role.lower()     
@@ -26,13 +29,13 @@ def is_valid_role(role):
     
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role value")
 
-@app.get("/user", operation_id="get_all_users")
-async def read_all(db: db_dependency):
-    return db.query(Users).all()
+@router.get("/user", operation_id="get_all_users", response_model=Page[UserResponse])
+async def read_all(db: db_dependency, page: page_dependency, query: list_filters):
+    return ORJSONResponse(await paginate(db, Users, page, query=query, item_model=UserResponse))
 
-@app.post("/user", status_code=status.HTTP_201_CREATED)
+@router.post("/user", status_code=status.HTTP_201_CREATED)
 async def create_user(db: db_dependency, user_request: UserRequest):
-    admin = db.query(Admins).filter(Admins.admins_id == user_request.admin_id).first() 
+    admin = await db.get(Admins, user_request.admin_id) 
     
     if not admin:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid admin ID")
@@ -44,30 +47,76 @@ async def create_user(db: db_dependency, user_request: UserRequest):
         admin_id=admin.admins_id,  
         username=user_request.username,
         email=user_request.email,
-        hashed_password=user_request.hashed_password,
+        hashed_password=await hash_password(user_request.hashed_password),
         role=role
     )
 
     db.add(user_model)
-    db.commit()
-    db.refresh(user_model)
+    await db.commit()
+    await db.refresh(user_model)
     return user_model
 
-@app.get("/user/{user_id}", status_code=status.HTTP_200_OK)
-async def read_user(db: db_dependency, user_id: UUID):
-    user_model = db.query(Users).filter(Users.users_id == user_id).first()
+@router.post("/user/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_users(db: db_dependency, request: Request):
+    rows, results = await parse_bulk_rows(request, UserRequest)
+    admin_ids = {row.admin_id for row in rows.values()}
+    admins = set(await db.scalars(select(Admins.admins_id).where(Admins.admins_id.in_(admin_ids))))
+    emails = {row.email for row in rows.values()}
+    email_owners = dict((await db.execute(select(Users.email, Users.username).where(Users.email.in_(emails)))).all())
+
+    values, seen_usernames, seen_emails = {}, set(), set()
+    for index, row in rows.items():
+        try:
+            role = is_valid_role(row.role)
+        except HTTPException as exc:
+            results[index] = row_error(index, exc.detail)
+            continue
+        if row.admin_id not in admins:
+            results[index] = row_error(index, "Invalid admin ID")
+        elif email_owners.get(row.email, row.username) != row.username:
+            results[index] = row_error(index, "Email already belongs to another user.")
+        elif row.username in seen_usernames or row.email in seen_emails:
+            results[index] = row_error(index, "Duplicate username or email in batch.")
+        else:
+            seen_usernames.add(row.username)
+            seen_emails.add(row.email)
+            values[index] = {**row.model_dump(), "role": RoleEnum[role]}
+
+    # hashes run side by side in the auth thread pool
+    hashes = await asyncio.gather(*(hash_password(row["hashed_password"]) for row in values.values()))
+    for row, hashed in zip(values.values(), hashes):
+        row["hashed_password"] = hashed
+
+    # an updated user gets a new password and maybe a new role, so their tokens are revoked
+    update_columns = ["admin_id", "email", "hashed_password", "role"]
+    summary = await bulk_upsert(db, Users, values, results, Users.username, update_columns, {"token_version": Users.token_version + 1})
+    updated = [result['users_id'] for result in results if result['status'] == 'updated']
+    await invalidate(*(cache_key('user', user_id) for user_id in updated))
+    for user_id in updated:
+        await forget_principal('user', user_id)
+    return summary
+
+@router.get("/user/{user_id}", status_code=status.HTTP_200_OK)
+async def read_user(db: db_dependency, user_id: UUID, expand: expand_param = None):
+    if expand:
+        expanded = await read_expanded(db, Users, user_id, expand)
+        if expanded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found.')
+        return expanded
+
+    user_model = await read_through(cache_key('user', user_id), lambda: db.get(Users, user_id), UserResponse)
     if user_model is not None:
         return user_model
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found.')
 
-@app.put("/user/{user_id}")
+@router.put("/user/{user_id}")
 async def update_user(db: db_dependency, user_request: UserRequest, user_id: UUID):
-    user_model = db.query(Users).filter(Users.users_id == user_id).first()
+    user_model = await db.get(Users, user_id)
     if user_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found.')
 
     # Validate the admin_id
-    admin = db.query(Admins).filter(Admins.admins_id == user_request.admin_id).first()  # Use admin_id
+    admin = await db.get(Admins, user_request.admin_id)  # Use admin_id
     if not admin:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid admin ID")
 
@@ -78,24 +127,43 @@ async def update_user(db: db_dependency, user_request: UserRequest, user_id: UUI
     user_model.admin_id = admin.admins_id 
     user_model.username = user_request.username
     user_model.email = user_request.email
-    user_model.hashed_password = user_request.hashed_password
+    user_model.hashed_password = await hash_password(user_request.hashed_password)
     user_model.role = roles
+    # new credentials or role: tokens issued before this update stop working
+    user_model.token_version = Users.token_version + 1
 
     db.add(user_model)
-    db.commit()
-    db.refresh(user_model)
+    await db.commit()
+    await invalidate(cache_key('user', user_id))
+    await forget_principal('user', user_id)
+    await db.refresh(user_model)
     return {'detail': 'User updated successfully.'}
 
-@app.delete("/user/{user_id}", status_code=status.HTTP_200_OK)
+@router.patch("/user/{user_id}", response_model=UserResponse)
+async def patch_user(db: db_dependency, user_request: UserPatch, user_id: UUID):
+    values, expected = patch_values(user_request)
+    if "role" in values:
+        values["role"] = is_valid_role(values["role"])
+    if "hashed_password" in values:
+        values["hashed_password"] = await hash_password(values["hashed_password"])
+    if "role" in values or "hashed_password" in values:
+        # as with PUT, tokens issued before a credential or role change stop working
+        values["token_version"] = Users.token_version + 1
+
+    row = await patch_row(db, Users, user_id, values, 'User not found.', expected)
+    await commit_or_400(db)
+    await invalidate(cache_key('user', user_id))
+    await forget_principal('user', user_id)
+    return patched(row, UserResponse)
+
+@router.delete("/user/{user_id}", status_code=status.HTTP_200_OK)
 async def delete_user(db: db_dependency, user_id: UUID):
-    user_model = db.query(Users).filter(Users.users_id == user_id).first()
+    user_model = await db.get(Users, user_id)
     if user_model is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found.')
     
-    db.delete(user_model)
-    db.commit()
-    return {"detail": "User deleted successfully."}
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host='127.0.0.1', port=8000)
\ No newline at end of file
+    await db.delete(user_model)
+    await db.commit()
+    await invalidate(cache_key('user', user_id))
+    await forget_principal('user', user_id)
+    return {"detail": "User deleted successfully."}
\ No newline at end of file
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import csv
+import sys
+from datetime import date
+from sqlalchemy import ARRAY, Float, Numeric, and_, case, cast, func, literal, literal_column, null, or_, select, true, type_coerce, union_all, update
+from sqlalchemy.dialects.postgresql import array, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import AttendanceMonthly, CourseGrades, Fees, StudentRisk, Students
+from database import AsyncSessionLocal
+from ledger import pending_fee
+
+REFRESH_CHUNK_SIZE = 5000  # students per refresh transaction
+REPORT_CHUNK_SIZE = 1000
+ATTENDANCE_WINDOW_MONTHS = 12  # months of attendance counted, the as-of month included
+# weight of each percentile in risk_score; a student with no data for one is scored on the others
+RISK_WEIGHTS = {"attendance": 0.4, "grades": 0.4, "fees": 0.2}
+# absolute thresholds reported as flags, however the rest of the student body is doing
+LOW_ATTENDANCE = 75.0  # percent present
+LOW_GRADE = 50.0
+COHORT_PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+def window_start(as_of):
+    month = as_of.month - ATTENDANCE_WINDOW_MONTHS
+    return date(as_of.year + month // 12, month % 12 + 1, 1)
+
+def in_range(column, after, upto):
+    # a chunk is a range of student IDs, so only its two bounds are sent to the server
+    return and_(
+        column > after if after is not None else true(),
+        column <= upto if upto is not None else true(),
+    )
+
+def feature_rows(after, upto, as_of):
+    # per-student features for one chunk, read from the rollup tables rather than raw rows.
+    # The sources are stacked and summed in one aggregate, so a poor row estimate for the
+    # range cannot turn joins into nested loops; the students branch gives every student a row
+    zero = literal_column("0")
+    sources = union_all(
+        select(Students.students_id.label("student_id"), zero.label("present"), zero.label("total"), zero.label("grade_sum"), zero.label("graded"), zero.label("overdue"))
+        .where(in_range(Students.students_id, after, upto)),
+        select(AttendanceMonthly.student_id, AttendanceMonthly.present, AttendanceMonthly.total, zero, zero, zero)
+        .where(in_range(AttendanceMonthly.student_id, after, upto))
+        .where(AttendanceMonthly.month >= window_start(as_of), AttendanceMonthly.month <= as_of),
+        select(CourseGrades.student_id, zero, zero, CourseGrades.grade_sum, CourseGrades.graded, zero)
+        .where(in_range(CourseGrades.student_id, after, upto)),
+        select(Fees.student_id, zero, zero, zero, zero, Fees.amount)
+        .where(in_range(Fees.student_id, after, upto), pending_fee(), Fees.due_date < as_of),
+    ).subquery()
+    return (
+        select(
+            sources.c.student_id,
+            literal(as_of),
+            func.sum(sources.c.present) * 100.0 / func.nullif(func.sum(sources.c.total), 0),
+            func.sum(sources.c.grade_sum) / func.nullif(func.sum(sources.c.graded), 0),
+            func.sum(sources.c.overdue),
+            func.now(),
+        )
+        .group_by(sources.c.student_id)
+    )
+
+def percentile(column, among, rank=func.percent_rank):
+    # ranked within the students that have a value, so the rest do not shift it
+    return case((among, rank().over(partition_by=among, order_by=column)), else_=null())
+
+def risk_score(attendance_percentile, grade_percentile, overdue_percentile):
+    components = [
+        (RISK_WEIGHTS["attendance"], 1 - attendance_percentile),
+        (RISK_WEIGHTS["grades"], 1 - grade_percentile),
+        (RISK_WEIGHTS["fees"], overdue_percentile),
+    ]
+    weighted = sum(func.coalesce(weight * component, 0) for weight, component in components)
+    weights = sum(case((component.is_(None), 0), else_=weight) for weight, component in components)
+    return func.round(cast(func.coalesce(weighted / func.nullif(weights, 0), 0), Numeric), 4)
+
+async def rank_students(db: AsyncSession):
+    # one set-based pass over the whole snapshot; Postgres sorts it, spilling to disk if it must
+    ranked = select(
+        StudentRisk.student_id,
+        percentile(StudentRisk.attendance_rate, StudentRisk.attendance_rate.is_not(None)).label("attendance_percentile"),
+        percentile(StudentRisk.average_grade, StudentRisk.average_grade.is_not(None)).label("grade_percentile"),
+        # cume_dist, so the smallest overdue balance still counts for more than none
+        func.coalesce(percentile(StudentRisk.overdue_amount, StudentRisk.overdue_amount > 0, func.cume_dist), 0).label("overdue_percentile"),
+    ).subquery()
+    await db.execute(
+        update(StudentRisk)
+        .where(StudentRisk.student_id == ranked.c.student_id)
+        .values(
+            attendance_percentile=ranked.c.attendance_percentile,
+            grade_percentile=ranked.c.grade_percentile,
+            overdue_percentile=ranked.c.overdue_percentile,
+            risk_score=risk_score(ranked.c.attendance_percentile, ranked.c.grade_percentile, ranked.c.overdue_percentile),
+        )
+        # no ORM objects to keep in step; otherwise every updated key is fetched back
+        .execution_options(synchronize_session=False)
+    )
+
+async def refresh_risk(as_of=None, chunk_size=REFRESH_CHUNK_SIZE):
+    # features one range of students per transaction, then the percentiles in one statement;
+    # no student rows are read into Python, only the last ID of each range
+    as_of = as_of or date.today()
+    after = None
+    refreshed = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            stmt = select(Students.students_id).where(in_range(Students.students_id, after, None))
+            upto = await db.scalar(stmt.order_by(Students.students_id).offset(chunk_size - 1).limit(1))
+
+            insert_stmt = insert(StudentRisk).from_select(
+                ["student_id", "as_of", "attendance_rate", "average_grade", "overdue_amount", "computed_at"],
+                feature_rows(after, upto, as_of),
+            )
+            result = await db.execute(insert_stmt.on_conflict_do_update(
+                index_elements=[StudentRisk.student_id],
+                set_={
+                    name: insert_stmt.excluded[name]
+                    for name in ("as_of", "attendance_rate", "average_grade", "overdue_amount", "computed_at")
+                },
+            ))
+            await db.commit()
+
+        refreshed += result.rowcount
+        print(f"computed risk features for {refreshed} students")
+        if upto is None:
+            break
+        after = upto
+
+    async with AsyncSessionLocal() as db:
+        await rank_students(db)
+        await db.commit()
+    print("ranked students against the student body")
+    return refreshed
+
+def past_threshold():
+    return or_(StudentRisk.attendance_rate < LOW_ATTENDANCE, StudentRisk.average_grade < LOW_GRADE, StudentRisk.overdue_amount > 0)
+
+def risk_flags(item):
+    flags = []
+    if item.get("attendance_rate") is not None and item["attendance_rate"] < LOW_ATTENDANCE:
+        flags.append("attendance")
+    if item.get("average_grade") is not None and item["average_grade"] < LOW_GRADE:
+        flags.append("grades")
+    if item.get("overdue_amount"):
+        flags.append("fees")
+    return flags
+
+def distribution(column, *criteria):
+    percentiles = func.percentile_cont(array(COHORT_PERCENTILES)).within_group(column)
+    if criteria:
+        percentiles = percentiles.filter(*criteria)
+    return type_coerce(percentiles, ARRAY(Float))
+
+def _percentiles(values):
+    if values is None:
+        return None
+    return {f"p{round(fraction * 100)}": round(value, 2) for fraction, value in zip(COHORT_PERCENTILES, values)}
+
+async def cohort_summary(db: AsyncSession):
+    # distribution of each feature across the student body, from the snapshot in one pass
+    row = (await db.execute(select(
+        func.count().label("students"),
+        func.max(StudentRisk.as_of).label("as_of"),
+        func.max(StudentRisk.computed_at).label("computed_at"),
+        func.count().filter(past_threshold()).label("flagged"),
+        func.count().filter(StudentRisk.attendance_rate < LOW_ATTENDANCE).label("low_attendance"),
+        func.count().filter(StudentRisk.average_grade < LOW_GRADE).label("low_grades"),
+        func.count().filter(StudentRisk.overdue_amount > 0).label("overdue_fees"),
+        distribution(StudentRisk.attendance_rate).label("attendance_rate"),
+        distribution(StudentRisk.average_grade).label("average_grade"),
+        distribution(StudentRisk.overdue_amount, StudentRisk.overdue_amount > 0).label("overdue_amount"),
+        distribution(StudentRisk.risk_score).label("risk_score"),
+    ))).one()
+    return {
+        "as_of": row.as_of,
+        "computed_at": row.computed_at,
+        "students": row.students,
+        "flagged": {
+            "any": row.flagged,
+            "attendance": row.low_attendance,
+            "grades": row.low_grades,
+            "fees": row.overdue_fees,
+        },
+        "percentiles": {
+            "attendance_rate": _percentiles(row.attendance_rate),
+            "average_grade": _percentiles(row.average_grade),
+            "overdue_amount": _percentiles(row.overdue_amount),
+            "risk_score": _percentiles(row.risk_score),
+        },
+    }
+
+REPORT_COLUMNS = ["student_id", "risk_score", "attendance_rate", "average_grade", "overdue_amount", "flags"]
+
+async def report(top, only_flagged, csv_path):
+    # highest risk first, streamed in chunks so a full export stays flat in memory
+    stmt = select(StudentRisk).order_by(StudentRisk.risk_score.desc(), StudentRisk.student_id.desc())
+    if only_flagged:
+        stmt = stmt.where(past_threshold())
+    if top:
+        stmt = stmt.limit(top)
+
+    out = open(csv_path, "w", newline="") if csv_path else sys.stdout
+    try:
+        writer = csv.writer(out) if csv_path else None
+        if writer:
+            writer.writerow(REPORT_COLUMNS)
+        else:
+            print(f"{'student_id':<38}{'risk':>6}{'attend%':>9}{'grade':>8}{'overdue':>12}  flags")
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(stmt.execution_options(yield_per=REPORT_CHUNK_SIZE))
+            async for partition in result.partitions():
+                for risk in partition:
+                    item = {column: getattr(risk, column, None) for column in REPORT_COLUMNS}
+                    item["flags"] = " ".join(risk_flags(item))
+                    if writer:
+                        writer.writerow([item[column] for column in REPORT_COLUMNS])
+                    else:
+                        attendance = "-" if risk.attendance_rate is None else f"{risk.attendance_rate:.1f}"
+                        grade = "-" if risk.average_grade is None else f"{risk.average_grade:.1f}"
+                        print(f"{str(risk.student_id):<38}{risk.risk_score:>6.2f}{attendance:>9}{grade:>8}{risk.overdue_amount:>12}  {item['flags']}")
+    finally:
+        if csv_path:
+            out.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Student risk analytics")
+    parser.add_argument("command", choices=["refresh", "report"])
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="refresh: date fees are overdue at, default today")
+    parser.add_argument("--chunk-size", type=int, default=REFRESH_CHUNK_SIZE)
+    parser.add_argument("--top", type=int, default=50, help="report: rows to show, 0 for all")
+    parser.add_argument("--flagged", action="store_true", help="report: only students past a threshold")
+    parser.add_argument("--csv", default=None, help="report: write CSV to this file instead of a table")
+    args = parser.parse_args()
+    if args.command == "refresh":
+        asyncio.run(refresh_risk(args.as_of, args.chunk_size))
+    else:
+        asyncio.run(report(args.top, args.flagged, args.csv))
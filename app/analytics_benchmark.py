@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import resource
+import time
+from sqlalchemy import text
+from database import AsyncSessionLocal, async_engine, engine
+from analytics import cohort_summary, refresh_risk
+from filters import ListQuery
+from models import StudentRisk
+from pagination import PageParams, paginate
+
+# Times the risk refresh over a large student body:
+#   DB_STATEMENT_TIMEOUT=0 python search_benchmark.py seed --people 1700000    (about 1M students)
+#   DB_STATEMENT_TIMEOUT=0 python analytics_benchmark.py seed --months 12
+#   python analytics_benchmark.py run --chunk-size 5000
+# seed fills the attendance, gradebook and fee tables of the bench- students directly,
+# as their rebuilds would. Run "analytics_benchmark.py seed --clear" before
+# "search_benchmark.py seed --clear", which cannot delete students that still have rows.
+
+COURSES = 3
+CLASSES_PER_COURSE = 4
+
+def seed(months):
+    with engine.begin() as conn:
+        teacher_id = conn.execute(text("SELECT teachers_id FROM teachers WHERE email LIKE '%@bench.example' LIMIT 1")).scalar()
+        if teacher_id is None:
+            raise SystemExit("no bench teachers found, run search_benchmark.py seed first")
+        conn.execute(text(
+            "INSERT INTO courses (courses_id, name, description, created_at, updated_at) "
+            "SELECT md5('bench-course-' || c)::uuid, 'bench-course-' || c, 'bench', now(), now() "
+            "FROM generate_series(1, :courses) c ON CONFLICT DO NOTHING"
+        ), {"courses": COURSES})
+        conn.execute(text(
+            "INSERT INTO classes (classes_id, name, teacher_id, course_id, created_at, updated_at) "
+            "SELECT md5('bench-class-' || k)::uuid, 'bench-class-' || k, :teacher_id, md5('bench-course-' || (1 + k % :courses))::uuid, now(), now() "
+            "FROM generate_series(1, :classes) k ON CONFLICT DO NOTHING"
+        ), {"teacher_id": teacher_id, "courses": COURSES, "classes": COURSES * CLASSES_PER_COURSE})
+
+        # one class per student, 20 school days a month; attendance between 55% and 100%
+        conn.execute(text(
+            "INSERT INTO attendance_monthly (student_id, class_id, month, present, total) "
+            "SELECT s.students_id, md5('bench-class-' || (1 + abs(hashtext(s.students_id::text)) % :classes))::uuid, "
+            "date_trunc('month', current_date - make_interval(months => m))::date, "
+            "20 - (abs(hashtext(s.students_id::text || m)) % 10), 20 "
+            "FROM students s, generate_series(0, :months - 1) m WHERE s.email LIKE '%@bench.example' "
+            "ON CONFLICT DO NOTHING"
+        ), {"classes": COURSES * CLASSES_PER_COURSE, "months": months})
+        # every course graded, averages spread between 30 and 100
+        conn.execute(text(
+            "INSERT INTO course_grades (student_id, course_id, graded, grade_sum, grade_sum_squares, grade_min, grade_max) "
+            "SELECT s.students_id, md5('bench-course-' || c)::uuid, 5, 5 * g.average, 5 * g.average * g.average, g.average, g.average "
+            "FROM students s, generate_series(1, :courses) c, "
+            "LATERAL (SELECT 30 + abs(hashtext(s.students_id::text || c)) % 71 AS average) g "
+            "WHERE s.email LIKE '%@bench.example' ON CONFLICT DO NOTHING"
+        ), {"courses": COURSES})
+        # two fees each; about one student in six has one overdue
+        conn.execute(text(
+            "INSERT INTO fees (fees_id, student_id, amount, status, due_date, created_at, updated_at) "
+            "SELECT gen_random_uuid(), s.students_id, 250 + abs(hashtext(s.students_id::text || f)) % 750, "
+            "CASE WHEN f = 1 OR abs(hashtext(s.students_id::text)) % 6 = 0 THEN 'Pending' ELSE 'Paid' END, "
+            "current_date + (CASE WHEN f = 1 THEN 30 ELSE -30 END), now(), now() "
+            "FROM students s, generate_series(1, 2) f WHERE s.email LIKE '%@bench.example'"
+        ))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE attendance_monthly, course_grades, fees"))
+    print(f"seeded {months} months of attendance, {COURSES} course grades and 2 fees per bench student")
+
+def clear():
+    bench_students = "SELECT students_id FROM students WHERE email LIKE '%@bench.example'"
+    with engine.begin() as conn:
+        for table in ("student_risk", "attendance_monthly", "course_grades", "fees"):
+            conn.execute(text(f"DELETE FROM {table} WHERE student_id IN ({bench_students})"))
+        conn.execute(text("DELETE FROM classes WHERE name LIKE 'bench-class-%'"))
+        conn.execute(text("DELETE FROM courses WHERE name LIKE 'bench-course-%'"))
+    print("removed benchmark rows")
+
+def peak_rss_mb():
+    # ru_maxrss is in kB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def timed(label, coroutine, repeat=1):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coroutine()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"{label:<28}{latencies[len(latencies) // 2] * 1000:>10.1f}ms")
+
+async def run(chunk_size, repeat):
+    async with AsyncSessionLocal() as db:
+        students = (await db.execute(text("SELECT count(*) FROM students"))).scalar()
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    await refresh_risk(chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"refreshed {students} students in {elapsed:.1f}s ({students / elapsed:.0f} students/s)")
+    print(f"peak RSS {peak_rss_mb():.0f} MB ({peak_rss_mb() - before:.0f} MB over the {before:.0f} MB before the refresh)")
+
+    page = PageParams(cursor=None, limit=50, fields=None)
+    async with AsyncSessionLocal() as db:
+        await timed("GET /analytics/risk", lambda: paginate(db, StudentRisk, page, query=ListQuery([], StudentRisk.risk_score, descending=True)), repeat)
+        await timed("GET /analytics/risk/cohort", lambda: cohort_summary(db), repeat)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Risk analytics benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed_parser = commands.add_parser("seed", help="fill attendance, grades and fees for the bench students")
+    seed_parser.add_argument("--months", type=int, default=12)
+    seed_parser.add_argument("--clear", action="store_true", help="remove benchmark rows instead")
+    run_parser = commands.add_parser("run", help="time a refresh and the report endpoints")
+    run_parser.add_argument("--chunk-size", type=int, default=5000)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "seed" and args.clear:
+        clear()
+    elif args.command == "seed":
+        seed(args.months)
+    else:
+        asyncio.run(run(args.chunk_size, args.repeat))
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+from datetime import date
+from uuid import UUID
+from sqlalchemy import ARRAY, any_, delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import ARCHIVE_TABLES, Enrollments, Students
+from database import AsyncSessionLocal, async_engine
+from cache import cache_key, invalidate
+import gradebook
+import ledger
+import rollups
+
+ARCHIVE_CHUNK_SIZE = 1000  # students per archive transaction
+# live tables an archive run deletes from, vacuumed at the end so the space is reused
+SHRUNK_TABLES = [
+    "students", "enrollments", "attendances", "attendance_monthly", "fees", "fee_balances",
+    "parents", "submissions", "course_grades", "student_risk",
+]
+
+async def lock_students(db: AsyncSession, stmt):
+    # FOR UPDATE also waits for, then holds off, inserts that reference the students, so the
+    # totals remove_students subtracts cover every row its delete cascades to
+    return list(await db.scalars(stmt.order_by(Students.students_id).with_for_update()))
+
+async def remove_students(db: AsyncSession, student_ids):
+    # one DELETE; enrollments, attendance, fees, parents, submissions and the per-student
+    # rollups go with it through ON DELETE CASCADE without being read. Totals shared with
+    # other students are adjusted first, in the caller's transaction
+    await rollups.subtract_students(db, student_ids)
+    await ledger.subtract_students(db, student_ids)
+    await gradebook.subtract_students(db, student_ids)
+    result = await db.execute(delete(Students).where(Students.students_id.in_(student_ids)))
+    return result.rowcount
+
+async def archive_students(db: AsyncSession, student_ids):
+    # copies the students and their rows into the archive tables with INSERT ... SELECT,
+    # then removes them from the live tables
+    for model, archive in ARCHIVE_TABLES.items():
+        key = Students.students_id if model is Students else model.student_id
+        columns = [column.name for column in model.__table__.columns]
+        await db.execute(insert(archive).from_select(
+            [*columns, "archived_at"],
+            select(*model.__table__.columns, func.now()).where(key.in_(student_ids)),
+        ))
+    return await remove_students(db, student_ids)
+
+def cohort(course_id=None, created_before=None, student_ids=None):
+    criteria = []
+    if course_id is not None:
+        criteria.append(Students.students_id.in_(select(Enrollments.student_id).where(Enrollments.course_id == course_id)))
+    if created_before is not None:
+        criteria.append(Students.created_at < created_before)
+    if student_ids is not None:
+        # one array parameter however long the list is
+        criteria.append(Students.students_id == any_(literal(student_ids, ARRAY(PG_UUID(as_uuid=True)))))
+    return criteria
+
+async def archive_cohort(criteria, chunk_size=ARCHIVE_CHUNK_SIZE, dry_run=False):
+    # one chunk of students per transaction, in ID order. A failed run can be started again:
+    # committed chunks are already gone from the live tables
+    if dry_run:
+        async with AsyncSessionLocal() as db:
+            count = await db.scalar(select(func.count()).select_from(Students).where(*criteria))
+        print(f"{count} students would be archived")
+        return count
+
+    last_student_id = None
+    archived = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            stmt = select(Students.students_id).where(*criteria).limit(chunk_size)
+            if last_student_id is not None:
+                stmt = stmt.where(Students.students_id > last_student_id)
+            student_ids = await lock_students(db, stmt)
+            if not student_ids:
+                break
+            archived += await archive_students(db, student_ids)
+            await db.commit()
+        await invalidate(*(cache_key('student', student_id) for student_id in student_ids))
+
+        last_student_id = student_ids[-1]
+        print(f"archived {archived} students")
+
+    # the deleted rows leave dead tuples behind; vacuum makes their space reusable and
+    # refreshes the planner's row counts for the smaller tables
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM (ANALYZE) {', '.join(SHRUNK_TABLES)}"))
+    print("vacuumed the live tables")
+    return archived
+
+def read_ids(path):
+    with open(path) as lines:
+        return [UUID(line.strip()) for line in lines if line.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive retired students and everything that belongs to them")
+    parser.add_argument("command", choices=["students"])
+    parser.add_argument("--course-id", type=UUID, default=None, help="students enrolled in this course")
+    parser.add_argument("--created-before", type=date.fromisoformat, default=None, help="students created before this date")
+    parser.add_argument("--ids-file", default=None, help="file with one student ID per line")
+    parser.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only count the students that would be archived")
+    args = parser.parse_args()
+    if args.course_id is None and args.created_before is None and args.ids_file is None:
+        parser.error("select a cohort with --course-id, --created-before and/or --ids-file")
+    criteria = cohort(args.course_id, args.created_before, read_ids(args.ids_file) if args.ids_file else None)
+    asyncio.run(archive_cohort(criteria, args.chunk_size, args.dry_run))
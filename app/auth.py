@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import getpass
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from starlette import status
+from cache import LRUCache
+from models import Admins, Users
+from database import AsyncSessionLocal
+
+AUTH_SECRET_KEY = os.getenv('AUTH_SECRET_KEY') or secrets.token_urlsafe(32)  # set it when running several workers
+AUTH_TOKEN_TTL = int(os.getenv('AUTH_TOKEN_TTL', '3600'))  # seconds
+AUTH_HASH_WORKERS = int(os.getenv('AUTH_HASH_WORKERS', str(os.cpu_count() or 1)))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60'))  # seconds
+AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv('AUTH_PRINCIPAL_CACHE_TTL', '30'))  # seconds a role/revocation change can take to reach other workers
+AUTH_ENFORCE = os.getenv('AUTH_ENFORCE', 'true').lower() in ('1', 'true', 'yes')  # when false, requests without a token are let through
+JWT_ALGORITHM = 'HS256'
+ARGON2_PREFIX = '$argon2'
+
+# argon2 releases the GIL while hashing, so a thread pool sized to the cores runs hashes in
+# parallel and keeps them off the event loop; excess calls wait in the pool's queue
+_hasher = PasswordHasher()
+_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix='password-hash')
+_token_cache = LRUCache(max_entries=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_TOKEN_CACHE_TTL)
+_principal_cache = LRUCache(max_entries=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_PRINCIPAL_CACHE_TTL)
+# verified against when the account does not exist, so unknown usernames take as long as wrong passwords
+_dummy_hash = _hasher.hash(secrets.token_urlsafe(16))
+
+def _verify(stored, password):
+    if not stored.startswith(ARGON2_PREFIX):
+        # rows written before passwords were hashed hold the raw value
+        return hmac.compare_digest(stored.encode(), password.encode())
+    try:
+        return _hasher.verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+async def hash_password(password):
+    return await asyncio.get_running_loop().run_in_executor(_executor, _hasher.hash, password)
+
+async def verify_password(stored, password):
+    return await asyncio.get_running_loop().run_in_executor(_executor, _verify, stored or _dummy_hash, password)
+
+def needs_rehash(stored):
+    return not stored.startswith(ARGON2_PREFIX) or _hasher.check_needs_rehash(stored)
+
+def create_token(subject, kind, role=None, version=0):
+    now = int(time.time())
+    claims = {"sub": str(subject), "kind": kind, "ver": version, "iat": now, "exp": now + AUTH_TOKEN_TTL}
+    if role is not None:
+        claims["role"] = role
+    return jwt.encode(claims, AUTH_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+def token_response(subject, kind, role=None, version=0):
+    return {"access_token": create_token(subject, kind, role, version), "token_type": "bearer", "expires_in": AUTH_TOKEN_TTL}
+
+def unauthorized(detail='Invalid or expired token.'):
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+async def verify_token(token):
+    # hot tokens skip the signature check for up to AUTH_TOKEN_CACHE_TTL seconds; exp is still honoured
+    claims = await _token_cache.get(token)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, AUTH_SECRET_KEY, algorithms=[JWT_ALGORITHM], options={"require": ["sub", "exp"]})
+        except jwt.PyJWTError:
+            raise unauthorized()
+        await _token_cache.set(token, claims)
+    elif claims["exp"] <= time.time():
+        await _token_cache.delete(token)
+        raise unauthorized()
+    return claims
+
+def token_cache_stats():
+    return _token_cache.stats()
+
+def principal_cache_stats():
+    return _principal_cache.stats()
+
+class Principal:
+    def __init__(self, subject, kind, role, version):
+        self.subject = subject
+        self.kind = kind
+        # admins live in their own table and act with the 'admin' role
+        self.role = 'admin' if kind == 'admin' else role
+        self.version = version
+
+def principal_key(kind, subject):
+    return f"{kind}:{subject}"
+
+async def load_principal(kind, subject):
+    # current role and token version, from the per-process cache or one primary key lookup
+    key = principal_key(kind, subject)
+    principal = await _principal_cache.get(key)
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            if kind == 'admin':
+                row = (await db.execute(select(Admins.token_version).where(Admins.admins_id == subject))).first()
+                role = None
+            else:
+                row = (await db.execute(select(Users.token_version, Users.role).where(Users.users_id == subject))).first()
+                role = row.role.value if row is not None and row.role is not None else None
+        if row is None:
+            return None
+        principal = Principal(subject, kind, role, row.token_version)
+        await _principal_cache.set(key, principal)
+    return principal
+
+async def forget_principal(kind, subject):
+    await _principal_cache.delete(principal_key(kind, subject))
+
+async def user_role(user_id):
+    # role of a user ID, or None when there is no such user
+    principal = await load_principal('user', user_id)
+    return principal.role if principal is not None else None
+
+# resource -> action -> roles allowed; "read" is GET/HEAD, "write" everything else
+POLICY = {
+    "admins": {"read": {"admin"}, "write": {"admin"}},
+    "users": {"read": {"admin"}, "write": {"admin"}},
+    "students": {"read": {"admin", "teacher"}, "write": {"admin"}},
+    "teachers": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin"}},
+    "parents": {"read": {"admin", "teacher"}, "write": {"admin"}},
+    "courses": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin"}},
+    "classes": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin", "teacher"}},
+    "subjects": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin", "teacher"}},
+    "enrollments": {"read": {"admin", "teacher"}, "write": {"admin"}},
+    "notifications": {"read": {"admin"}, "write": {"admin", "teacher"}},
+    "fees": {"read": {"admin"}, "write": {"admin"}},
+    "attendance": {"read": {"admin", "teacher"}, "write": {"admin", "teacher"}},
+    "assignments": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin", "teacher"}},
+    "submissions": {"read": {"admin", "teacher"}, "write": {"admin", "teacher"}},
+    "analytics": {"read": {"admin", "teacher"}, "write": {"admin"}},
+    "rooms": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin"}},
+    "timeslots": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin"}},
+    "timetable": {"read": {"admin", "teacher", "student", "parent"}, "write": {"admin"}},
+    "export": {"read": {"admin"}, "write": {"admin"}},
+    "search": {"read": {"admin", "teacher"}, "write": set()},
+    "cache": {"read": {"admin"}, "write": set()},
+    "auth": {"read": {"admin"}, "write": set()},
+}
+# resources a user may also use on their own behalf, through this path parameter
+SELF_SERVICE = {"notifications": "user_id"}
+
+def permitted(principal, resource, action, path_params):
+    if principal.role in POLICY[resource][action]:
+        return True
+    owner_param = SELF_SERVICE.get(resource)
+    return owner_param is not None and principal.kind == 'user' and path_params.get(owner_param) == str(principal.subject)
+
+bearer = HTTPBearer(auto_error=False)
+
+async def authenticate(credentials: HTTPAuthorizationCredentials | None = Depends(bearer)):
+    if credentials is None:
+        return None
+    claims = await verify_token(credentials.credentials)
+    principal = await load_principal(claims.get("kind", "user"), UUID(claims["sub"]))
+    if principal is None or principal.version != claims.get("ver", 0):
+        raise unauthorized('Token has been revoked.')
+    return principal
+
+def authorize(resource):
+    # router dependency: checks the bearer token against POLICY[resource]. Only a deployment
+    # that sets AUTH_ENFORCE=false lets requests without a token through
+    async def dependency(request: Request, principal: Principal | None = Depends(authenticate)):
+        if principal is None:
+            if AUTH_ENFORCE:
+                raise unauthorized('Not authenticated.')
+            return None
+        action = 'read' if request.method in ('GET', 'HEAD') else 'write'
+        if not permitted(principal, resource, action, request.path_params):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not allowed.')
+        return principal
+    return dependency
+
+async def bench(iterations):
+    # per-request cost of authorize() once both caches are warm; no database involved
+    subject = UUID(int=1)
+    await _principal_cache.set(principal_key('user', subject), Principal(subject, 'user', 'teacher', 0))
+    token = create_token(subject, 'user', 'teacher')
+    credentials = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+    request = Request({"type": "http", "method": "GET", "path": "/class", "headers": [], "path_params": {}})
+    dependency = authorize("classes")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        jwt.decode(token, AUTH_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    uncached = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await dependency(request, await authenticate(credentials))
+    cached = (time.perf_counter() - start) / iterations
+
+    print(f"iterations          {iterations}")
+    print(f"jwt.decode          {uncached * 1e6:.1f} us")
+    print(f"authorize (cached)  {cached * 1e6:.1f} us")
+
+async def create_admin(username, email, password):
+    # the first admin, who can then create everything else through the API
+    async with AsyncSessionLocal() as db:
+        admin_model = Admins(username=username, email=email, hashed_password=await hash_password(password))
+        db.add(admin_model)
+        await db.commit()
+    print(f"created admin {admin_model.admins_id}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auth tools")
+    parser.add_argument("command", choices=["bench", "create-admin"])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--username", help="create-admin: the admin's username")
+    parser.add_argument("--email", help="create-admin: the admin's email, used to log in")
+    args = parser.parse_args()
+    if args.command == "create-admin":
+        if not args.username or not args.email:
+            parser.error("create-admin needs --username and --email")
+        asyncio.run(create_admin(args.username, args.email, getpass.getpass("Password: ")))
+    else:
+        asyncio.run(bench(args.iterations))
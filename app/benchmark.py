@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import httpx
+
+# Fires concurrent requests at a running server and reports throughput.
+# Run it once against the sync-session build and once against the async one:
+#   python benchmark.py --url http://127.0.0.1:8000/student --requests 5000 --concurrency 100
+# Login load, while measuring how long a cheap endpoint takes to answer meanwhile
+# (compare runs with AUTH_HASH_WORKERS=1, 2, 4...):
+#   python benchmark.py --url http://127.0.0.1:8000/auth/token --method POST \
+#       --json '{"username": "jon0106", "password": "jingoes0102"}' --probe-url http://127.0.0.1:8000/cache/stats
+# Every endpoint but login needs a bearer token; pass an admin's with --token.
+
+async def worker(client, url, method, body, queue, latencies, errors):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, json=body)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append(time.perf_counter() - start)
+
+async def probe(url, latencies, done, headers):
+    # one request at a time against another endpoint, to see whether the load blocks it
+    async with httpx.AsyncClient(timeout=60, headers=headers) as client:
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+async def run(url, requests, concurrency, method="GET", body=None, probe_url=None, token=None):
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    latencies, errors, probe_latencies = [], [], []
+    done = asyncio.Event()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+    async with httpx.AsyncClient(limits=limits, timeout=60, headers=headers) as client:
+        probing = asyncio.create_task(probe(probe_url, probe_latencies, done, headers)) if probe_url else None
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, url, method, body, queue, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        if probing is not None:
+            await probing
+
+    latencies.sort()
+    print(f"url            {url}")
+    print(f"requests       {requests} (concurrency {concurrency})")
+    print(f"errors         {len(errors)}")
+    print(f"elapsed        {elapsed:.2f} s")
+    print(f"throughput     {requests / elapsed:.1f} req/s")
+    print(f"latency p50    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"latency p99    {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    if probe_latencies:
+        probe_latencies.sort()
+        print(f"probe          {probe_url} ({len(probe_latencies)} requests)")
+        print(f"probe p50      {statistics.median(probe_latencies) * 1000:.1f} ms")
+        print(f"probe max      {probe_latencies[-1] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent request throughput benchmark")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/student")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--json", help="JSON request body")
+    parser.add_argument("--probe-url", help="endpoint to time one request at a time while the load runs")
+    parser.add_argument("--token", help="bearer token sent with every request")
+    args = parser.parse_args()
+    body = json.loads(args.json) if args.json else None
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.method.upper(), body, args.probe_url, args.token))
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from datetime import timedelta
+from uuid import UUID
+from sqlalchemy import and_, func, literal, or_, select, union, update
+from sqlalchemy.dialects.postgresql import insert
+from models import Classes, Enrollments, NotificationJobs, Notifications, Parents, Students, Users
+from database import AsyncSessionLocal
+from inbox import apply_unread_changes
+
+NOTIFY_QUEUE_BACKEND = os.getenv('NOTIFY_QUEUE_BACKEND', 'postgres')  # 'postgres', 'memory' or 'sqlite'
+NOTIFY_QUEUE_PATH = os.getenv('NOTIFY_QUEUE_PATH', 'notify_queue.sqlite3')
+NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', '2'))
+NOTIFY_DELIVERY_CONCURRENCY = int(os.getenv('NOTIFY_DELIVERY_CONCURRENCY', '8'))
+NOTIFY_POLL_INTERVAL = float(os.getenv('NOTIFY_POLL_INTERVAL', '1.0'))  # seconds
+NOTIFY_LEASE = float(os.getenv('NOTIFY_LEASE', '60'))  # seconds a claimed job is held without a heartbeat
+NOTIFY_RETRY_DELAY = float(os.getenv('NOTIFY_RETRY_DELAY', '1.0'))  # first wait after a worker error, doubled up to NOTIFY_LEASE
+BROADCAST_CHUNK_SIZE = 5000  # notifications per INSERT ... SELECT transaction
+
+logger = logging.getLogger(__name__)
+
+class PostgresQueue:
+    # the notification_jobs table is the queue: workers in any process claim queued rows, and running
+    # rows whose lease ran out, with FOR UPDATE SKIP LOCKED, so put() has nothing to do once the job
+    # row is committed. A claim is a lease on claimed_at that the worker renews while it runs the job
+    def __init__(self, poll_interval=NOTIFY_POLL_INTERVAL, lease=NOTIFY_LEASE):
+        self.poll_interval = poll_interval
+        self.lease = lease
+
+    async def put(self, job_id):
+        pass
+
+    async def get(self):
+        expired = func.now() - timedelta(seconds=self.lease)
+        while True:
+            async with AsyncSessionLocal() as db:
+                job_id = await db.scalar(
+                    select(NotificationJobs.jobs_id)
+                    .where(or_(
+                        NotificationJobs.status == 'queued',
+                        and_(NotificationJobs.status == 'running', NotificationJobs.claimed_at < expired),
+                    ))
+                    .order_by(NotificationJobs.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if job_id is not None:
+                    await db.execute(
+                        update(NotificationJobs)
+                        .where(NotificationJobs.jobs_id == job_id)
+                        .values(status='running', claimed_at=func.now())
+                    )
+                    await db.commit()
+                    return job_id
+            await asyncio.sleep(self.poll_interval)
+
+    async def heartbeat(self, job_id):
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(NotificationJobs).where(NotificationJobs.jobs_id == job_id).values(claimed_at=func.now()))
+            await db.commit()
+
+    async def done(self, job_id):
+        pass
+
+class MemoryQueue:
+    # in-process only; queued jobs are lost on restart, meant for tests and single-process runs
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def put(self, job_id):
+        await self.queue.put(job_id)
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def heartbeat(self, job_id):
+        pass
+
+    async def done(self, job_id):
+        pass
+
+class SQLiteQueue:
+    # job ids in a local SQLite file; survives restarts of a single host without using Postgres for the queue.
+    # A claimed entry stays in the file until its job finishes, and is claimed again once its lease runs out
+    def __init__(self, path=NOTIFY_QUEUE_PATH, poll_interval=NOTIFY_POLL_INTERVAL, lease=NOTIFY_LEASE):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.lease = lease
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS broadcast_queue (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL)")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(broadcast_queue)")]
+            if 'claimed_at' not in columns:
+                conn.execute("ALTER TABLE broadcast_queue ADD COLUMN claimed_at REAL")
+
+    def _put(self, job_id):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("INSERT INTO broadcast_queue (job_id) VALUES (?)", (job_id,))
+
+    def _claim(self):
+        now = time.time()
+        with sqlite3.connect(self.path, isolation_level="IMMEDIATE") as conn:
+            row = conn.execute(
+                "UPDATE broadcast_queue SET claimed_at = ? WHERE id = ("
+                "SELECT min(id) FROM broadcast_queue WHERE claimed_at IS NULL OR claimed_at < ?"
+                ") RETURNING job_id",
+                (now, now - self.lease),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _heartbeat(self, job_id):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("UPDATE broadcast_queue SET claimed_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def _done(self, job_id):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("DELETE FROM broadcast_queue WHERE job_id = ?", (job_id,))
+
+    async def put(self, job_id):
+        await asyncio.to_thread(self._put, str(job_id))
+
+    async def get(self):
+        while True:
+            job_id = await asyncio.to_thread(self._claim)
+            if job_id is not None:
+                return UUID(job_id)
+            await asyncio.sleep(self.poll_interval)
+
+    async def heartbeat(self, job_id):
+        await asyncio.to_thread(self._heartbeat, str(job_id))
+
+    async def done(self, job_id):
+        await asyncio.to_thread(self._done, str(job_id))
+
+def build_queue(backend=NOTIFY_QUEUE_BACKEND):
+    if backend == 'memory':
+        return MemoryQueue()
+    if backend == 'sqlite':
+        return SQLiteQueue()
+    return PostgresQueue()
+
+_queue = build_queue()
+_workers = []
+# async callables taking (job, [(notifications_id, user_id, created_at), ...]); run by the delivery pool
+_delivery_handlers = []
+
+def get_queue():
+    return _queue
+
+def set_queue(queue):
+    global _queue
+    _queue = queue
+
+def add_delivery_handler(handler):
+    _delivery_handlers.append(handler)
+
+def recipient_query(job):
+    # one user_id column, distinct, for every user the job addresses
+    if job.target == 'role':
+        return select(Users.users_id.label('user_id')).where(Users.role == job.role).subquery()
+
+    if job.target == 'class':
+        course_id = select(Classes.course_id).where(Classes.classes_id == job.target_id).scalar_subquery()
+    else:
+        course_id = job.target_id
+    student_ids = select(Enrollments.student_id).where(Enrollments.course_id == course_id)
+
+    queries = []
+    if job.audience in ('students', 'all'):
+        queries.append(select(Students.user_id.label('user_id')).where(Students.students_id.in_(student_ids)))
+    if job.audience in ('parents', 'all'):
+        queries.append(select(Parents.user_id.label('user_id')).where(Parents.student_id.in_(student_ids)))
+    return union(*queries).subquery()
+
+async def insert_chunk(db, job, recipients):
+    # INSERT ... SELECT the next chunk of recipients, ordered by user_id so the job can resume after a crash
+    chunk = select(recipients.c.user_id).order_by(recipients.c.user_id).limit(BROADCAST_CHUNK_SIZE)
+    if job.last_user_id is not None:
+        chunk = chunk.where(recipients.c.user_id > job.last_user_id)
+    chunk = chunk.subquery()
+
+    stmt = insert(Notifications).from_select(
+        ["notifications_id", "user_id", "message", "created_at"],
+        select(func.gen_random_uuid(), chunk.c.user_id, literal(job.message), func.now()),
+    ).returning(Notifications.notifications_id, Notifications.user_id, Notifications.created_at)
+    return (await db.execute(stmt)).all()
+
+async def deliver(job, rows, semaphore):
+    async with semaphore:
+        for handler in _delivery_handlers:
+            await handler(job, rows)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(NotificationJobs)
+            .where(NotificationJobs.jobs_id == job.jobs_id)
+            .values(delivered=NotificationJobs.delivered + len(rows))
+        )
+        await db.commit()
+
+async def run_job(job_id):
+    semaphore = asyncio.Semaphore(NOTIFY_DELIVERY_CONCURRENCY)
+    deliveries = []
+    async with AsyncSessionLocal() as db:
+        job = await db.get(NotificationJobs, job_id)
+        if job is None or job.status in ('done', 'failed'):
+            return
+        job.status = 'running'
+        await db.commit()
+
+        recipients = recipient_query(job)
+        while True:
+            rows = await insert_chunk(db, job, recipients)
+            if not rows:
+                break
+            # the chunk, the unread counters and the job's progress commit together
+            await apply_unread_changes(db, added=[row.user_id for row in rows])
+            job.last_user_id = max(row.user_id for row in rows)
+            job.recipients += len(rows)
+            await db.commit()
+            deliveries.append(asyncio.create_task(deliver(job, rows, semaphore)))
+
+        results = await asyncio.gather(*deliveries, return_exceptions=True)
+        errors = [repr(result) for result in results if isinstance(result, Exception)]
+        await db.refresh(job)
+        job.status = 'failed' if errors else 'done'
+        job.error = errors[0] if errors else None
+        job.finished_at = func.now()
+        await db.commit()
+
+async def fail_job(job_id, exc):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(NotificationJobs)
+            .where(NotificationJobs.jobs_id == job_id)
+            .values(status='failed', error=repr(exc), finished_at=func.now())
+        )
+        await db.commit()
+
+async def keep_lease(queue, job_id):
+    # renews the claim while the job runs, so other workers only take it over once this one is
+    # gone. A failed renewal is retried at the next beat; the lease only runs out if they all fail
+    while True:
+        await asyncio.sleep(NOTIFY_LEASE / 3)
+        try:
+            await queue.heartbeat(job_id)
+        except Exception:
+            logger.exception("could not renew the lease of broadcast job %s", job_id)
+
+async def work(queue, job_id):
+    lease = asyncio.create_task(keep_lease(queue, job_id))
+    try:
+        try:
+            await run_job(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("broadcast job %s failed", job_id)
+            await fail_job(job_id, exc)
+    finally:
+        lease.cancel()
+    # not reached when fail_job raises: the job keeps its queue entry and is claimed again
+    # once the lease runs out, then resumes or, already failed, only leaves the queue
+    await queue.done(job_id)
+
+async def worker():
+    # errors of the queue or the database (a failover, a dropped connection) are logged and the
+    # worker waits before polling again, so it outlives them
+    delay = NOTIFY_RETRY_DELAY
+    while True:
+        queue = _queue
+        try:
+            await work(queue, await queue.get())
+            delay = NOTIFY_RETRY_DELAY
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("broadcast worker error, retrying in %.1f s", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, NOTIFY_LEASE)
+
+def start_workers(count=NOTIFY_WORKERS):
+    for _ in range(count):
+        _workers.append(asyncio.create_task(worker()))
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,77 @@
+import json
+from uuid import uuid4
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import func, inspect
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+MAX_BULK_ROWS = 20000
+BULK_CHUNK_SIZE = 1000  # rows per INSERT statement, keeps us well under the bind parameter limit
+
+async def parse_bulk_rows(request: Request, request_model):
+    # accepts a JSON array or an NDJSON body; rows are validated one by one so a bad row
+    # is reported in its result instead of failing the whole batch with a 422
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON.")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON.")
+    if len(items) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {MAX_BULK_ROWS} rows per request.")
+
+    rows = {}
+    results = [None] * len(items)
+    for index, item in enumerate(items):
+        try:
+            rows[index] = request_model.model_validate(item)
+        except ValidationError as exc:
+            results[index] = row_error(index, exc.errors(include_url=False, include_context=False))
+    return rows, results
+
+def row_error(index, detail):
+    return {"index": index, "status": "error", "detail": detail}
+
+async def bulk_upsert(db: AsyncSession, model, values, results, conflict_column=None, update_columns=(), update_values=None):
+    # values maps the request index to the row to insert; rows get their primary key here so
+    # RETURNING tells us whether a row was inserted or hit the conflict target and was updated.
+    # update_values adds SET expressions of its own to the conflict update
+    pk_name = inspect(model).primary_key[0].name
+    for row in values.values():
+        row[pk_name] = uuid4()
+
+    key_name = conflict_column.name if conflict_column is not None else pk_name
+    index_by_key = {row[key_name]: index for index, row in values.items()}
+    table = model.__table__
+    rows = list(values.values())
+
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        stmt = insert(table).values(rows[start:start + BULK_CHUNK_SIZE])
+        if conflict_column is not None:
+            set_ = {name: stmt.excluded[name] for name in update_columns}
+            set_.update(update_values or {})
+            if "updated_at" in table.columns:
+                set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(index_elements=[conflict_column], set_=set_)
+        returned = await db.execute(stmt.returning(table.columns[pk_name], table.columns[key_name]))
+
+        for pk, key in returned.all():
+            index = index_by_key[key]
+            row_status = "created" if pk == values[index][pk_name] else "updated"
+            results[index] = {"index": index, "status": row_status, pk_name: pk}
+
+    await db.commit()
+    return bulk_summary(results)
+
+def bulk_summary(results):
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"created": counts["created"], "updated": counts["updated"], "failed": counts["error"], "results": results}
@@ -0,0 +1,132 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from fastapi.encoders import jsonable_encoder
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')  # 'memory', 'redis' or 'none'
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_TTL = int(os.getenv('CACHE_TTL', '60'))  # seconds
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+
+class LRUCache:
+    # per-process cache; entries expire after ttl seconds and the least recently used entry
+    # is evicted once max_entries is reached
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def stats(self):
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+class RedisCache:
+    # shared between workers; client is anything with the redis.asyncio get/set/delete API,
+    # e.g. redis.asyncio.Redis or fakeredis.aioredis.FakeRedis
+    def __init__(self, client, ttl=CACHE_TTL, prefix='sms:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = self.misses = 0
+
+    async def get(self, key):
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key, value):
+        await self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    async def delete(self, *keys):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    def stats(self):
+        # evictions happen inside Redis; see INFO stats evicted_keys/expired_keys
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses, "ttl": self.ttl}
+
+class NullCache:
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value):
+        pass
+
+    async def delete(self, *keys):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+def build_cache(backend=CACHE_BACKEND):
+    if backend == 'redis':
+        import redis.asyncio
+        return RedisCache(redis.asyncio.Redis.from_url(CACHE_URL))
+    if backend == 'none':
+        return NullCache()
+    return LRUCache()
+
+_cache = build_cache()
+
+def get_cache():
+    return _cache
+
+def set_cache(cache):
+    global _cache
+    _cache = cache
+
+def cache_key(entity, entity_id):
+    return f"{entity}:{entity_id}"
+
+async def read_through(key, load, response_model):
+    # caches the row's response body rather than the row, so hashed passwords and token
+    # versions never reach the cache backend
+    value = await _cache.get(key)
+    if value is None:
+        value = await load()
+        if value is not None:
+            value = jsonable_encoder({name: getattr(value, name) for name in response_model.model_fields})
+            await _cache.set(key, value)
+    return value
+
+async def invalidate(*keys):
+    await _cache.delete(*keys)
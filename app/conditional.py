@@ -0,0 +1,60 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from models import TableVersions
+
+def make_etag(*parts):
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+async def list_validators(db: AsyncSession, model, request: Request):
+    # the table's change counter, bumped by every committed write (see TableVersions), is one
+    # primary key lookup instead of building the page. max(updated_at) is no validator: a
+    # writer that started before it was read can commit an older timestamp after, so lists
+    # carry no Last-Modified and If-Modified-Since never answers 304 for them
+    table_name = model.__tablename__
+    version = await db.scalar(select(TableVersions.version).where(TableVersions.table_name == table_name))
+    return make_etag(table_name, version or 0, request.url.query), None
+
+def entity_validators(table_name, entity_id, updated_at):
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    stamp = updated_at.isoformat() if updated_at else None
+    return make_etag(table_name, entity_id, stamp), updated_at
+
+def http_date(value):
+    # timestamps are stored without a zone and written by the database server in UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def validator_headers(etag, last_modified):
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def is_not_modified(request: Request, etag, last_modified):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def not_modified_response(etag, last_modified):
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+
+def set_validators(response: Response, etag, last_modified):
+    response.headers.update(validator_headers(etag, last_modified))
@@ -0,0 +1,89 @@
+from typing import Annotated
+from fastapi import HTTPException, Query
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import MANYTOONE
+from starlette import status
+from models import (
+    Admins, Assignments, Attendance, Classes, Courses, Enrollments, Fees, Notifications, Parents,
+    Students, Subjects, Submissions, Teachers, Users,
+)
+from schema import (
+    AdminResponse, AssignmentResponse, AttendanceResponse, ClassResponse, CourseResponse, EnrollmentResponse,
+    FeeResponse, NotificationResponse, ParentsResponse, StudentResponse, SubjectResponse, SubmissionResponse,
+    TeacherResponse, UserResponse,
+)
+
+MAX_EXPAND_DEPTH = 3
+MAX_EXPAND_PATHS = 8
+# the response body of every model a relationship can reach; an embedded row carries the same
+# columns as its own endpoint, so hashed passwords and token versions stay out of it
+RESPONSE_MODELS = {
+    Admins: AdminResponse,
+    Users: UserResponse,
+    Students: StudentResponse,
+    Teachers: TeacherResponse,
+    Parents: ParentsResponse,
+    Courses: CourseResponse,
+    Classes: ClassResponse,
+    Subjects: SubjectResponse,
+    Enrollments: EnrollmentResponse,
+    Notifications: NotificationResponse,
+    Fees: FeeResponse,
+    Attendance: AttendanceResponse,
+    Assignments: AssignmentResponse,
+    Submissions: SubmissionResponse,
+}
+
+expand_param = Annotated[str | None, Query(description="Comma separated relationships to embed, e.g. enrollments.course,parents")]
+
+def parse_expand(model, expand):
+    # "enrollments.course,parents" -> {"enrollments": {"course": {}}, "parents": {}}
+    paths = [path.strip() for path in expand.split(",") if path.strip()]
+    if len(paths) > MAX_EXPAND_PATHS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_EXPAND_PATHS} expand paths are allowed.")
+
+    tree = {}
+    for path in paths:
+        names = path.split(".")
+        if len(names) > MAX_EXPAND_DEPTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Expand path '{path}' is deeper than {MAX_EXPAND_DEPTH}.")
+        node, current = tree, model
+        for name in names:
+            relationships = inspect(current).relationships
+            if name not in relationships:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot expand '{name}' in '{path}'.")
+            node = node.setdefault(name, {})
+            current = relationships[name].mapper.class_
+    return tree
+
+def loader_options(model, tree):
+    # many-to-one relationships are joined into the parent query, collections get one
+    # SELECT ... WHERE fk IN (...) each, so the query count depends only on the expand tree
+    options = []
+    for name, subtree in tree.items():
+        relationship = inspect(model).relationships[name]
+        attribute = getattr(model, name)
+        loader = joinedload(attribute) if relationship.direction is MANYTOONE else selectinload(attribute)
+        options.append(loader.options(*loader_options(relationship.mapper.class_, subtree)))
+    return options
+
+def serialize(instance, tree):
+    data = {name: getattr(instance, name) for name in RESPONSE_MODELS[type(instance)].model_fields}
+    for name, subtree in tree.items():
+        value = getattr(instance, name)
+        if isinstance(value, list):
+            data[name] = [serialize(item, subtree) for item in value]
+        else:
+            data[name] = serialize(value, subtree) if value is not None else None
+    return data
+
+async def read_expanded(db: AsyncSession, model, entity_id, expand):
+    tree = parse_expand(model, expand)
+    pk_column = inspect(model).primary_key[0]
+    stmt = select(model).where(pk_column == entity_id).options(*loader_options(model, tree))
+    instance = (await db.scalars(stmt)).unique().first()
+    if instance is None:
+        return None
+    return serialize(instance, tree)
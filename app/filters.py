@@ -0,0 +1,152 @@
+from typing import Annotated, Literal
+from fastapi import Depends, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BeforeValidator, ConfigDict, Field, ValidationError, create_model
+from models import Admins, Assignments, Attendance, ClassSessions, Classes, Courses, Enrollments, Fees, Notifications, Parents, Rooms, Students, Subjects, Submissions, Teachers, TimeSlots, Users
+
+# Filters are query parameters of the form
+#   column=value                 equality
+#   column__in=a,b,c             membership
+#   column__lt / __lte / __gt / __gte=value
+#   column__prefix=abc           starts-with, only on columns with a varchar_pattern_ops index
+# plus sort=column or sort=-column. Only the indexed columns listed below can be used.
+
+EQUALITY = ("eq", "in")
+RANGE = ("eq", "lt", "lte", "gt", "gte")
+TEXT = ("eq", "in", "prefix")
+
+class Filterable:
+    def __init__(self, operators, requires=()):
+        self.operators = operators
+        # columns that must be filtered too so the composite index can be used
+        self.requires = requires
+
+FILTERS = {
+    Admins: {"email": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+    Users: {"username": Filterable(TEXT), "email": Filterable(TEXT), "admin_id": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+    Students: {"email": Filterable(TEXT), "user_id": Filterable(EQUALITY), "created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    Teachers: {"email": Filterable(TEXT), "user_id": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+    Parents: {"email": Filterable(TEXT), "student_id": Filterable(EQUALITY), "user_id": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+    Courses: {"created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    Classes: {"course_id": Filterable(EQUALITY), "teacher_id": Filterable(EQUALITY), "created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    Subjects: {"course_id": Filterable(EQUALITY), "teacher_id": Filterable(EQUALITY), "created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    Enrollments: {"student_id": Filterable(EQUALITY), "course_id": Filterable(EQUALITY), "enrolled_at": Filterable(RANGE)},
+    Notifications: {"user_id": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+    Attendance: {"class_id": Filterable(EQUALITY), "student_id": Filterable(EQUALITY), "date": Filterable(RANGE, requires=("class_id", "student_id"))},
+    Fees: {"status": Filterable(EQUALITY), "due_date": Filterable(RANGE, requires=("status",)), "student_id": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+    Assignments: {"course_id": Filterable(EQUALITY), "teacher_id": Filterable(EQUALITY), "created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    Submissions: {"assignment_id": Filterable(EQUALITY), "student_id": Filterable(EQUALITY), "submission_date": Filterable(RANGE)},
+    Rooms: {"name": Filterable(EQUALITY), "created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    TimeSlots: {"created_at": Filterable(RANGE), "updated_at": Filterable(RANGE)},
+    ClassSessions: {"class_id": Filterable(EQUALITY), "teacher_id": Filterable(EQUALITY), "room_id": Filterable(EQUALITY), "time_slot_id": Filterable(EQUALITY), "created_at": Filterable(RANGE)},
+}
+
+SORTS = {
+    Admins: ("created_at",),
+    Users: ("created_at", "updated_at", "username"),
+    Students: ("created_at", "updated_at", "email"),
+    Teachers: ("created_at", "updated_at", "email"),
+    Parents: ("created_at", "updated_at", "email"),
+    Courses: ("created_at", "updated_at"),
+    Classes: ("created_at", "updated_at"),
+    Subjects: ("created_at", "updated_at"),
+    Enrollments: ("enrolled_at",),
+    Notifications: ("created_at",),
+    Attendance: ("date",),
+    Fees: ("created_at", "updated_at"),
+    Assignments: ("created_at", "updated_at"),
+    Submissions: ("submission_date",),
+    Rooms: ("created_at", "updated_at", "name"),
+    TimeSlots: ("created_at", "updated_at"),
+    ClassSessions: ("created_at",),
+}
+
+# query parameters owned by other dependencies
+RESERVED_PARAMS = {"cursor", "limit", "fields", "expand"}
+
+def split_commas(value):
+    return value.split(",") if isinstance(value, str) else value
+
+class ListQuery:
+    def __init__(self, criteria=(), order_column=None, descending=False):
+        self.criteria = list(criteria)
+        self.order_column = order_column
+        self.descending = descending
+
+def build_filter_model(model):
+    table_columns = model.__table__.columns
+    fields = {}
+    for name, filterable in FILTERS[model].items():
+        python_type = table_columns[name].type.python_type
+        for operator in filterable.operators:
+            if operator == "eq":
+                fields[name] = (python_type | None, None)
+            elif operator == "in":
+                fields[f"{name}__in"] = (Annotated[list[python_type], BeforeValidator(split_commas), Field(min_length=1, max_length=500)] | None, None)
+            elif operator == "prefix":
+                fields[f"{name}__prefix"] = (Annotated[str, Field(min_length=1, max_length=100)] | None, None)
+            else:
+                fields[f"{name}__{operator}"] = (python_type | None, None)
+
+    sorts = SORTS[model] + tuple(f"-{name}" for name in SORTS[model])
+    fields["sort"] = (Literal[sorts] | None, None)
+    return create_model(f"{model.__name__}Filter", __config__=ConfigDict(extra="forbid"), **fields)
+
+def to_criteria(model, filters):
+    table_columns = model.__table__.columns
+    criteria, used = [], set()
+    for key, value in filters.model_dump(exclude_none=True, exclude={"sort"}).items():
+        name, _, operator = key.partition("__")
+        column = table_columns[name]
+        used.add(name)
+        if operator == "":
+            criteria.append(column == value)
+        elif operator == "in":
+            criteria.append(column.in_(value))
+        elif operator == "prefix":
+            criteria.append(column.startswith(value, autoescape=True))
+        elif operator == "lt":
+            criteria.append(column < value)
+        elif operator == "lte":
+            criteria.append(column <= value)
+        elif operator == "gt":
+            criteria.append(column > value)
+        elif operator == "gte":
+            criteria.append(column >= value)
+    return criteria, used
+
+def filter_dependency(model):
+    filter_model = build_filter_model(model)
+
+    def dependency(request: Request):
+        params = {}
+        for key in request.query_params.keys():
+            if key not in RESERVED_PARAMS:
+                values = request.query_params.getlist(key)
+                params[key] = values[0] if len(values) == 1 else ",".join(values)
+        try:
+            filters = filter_model.model_validate(params)
+        except ValidationError as exc:
+            raise RequestValidationError([{**error, "loc": ("query",) + tuple(error["loc"])} for error in exc.errors(include_url=False)])
+
+        criteria, used = to_criteria(model, filters)
+        for name in used:
+            requires = FILTERS[model][name].requires
+            if requires and not used.intersection(requires):
+                raise RequestValidationError([{
+                    "type": "missing_filter",
+                    "loc": ("query", name),
+                    "msg": f"Filtering on {name} also needs a filter on one of: {', '.join(requires)}",
+                    "input": None,
+                }])
+
+        order_column, descending = None, False
+        if filters.sort:
+            descending = filters.sort.startswith("-")
+            order_column = model.__table__.columns[filters.sort.lstrip("-")]
+        return ListQuery(criteria, order_column, descending)
+
+    return dependency
+
+def filter_params(model):
+    return Annotated[ListQuery, Depends(filter_dependency(model))]
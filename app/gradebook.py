@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import math
+from collections import defaultdict
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import AssignmentGrades, Assignments, CourseGrades, Courses, Submissions
+from database import AsyncSessionLocal
+
+REBUILD_CHUNK_SIZE = 200  # courses per rebuild transaction
+
+def submission_key(submission, course_id):
+    return (submission.student_id, course_id, submission.assignment_id, submission.grade)
+
+async def course_ids(db: AsyncSession, assignment_ids):
+    # assignment ID -> course ID, for turning submissions into gradebook keys
+    rows = await db.execute(select(Assignments.assignments_id, Assignments.course_id).where(Assignments.assignments_id.in_(set(assignment_ids))))
+    return dict(rows.all())
+
+async def move_assignment(db: AsyncSession, assignment_id, from_course_id, to_course_id):
+    # an assignment moved to another course takes its graded submissions' course totals along
+    if from_course_id == to_course_id:
+        return
+    rows = (await db.execute(
+        select(Submissions.student_id, Submissions.grade)
+        .where(Submissions.assignment_id == assignment_id, Submissions.grade.is_not(None))
+    )).all()
+    await apply_grade_changes(
+        db,
+        removed=[(student_id, from_course_id, assignment_id, grade) for student_id, grade in rows],
+        added=[(student_id, to_course_id, assignment_id, grade) for student_id, grade in rows],
+    )
+
+class _Change:
+    def __init__(self):
+        self.graded = 0
+        self.grade_sum = 0.0
+        self.grade_sum_squares = 0.0
+        self.added = []
+        self.removed = []
+
+    def row(self, **key):
+        return {
+            **key,
+            "graded": self.graded,
+            "grade_sum": self.grade_sum,
+            "grade_sum_squares": self.grade_sum_squares,
+            "grade_min": min(self.added, default=None),
+            "grade_max": max(self.added, default=None),
+        }
+
+async def apply_grade_changes(db: AsyncSession, removed=(), added=()):
+    # removed/added are (student_id, course_id, assignment_id, grade) tuples; ungraded
+    # submissions do not count. Counts and sums are adjusted in the caller's transaction.
+    # min/max can only widen in place, so a group that loses its lowest or highest grade
+    # has them recomputed from its submissions
+    courses = defaultdict(_Change)
+    assignments = defaultdict(_Change)
+    for sign, rows in ((-1, removed), (1, added)):
+        for student_id, course_id, assignment_id, grade in rows:
+            if grade is None:
+                continue
+            for change in (courses[(student_id, course_id)], assignments[assignment_id]):
+                change.graded += sign
+                change.grade_sum += sign * grade
+                change.grade_sum_squares += sign * grade * grade
+                (change.added if sign > 0 else change.removed).append(grade)
+
+    course_rows = [
+        change.row(student_id=student_id, course_id=course_id)
+        for (student_id, course_id), change in sorted(courses.items()) if sorted(change.added) != sorted(change.removed)
+    ]
+    assignment_rows = [
+        change.row(assignment_id=assignment_id)
+        for assignment_id, change in sorted(assignments.items()) if sorted(change.added) != sorted(change.removed)
+    ]
+    course_extremes = await _increment(db, CourseGrades, course_rows)
+    assignment_extremes = await _increment(db, AssignmentGrades, assignment_rows)
+
+    stale_courses = [key for key, grade_min, grade_max in course_extremes if _lost_extreme(courses[key], grade_min, grade_max)]
+    stale_assignments = [key[0] for key, grade_min, grade_max in assignment_extremes if _lost_extreme(assignments[key[0]], grade_min, grade_max)]
+    await _recompute_course_extremes(db, stale_courses)
+    await _recompute_assignment_extremes(db, stale_assignments)
+
+def _lost_extreme(change, grade_min, grade_max):
+    return any(grade_min is None or grade <= grade_min or grade >= grade_max for grade in change.removed)
+
+async def _increment(db: AsyncSession, model, rows):
+    # returns (primary key, grade_min, grade_max) of every row it touched
+    if not rows:
+        return []
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[column.name for column in model.__table__.primary_key],
+        set_={
+            "graded": model.graded + stmt.excluded.graded,
+            "grade_sum": model.grade_sum + stmt.excluded.grade_sum,
+            "grade_sum_squares": model.grade_sum_squares + stmt.excluded.grade_sum_squares,
+            # LEAST/GREATEST skip NULLs, so groups with nothing added keep their current values
+            "grade_min": func.least(model.grade_min, stmt.excluded.grade_min),
+            "grade_max": func.greatest(model.grade_max, stmt.excluded.grade_max),
+        },
+    )
+    primary_key = list(model.__table__.primary_key)
+    result = await db.execute(stmt.returning(*primary_key, model.grade_min, model.grade_max))
+    return [(tuple(row[:len(primary_key)]), row.grade_min, row.grade_max) for row in result]
+
+async def _recompute_course_extremes(db: AsyncSession, keys):
+    if not keys:
+        return
+    await db.flush()
+    graded = (
+        select(Submissions.grade)
+        .join(Assignments, Assignments.assignments_id == Submissions.assignment_id)
+        .where(Submissions.student_id == CourseGrades.student_id, Assignments.course_id == CourseGrades.course_id, Submissions.grade.is_not(None))
+    )
+    await db.execute(
+        update(CourseGrades)
+        .where(tuple_(CourseGrades.student_id, CourseGrades.course_id).in_(keys))
+        .values(
+            grade_min=graded.with_only_columns(func.min(Submissions.grade)).scalar_subquery(),
+            grade_max=graded.with_only_columns(func.max(Submissions.grade)).scalar_subquery(),
+        )
+    )
+
+async def _recompute_assignment_extremes(db: AsyncSession, assignment_ids, excluded_student_ids=()):
+    if not assignment_ids:
+        return
+    await db.flush()
+    graded = select(Submissions.grade).where(Submissions.assignment_id == AssignmentGrades.assignment_id)
+    if excluded_student_ids:
+        graded = graded.where(Submissions.student_id.not_in(excluded_student_ids))
+    await db.execute(
+        update(AssignmentGrades)
+        .where(AssignmentGrades.assignment_id.in_(assignment_ids))
+        .values(
+            grade_min=graded.with_only_columns(func.min(Submissions.grade)).scalar_subquery(),
+            grade_max=graded.with_only_columns(func.max(Submissions.grade)).scalar_subquery(),
+        )
+    )
+
+async def subtract_students(db: AsyncSession, student_ids):
+    # takes the students' graded submissions out of the per-assignment totals before they
+    # are deleted; their course totals go with them through ON DELETE CASCADE
+    removed = (
+        select(
+            Submissions.assignment_id,
+            func.count().label("graded"),
+            func.sum(Submissions.grade).label("grade_sum"),
+            func.sum(Submissions.grade * Submissions.grade).label("grade_sum_squares"),
+        )
+        .where(Submissions.student_id.in_(student_ids), Submissions.grade.is_not(None))
+        .group_by(Submissions.assignment_id)
+        .subquery()
+    )
+    assignment_ids = list(await db.scalars(
+        update(AssignmentGrades)
+        .where(AssignmentGrades.assignment_id == removed.c.assignment_id)
+        .values(
+            graded=AssignmentGrades.graded - removed.c.graded,
+            grade_sum=AssignmentGrades.grade_sum - removed.c.grade_sum,
+            grade_sum_squares=AssignmentGrades.grade_sum_squares - removed.c.grade_sum_squares,
+        )
+        .returning(AssignmentGrades.assignment_id)
+        .execution_options(synchronize_session=False)
+    ))
+    await _recompute_assignment_extremes(db, assignment_ids, excluded_student_ids=student_ids)
+
+def average(graded, grade_sum):
+    return round(grade_sum / graded, 2) if graded else None
+
+def stddev(graded, grade_sum, grade_sum_squares):
+    # population standard deviation from the running sums; clamped because of float rounding
+    if not graded:
+        return None
+    mean = grade_sum / graded
+    return round(math.sqrt(max(grade_sum_squares / graded - mean * mean, 0.0)), 2)
+
+def grade_summary(row):
+    return {
+        "graded": row.graded,
+        "average": average(row.graded, row.grade_sum),
+        "stddev": stddev(row.graded, row.grade_sum, row.grade_sum_squares),
+        "min": row.grade_min,
+        "max": row.grade_max,
+    }
+
+def course_average():
+    return CourseGrades.grade_sum / func.nullif(CourseGrades.graded, 0)
+
+async def student_grades(db: AsyncSession, student_id):
+    # every course the student has grades in, with their rank among the course's graded students
+    others = CourseGrades.__table__.alias("others")
+    higher = (
+        select(func.count())
+        .where(others.c.course_id == CourseGrades.course_id, others.c.graded > 0)
+        .where(others.c.grade_sum / others.c.graded > course_average())
+        .scalar_subquery()
+    )
+    ranked = (
+        select(func.count())
+        .where(others.c.course_id == CourseGrades.course_id, others.c.graded > 0)
+        .scalar_subquery()
+    )
+    rows = (await db.execute(
+        select(CourseGrades, (higher + 1).label("rank"), ranked.label("ranked"))
+        .where(CourseGrades.student_id == student_id, CourseGrades.graded > 0)
+        .order_by(CourseGrades.course_id)
+    )).all()
+    return [
+        {"course_id": row.CourseGrades.course_id, **grade_summary(row.CourseGrades), "rank": row.rank, "of": row.ranked}
+        for row in rows
+    ]
+
+async def course_ranking(db: AsyncSession, course_id):
+    rows = (await db.execute(
+        select(CourseGrades, func.rank().over(order_by=course_average().desc()).label("rank"))
+        .where(CourseGrades.course_id == course_id, CourseGrades.graded > 0)
+        .order_by(course_average().desc(), CourseGrades.student_id)
+    )).all()
+    return [{"student_id": row.CourseGrades.student_id, **grade_summary(row.CourseGrades), "rank": row.rank} for row in rows]
+
+async def rebuild_gradebook(chunk_size=REBUILD_CHUNK_SIZE):
+    # recomputes both aggregate tables from submissions, one chunk of courses per transaction
+    last_course_id = None
+    rebuilt = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            stmt = select(Courses.courses_id).order_by(Courses.courses_id).limit(chunk_size)
+            if last_course_id is not None:
+                stmt = stmt.where(Courses.courses_id > last_course_id)
+            course_ids = list(await db.scalars(stmt))
+            if not course_ids:
+                return rebuilt
+
+            assignment_ids = select(Assignments.assignments_id).where(Assignments.course_id.in_(course_ids))
+            await db.execute(delete(CourseGrades).where(CourseGrades.course_id.in_(course_ids)))
+            await db.execute(delete(AssignmentGrades).where(AssignmentGrades.assignment_id.in_(assignment_ids)))
+
+            aggregates = (
+                func.count(),
+                func.sum(Submissions.grade),
+                func.sum(Submissions.grade * Submissions.grade),
+                func.min(Submissions.grade),
+                func.max(Submissions.grade),
+            )
+            columns = ["graded", "grade_sum", "grade_sum_squares", "grade_min", "grade_max"]
+            graded = (
+                select(Submissions.student_id, Assignments.course_id, Submissions.assignment_id, Submissions.grade)
+                .join(Assignments, Assignments.assignments_id == Submissions.assignment_id)
+                .where(Assignments.course_id.in_(course_ids), Submissions.grade.is_not(None))
+            )
+            await db.execute(insert(CourseGrades).from_select(
+                ["student_id", "course_id", *columns],
+                graded.with_only_columns(Submissions.student_id, Assignments.course_id, *aggregates)
+                .group_by(Submissions.student_id, Assignments.course_id),
+            ))
+            await db.execute(insert(AssignmentGrades).from_select(
+                ["assignment_id", *columns],
+                graded.with_only_columns(Submissions.assignment_id, *aggregates)
+                .group_by(Submissions.assignment_id),
+            ))
+            await db.commit()
+
+        rebuilt += len(course_ids)
+        last_course_id = course_ids[-1]
+        print(f"rebuilt gradebook for {rebuilt} courses")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gradebook maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(rebuild_gradebook(args.chunk_size))
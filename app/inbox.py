@@ -0,0 +1,91 @@
+import asyncio
+import json
+from collections import Counter, defaultdict
+from uuid import UUID
+import asyncpg
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import NotificationCounts
+from database import ASYNC_DB_URL, AsyncSessionLocal
+
+INBOX_CHANNEL = 'inbox'
+SUBSCRIBER_QUEUE_SIZE = 100  # pushes buffered per open stream before new ones are dropped
+
+async def apply_unread_changes(db: AsyncSession, removed=(), added=()):
+    # removed/added are user IDs, one per notification that stopped/started being unread;
+    # counters change in the caller's transaction
+    changes = Counter(added)
+    changes.subtract(removed)
+    rows = [{"user_id": user_id, "unread": count} for user_id, count in sorted(changes.items()) if count]
+    if not rows:
+        return
+    stmt = insert(NotificationCounts).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCounts.user_id],
+        set_={"unread": NotificationCounts.unread + stmt.excluded.unread},
+    )
+    await db.execute(stmt)
+
+async def unread_count(db: AsyncSession, user_id):
+    return await db.scalar(select(NotificationCounts.unread).where(NotificationCounts.user_id == user_id)) or 0
+
+def push_payload(notifications_id, user_id, message, created_at):
+    return json.dumps({
+        "notifications_id": str(notifications_id),
+        "user_id": str(user_id),
+        "message": message,
+        "created_at": created_at.isoformat(),
+    })
+
+async def publish(db: AsyncSession, payloads):
+    # NOTIFY is delivered when the caller's transaction commits, and not at all if it rolls back
+    if payloads:
+        await db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": INBOX_CHANNEL, "payloads": list(payloads)},
+        )
+
+async def push_broadcast(job, rows):
+    # delivery handler for broadcast.py: rows are the (notifications_id, user_id, created_at) of one chunk
+    async with AsyncSessionLocal() as db:
+        await publish(db, [push_payload(notifications_id, user_id, job.message, created_at) for notifications_id, user_id, created_at in rows])
+        await db.commit()
+
+class InboxHub:
+    # one LISTEN connection per process fans pushes out to the streams open in that process
+    def __init__(self, url=ASYNC_DB_URL):
+        self.dsn = make_url(url).set(drivername='postgresql').render_as_string(hide_password=False)
+        self.subscribers = defaultdict(set)
+        self.connection = None
+        self.lock = asyncio.Lock()
+
+    async def subscribe(self, user_id):
+        async with self.lock:
+            if self.connection is None or self.connection.is_closed():
+                self.connection = await asyncpg.connect(self.dsn)
+                await self.connection.add_listener(INBOX_CHANNEL, self._on_notify)
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self.subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[user_id]
+
+    def _on_notify(self, connection, pid, channel, payload):
+        notification = json.loads(payload)
+        for queue in self.subscribers.get(UUID(notification["user_id"]), ()):
+            if not queue.full():
+                queue.put_nowait(notification)
+
+    async def close(self):
+        if self.connection is not None and not self.connection.is_closed():
+            await self.connection.close()
+        self.connection = None
+
+hub = InboxHub()
@@ -0,0 +1,150 @@
+import argparse
+import re
+from sqlalchemy import bindparam, inspect, select, text
+from sqlalchemy.dialects import postgresql
+from database import engine
+from filters import FILTERS, RANGE, SORTS
+
+# Looks for queries that scan large tables without an index:
+#   python index_advisor.py --min-rows 10000 --top 20
+# The list queries the API can issue are EXPLAINed with EXPLAIN (GENERIC_PLAN), which
+# needs Postgres 16, so no sample values are required. With pg_stat_statements installed
+# the most expensive statements the server has actually run are checked the same way.
+
+MIN_ROWS = 10000  # tables smaller than this are fine to scan
+TOP_STATEMENTS = 20
+LIST_LIMIT = 51  # default page size + 1, as paginate() fetches
+COMPARISON = re.compile(r"\(?(\w+)\)?(?:::\w+)? (?:=|<>|<|<=|>|>=|~~|~~\*) ")
+
+def list_queries():
+    # one statement per filterable column and per sort key, shaped like paginate() builds them
+    for model, filterables in FILTERS.items():
+        pk_column = inspect(model).primary_key[0]
+        default_order = model.__table__.columns[SORTS[model][0]]
+        for name, filterable in filterables.items():
+            column = model.__table__.columns[name]
+            criteria = [column >= bindparam(name) if filterable.operators == RANGE else column == bindparam(name)]
+            criteria += [model.__table__.columns[required] == bindparam(required) for required in filterable.requires[:1]]
+            stmt = select(model).where(*criteria).order_by(default_order, pk_column).limit(LIST_LIMIT)
+            yield f"{model.__tablename__} ?{name}=", stmt
+        for name in SORTS[model]:
+            column = model.__table__.columns[name]
+            stmt = select(model).order_by(column.desc(), pk_column.desc()).limit(LIST_LIMIT)
+            yield f"{model.__tablename__} ?sort=-{name}", stmt
+
+def compile_sql(stmt):
+    # $1, $2 ... placeholders, as the app sends them through asyncpg
+    return str(stmt.compile(dialect=postgresql.asyncpg.dialect()))
+
+def generic_plan(conn, sql):
+    return conn.execute(text(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {sql}").execution_options(no_parameters=True)).scalar()[0]["Plan"]
+
+def plan_nodes(plan, parent=None):
+    yield plan, parent
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child, plan)
+
+def table_rows(conn):
+    return dict(conn.execute(text(
+        "SELECT c.relname, c.reltuples::bigint FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+    )).all())
+
+def suggestions(plan, rows, min_rows):
+    # sequential scans of large tables that filter rows, or that feed a sort under a LIMIT
+    for node, parent in plan_nodes(plan):
+        if node["Node Type"] != "Seq Scan" or rows.get(node["Relation Name"], 0) < min_rows:
+            continue
+        table = node["Relation Name"]
+        if "Filter" in node:
+            columns = list(dict.fromkeys(COMPARISON.findall(node["Filter"])))
+            yield table, columns, f"Seq Scan filtering {node['Filter']}"
+        elif parent is not None and parent["Node Type"] in ("Sort", "Incremental Sort"):
+            columns = [re.sub(r"^\w+\.| DESC$", "", key) for key in parent["Sort Key"]]
+            yield table, columns, f"Seq Scan sorted by {', '.join(parent['Sort Key'])}"
+
+def index_ddl(table, columns):
+    if not columns:
+        return None
+    return f"CREATE INDEX CONCURRENTLY ix_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)});"
+
+def report(label, sql, conn, rows, min_rows):
+    try:
+        with conn.begin_nested():
+            plan = generic_plan(conn, sql)
+    except Exception as exc:
+        print(f"  {label}: not explained ({type(exc).__name__}: {str(exc).splitlines()[0]})")
+        return 0
+    found = 0
+    for table, columns, reason in suggestions(plan, rows, min_rows):
+        found += 1
+        print(f"  {label}")
+        print(f"    {reason} on {table} (~{rows[table]} rows)")
+        ddl = index_ddl(table, columns)
+        if ddl:
+            print(f"    consider: {ddl}")
+    return found
+
+def top_statements(conn, top):
+    installed = conn.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'"))
+    if not installed:
+        return None
+    return conn.execute(text(
+        "SELECT query, calls, total_exec_time FROM pg_stat_statements "
+        "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+        "AND query ~* '^\\s*(select|update|delete)' ORDER BY total_exec_time DESC LIMIT :top"
+    ), {"top": top}).all()
+
+def table_usage(conn, min_rows):
+    scanned = conn.execute(text(
+        "SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0) AS idx_scan, n_live_tup FROM pg_stat_user_tables "
+        "WHERE n_live_tup >= :min_rows AND seq_scan > coalesce(idx_scan, 0) ORDER BY seq_tup_read DESC"
+    ), {"min_rows": min_rows}).all()
+    unused = conn.execute(text(
+        "SELECT s.relname, s.indexrelname, pg_relation_size(s.indexrelid) AS size FROM pg_stat_user_indexes s "
+        "JOIN pg_index i ON i.indexrelid = s.indexrelid "
+        "WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary ORDER BY size DESC"
+    )).all()
+    return scanned, unused
+
+def advise(min_rows, top):
+    with engine.connect() as conn:
+        if conn.dialect.server_version_info < (16,):
+            print("EXPLAIN (GENERIC_PLAN) needs Postgres 16; only table statistics are reported.")
+        rows = table_rows(conn)
+        found = 0
+
+        if conn.dialect.server_version_info >= (16,):
+            print(f"List queries scanning tables of {min_rows}+ rows:")
+            for label, stmt in list_queries():
+                found += report(label, compile_sql(stmt), conn, rows, min_rows)
+
+            statements = top_statements(conn, top)
+            if statements is None:
+                print("pg_stat_statements is not installed; skipping the statements the server has run.")
+            else:
+                print(f"Top {top} statements by total time:")
+                for query, calls, total in statements:
+                    label = f"{total:.0f} ms over {calls} calls: {' '.join(query.split())[:100]}"
+                    found += report(label, query, conn, rows, min_rows)
+            if not found:
+                print("  no sequential scans of large tables found")
+
+        scanned, unused = table_usage(conn, min_rows)
+        print("Tables read mostly by sequential scans since the statistics were reset:")
+        for name, seq_scan, seq_tup_read, idx_scan, live in scanned:
+            print(f"  {name}: {seq_scan} seq scans reading {seq_tup_read} rows, {idx_scan} index scans, {live} live rows")
+        if not scanned:
+            print("  none")
+        print("Indexes never used since the statistics were reset (unique and primary keys excluded):")
+        for table, index, size in unused:
+            print(f"  {table}.{index}: {size // 1024} kB")
+        if not unused:
+            print("  none")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suggest indexes for the app's queries")
+    parser.add_argument("--min-rows", type=int, default=MIN_ROWS)
+    parser.add_argument("--top", type=int, default=TOP_STATEMENTS)
+    args = parser.parse_args()
+    advise(args.min_rows, args.top)
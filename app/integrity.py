@@ -0,0 +1,92 @@
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+# violated constraint -> 400 detail; names follow the naming convention on Base.metadata
+CONSTRAINT_ERRORS = {
+    "ix_admins_email": "Admin already exists with this email.",
+    "ix_users_username": "User already exists with this username.",
+    "ix_users_email": "User already exists with this email.",
+    "users_admin_id_fkey": "Invalid admin ID",
+    "students_user_id_key": "Student already exists for this user.",
+    "students_user_id_fkey": "Invalid user ID.",
+    "ix_students_email": "Student already exists with this email.",
+    "teachers_user_id_key": "Teacher already exists for this user.",
+    "teachers_user_id_fkey": "Invalid user ID.",
+    "ix_teachers_email": "Teacher already exists with this email.",
+    "parents_user_id_key": "Parent already exists for this user.",
+    "parents_student_id_key": "Parent already exists for this student.",
+    "parents_student_id_fkey": "Invalid student ID.",
+    "parents_user_id_fkey": "Invalid user ID.",
+    "ix_parents_email": "Parent already exists with this email.",
+    "classes_teacher_id_fkey": "Invalid teacher ID",
+    "classes_course_id_fkey": "Invalid course ID",
+    "subjects_teacher_id_fkey": "Invalid teacher ID",
+    "subjects_course_id_fkey": "Invalid course ID",
+    "enrollments_student_id_fkey": "Invalid student ID",
+    "enrollments_course_id_fkey": "Invalid course ID",
+    "uq_enrollments_student_id_course_id": "Student already enrolled in this course.",
+    "notifications_user_id_fkey": "Invalid user ID.",
+    "notification_counts_user_id_fkey": "Invalid user ID.",
+    "uq_attendances_student_class_date": "Attendance already recorded for this date.",
+    "attendances_student_id_fkey": "Invalid student ID",
+    "attendances_class_id_fkey": "Invalid class ID",
+    "attendance_monthly_student_id_fkey": "Invalid student ID",
+    "attendance_monthly_class_id_fkey": "Invalid class ID",
+    "attendance_daily_class_id_fkey": "Invalid class ID",
+    "fees_student_id_fkey": "Invalid student ID",
+    "fee_balances_student_id_fkey": "Invalid student ID",
+    "assignments_course_id_fkey": "Invalid course ID",
+    "assignments_teacher_id_fkey": "Invalid teacher ID",
+    "submissions_student_id_fkey": "Invalid student ID.",
+    "submissions_assignment_id_fkey": "Invalid assignment ID.",
+    "uq_submissions_student_id_assignment_id": "Submission already exists for this student and assignment.",
+    "course_grades_student_id_fkey": "Invalid student ID.",
+    "course_grades_course_id_fkey": "Invalid course ID",
+    "rooms_name_key": "Room already exists with this name.",
+    "ck_time_slots_weekday": "Weekday must be between 0 (Monday) and 6.",
+    "ck_time_slots_start_time_end_time": "Time slot must end after it starts.",
+    "ex_time_slots_period": "Time slot overlaps another time slot.",
+    "class_sessions_class_id_fkey": "Invalid class ID.",
+    "class_sessions_room_id_fkey": "Invalid room ID.",
+    "class_sessions_time_slot_id_fkey": "Invalid time slot ID.",
+    "uq_class_sessions_class_id_time_slot_id": "Class already has a session in this time slot.",
+    "uq_class_sessions_teacher_id_time_slot_id": "Teacher already teaches another class in this time slot.",
+    "uq_class_sessions_room_id_time_slot_id": "Room is already booked in this time slot.",
+}
+
+# the same foreign keys violated from the referenced side, by deleting a row that is still
+# referenced. The database names the constraint alike both ways, so deleting handlers pass these
+DELETE_ERRORS = {
+    "class_sessions_room_id_fkey": "Room is booked in the timetable.",
+    "class_sessions_time_slot_id_fkey": "Time slot is used in the timetable.",
+}
+
+def constraint_name(exc: IntegrityError):
+    # asyncpg reports the constraint on the driver exception the DBAPI error wraps
+    return getattr(exc.orig.__cause__, "constraint_name", None) or getattr(exc.orig, "constraint_name", None)
+
+async def or_400(db: AsyncSession, operation, errors=None):
+    # lets the database check foreign keys and uniqueness in the write itself instead of
+    # SELECTing first, which costs round trips and races with concurrent writers. errors
+    # take precedence over CONSTRAINT_ERRORS for this write
+    try:
+        return await operation
+    except IntegrityError as exc:
+        await db.rollback()
+        name = constraint_name(exc)
+        detail = (errors or {}).get(name) or CONSTRAINT_ERRORS.get(name)
+        if detail is None:
+            raise
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+async def commit_or_400(db: AsyncSession, errors=None):
+    await or_400(db, db.commit(), errors)
+
+async def flush_or_400(db: AsyncSession):
+    # for writes that must pass their constraints before dependent rows are touched
+    await or_400(db, db.flush())
+
+async def execute_or_400(db: AsyncSession, statement):
+    return await or_400(db, db.execute(statement))
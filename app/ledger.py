@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from sqlalchemy import delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import FeeBalances, FeeDueDaily, Fees, Students
+from database import AsyncSessionLocal
+
+PENDING_STATUS = 'pending'
+CENT = Decimal("0.01")
+REBUILD_CHUNK_SIZE = 5000  # students per rebuild transaction
+# (label, oldest overdue day, newest overdue day); None leaves that side open
+AGING_BUCKETS = (
+    ("not_due", None, -1),
+    ("0-30", 0, 30),
+    ("31-60", 31, 60),
+    ("61+", 61, None),
+)
+
+def money(amount):
+    # amounts leave the ledger as strings so clients never see them as floats
+    return str(Decimal(amount).quantize(CENT))
+
+def is_pending(status):
+    return status.lower() == PENDING_STATUS
+
+def pending_fee():
+    # spelled exactly like the partial index predicate on fees so the planner can use it
+    return func.lower(Fees.status) == literal_column(f"'{PENDING_STATUS}'")
+
+def fee_key(fee):
+    return (fee.student_id, fee.due_date, fee.status, fee.amount)
+
+async def apply_fee_changes(db: AsyncSession, removed=(), added=()):
+    # removed/added are (student_id, due_date, status, amount) tuples; only pending fees
+    # count towards the ledger and it is updated in the caller's transaction
+    balances = defaultdict(lambda: [Decimal(0), 0])
+    due_daily = defaultdict(lambda: [Decimal(0), 0])
+    for sign, rows in ((-1, removed), (1, added)):
+        for student_id, due_date, status, amount in rows:
+            if not is_pending(status):
+                continue
+            for counters in (balances[student_id], due_daily[due_date]):
+                counters[0] += sign * Decimal(amount)
+                counters[1] += sign
+
+    balance_rows = [
+        {"student_id": student_id, "pending_amount": amount, "pending_count": count}
+        for student_id, (amount, count) in sorted(balances.items()) if amount or count
+    ]
+    due_daily_rows = [
+        {"due_date": due_date, "pending_amount": amount, "pending_count": count}
+        for due_date, (amount, count) in sorted(due_daily.items()) if amount or count
+    ]
+    await _increment(db, FeeBalances, balance_rows)
+    await _increment(db, FeeDueDaily, due_daily_rows)
+
+async def _increment(db: AsyncSession, model, rows):
+    if not rows:
+        return
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[column.name for column in model.__table__.primary_key],
+        set_={
+            "pending_amount": model.pending_amount + stmt.excluded.pending_amount,
+            "pending_count": model.pending_count + stmt.excluded.pending_count,
+        },
+    )
+    await db.execute(stmt)
+
+async def subtract_students(db: AsyncSession, student_ids):
+    # takes the students' pending fees out of the per-due-date totals before they are
+    # deleted; their balances go with them through ON DELETE CASCADE
+    removed = (
+        select(Fees.due_date, func.sum(Fees.amount).label("pending_amount"), func.count().label("pending_count"))
+        .where(Fees.student_id.in_(student_ids), pending_fee())
+        .group_by(Fees.due_date)
+        .subquery()
+    )
+    await db.execute(
+        update(FeeDueDaily)
+        .where(FeeDueDaily.due_date == removed.c.due_date)
+        .values(
+            pending_amount=FeeDueDaily.pending_amount - removed.c.pending_amount,
+            pending_count=FeeDueDaily.pending_count - removed.c.pending_count,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def aging_columns(due_date, amount, count, as_of):
+    # one SUM ... FILTER per bucket, so a report is a single pass over its input
+    columns = []
+    for label, oldest, newest in AGING_BUCKETS:
+        conditions = []
+        if oldest is not None:
+            conditions.append(due_date <= as_of - timedelta(days=oldest))
+        if newest is not None:
+            conditions.append(due_date >= as_of - timedelta(days=newest))
+        columns.append(func.coalesce(func.sum(amount).filter(*conditions), 0).label(f"{label}_amount"))
+        columns.append(func.coalesce(func.sum(count).filter(*conditions), 0).label(f"{label}_count"))
+    return columns
+
+def aging_report(row):
+    mapping = row._mapping
+    return {
+        label: {"amount": money(mapping[f"{label}_amount"]), "count": int(mapping[f"{label}_count"])}
+        for label, _, _ in AGING_BUCKETS
+    }
+
+def empty_aging():
+    return {label: {"amount": money(0), "count": 0} for label, _, _ in AGING_BUCKETS}
+
+async def school_aging(db: AsyncSession, as_of):
+    # reads the per-due-date rollup, which has one row per distinct due date however many fees there are
+    row = (await db.execute(select(
+        func.coalesce(func.sum(FeeDueDaily.pending_amount), 0).label("pending_amount"),
+        func.coalesce(func.sum(FeeDueDaily.pending_count), 0).label("pending_count"),
+        *aging_columns(FeeDueDaily.due_date, FeeDueDaily.pending_amount, FeeDueDaily.pending_count, as_of),
+    ))).one()
+    return {
+        "as_of": as_of,
+        "pending_amount": money(row.pending_amount),
+        "pending_count": int(row.pending_count),
+        "aging": aging_report(row),
+    }
+
+async def student_aging(db: AsyncSession, student_ids, as_of):
+    rows = (await db.execute(
+        select(Fees.student_id, *aging_columns(Fees.due_date, Fees.amount, literal_column("1"), as_of))
+        .where(Fees.student_id.in_(student_ids), pending_fee())
+        .group_by(Fees.student_id)
+    )).all()
+    aging = {student_id: empty_aging() for student_id in student_ids}
+    aging.update((row.student_id, aging_report(row)) for row in rows)
+    return aging
+
+async def rebuild_ledger(chunk_size=REBUILD_CHUNK_SIZE):
+    # recomputes the ledger from fees: balances one chunk of students per transaction,
+    # then the per-due-date totals in one statement
+    last_student_id = None
+    rebuilt = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            stmt = select(Students.students_id).order_by(Students.students_id).limit(chunk_size)
+            if last_student_id is not None:
+                stmt = stmt.where(Students.students_id > last_student_id)
+            student_ids = list(await db.scalars(stmt))
+            if not student_ids:
+                break
+
+            await db.execute(delete(FeeBalances).where(FeeBalances.student_id.in_(student_ids)))
+            await db.execute(insert(FeeBalances).from_select(
+                ["student_id", "pending_amount", "pending_count"],
+                select(Fees.student_id, func.sum(Fees.amount), func.count())
+                .where(Fees.student_id.in_(student_ids), pending_fee())
+                .group_by(Fees.student_id),
+            ))
+            await db.commit()
+
+        rebuilt += len(student_ids)
+        last_student_id = student_ids[-1]
+        print(f"rebuilt fee balances for {rebuilt} students")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(FeeDueDaily))
+        await db.execute(insert(FeeDueDaily).from_select(
+            ["due_date", "pending_amount", "pending_count"],
+            select(Fees.due_date, func.sum(Fees.amount), func.count()).where(pending_fee()).group_by(Fees.due_date),
+        ))
+        await db.commit()
+    print("rebuilt fee totals by due date")
+    return rebuilt
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fee ledger maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(rebuild_ledger(args.chunk_size))
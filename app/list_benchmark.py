@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from database import AsyncSessionLocal, async_engine, db_dependency
+from models import Students
+from pagination import PageParams, paginate
+from schema import Page, StudentResponse
+from serialization import ORJSONResponse
+
+# Times one large GET /student response through three serialization paths, in process:
+#   python search_benchmark.py seed --people 20000    (about 12000 students)
+#   python list_benchmark.py --rows 10000 --repeat 20
+# orm:   ORM instances returned from the handler and run through jsonable_encoder
+# dicts: Row mappings returned from the handler and run through jsonable_encoder
+# typed: the current list endpoints, Row mappings of the response model's columns
+#        written straight to JSON by ORJSONResponse
+
+def bench_app(rows):
+    app = FastAPI()
+    page = PageParams(cursor=None, limit=rows, fields=None)
+
+    @app.get("/orm")
+    async def orm(db: db_dependency):
+        return (await db.scalars(select(Students).order_by(Students.created_at, Students.students_id).limit(rows))).all()
+
+    @app.get("/dicts")
+    async def dicts(db: db_dependency):
+        return await paginate(db, Students, page)
+
+    @app.get("/typed", response_model=Page[StudentResponse])
+    async def typed(db: db_dependency):
+        return ORJSONResponse(await paginate(db, Students, page, item_model=StudentResponse))
+
+    return app
+
+async def run(rows, repeat):
+    async with AsyncSessionLocal() as db:
+        available = await db.scalar(select(func.count()).select_from(Students))
+    if available < rows:
+        raise SystemExit(f"only {available} students found, seed more with search_benchmark.py seed")
+
+    transport = httpx.ASGITransport(app=bench_app(rows))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'path':<8}{'median':>10}{'p95':>10}{'bytes':>12}")
+        for path in ("orm", "dicts", "typed"):
+            await client.get(f"/{path}")  # warm up the connection pool and statement cache
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = await client.get(f"/{path}")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{path:<8}{statistics.median(latencies) * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms{len(response.content):>12}")
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare list response serialization paths")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
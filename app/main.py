@@ -1,11 +1,69 @@
-from fastapi import FastAPI
-import models
-from database import engine
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from database import async_engine
+from broadcast import add_delivery_handler, start_workers, stop_workers
+from inbox import hub, push_broadcast
+from timetable import solver_pool
+from auth import authorize
+from __admin import router as admin_router
+from __user import router as user_router
+from __student import router as student_router
+from __teacher import router as teacher_router
+from __parents import router as parents_router
+from __course import router as course_router
+from __class import router as class_router
+from __subject import router as subject_router
+from __enrollment import router as enrollment_router
+from __notification import router as notification_router
+from __fees import router as fees_router
+from __attendance import router as attendance_router
+from __assignment import router as assignment_router
+from __submission import router as submission_router
+from __analytics import router as analytics_router
+from __room import router as room_router
+from __timeslot import router as timeslot_router
+from __timetable import router as timetable_router
+from __export import router as export_router
+from __cache import router as cache_router
+from __search import router as search_router
+from __auth import router as auth_router
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_workers()
+    yield
+    await stop_workers()
+    # queued solves are dropped; one that is already running is waited for
+    solver_pool.shutdown(cancel_futures=True)
+    await hub.close()
+    await async_engine.dispose()
 
-models.Base.metadata.create_all(bind=engine)
-# models.Base.metadata.drop_all(bind=engine)
+app = FastAPI(lifespan=lifespan)
+
+add_delivery_handler(push_broadcast)
+
+app.include_router(admin_router, dependencies=[Depends(authorize("admins"))])
+app.include_router(user_router, dependencies=[Depends(authorize("users"))])
+app.include_router(student_router, dependencies=[Depends(authorize("students"))])
+app.include_router(teacher_router, dependencies=[Depends(authorize("teachers"))])
+app.include_router(parents_router, dependencies=[Depends(authorize("parents"))])
+app.include_router(course_router, dependencies=[Depends(authorize("courses"))])
+app.include_router(class_router, dependencies=[Depends(authorize("classes"))])
+app.include_router(subject_router, dependencies=[Depends(authorize("subjects"))])
+app.include_router(enrollment_router, dependencies=[Depends(authorize("enrollments"))])
+app.include_router(notification_router, dependencies=[Depends(authorize("notifications"))])
+app.include_router(fees_router, dependencies=[Depends(authorize("fees"))])
+app.include_router(attendance_router, dependencies=[Depends(authorize("attendance"))])
+app.include_router(assignment_router, dependencies=[Depends(authorize("assignments"))])
+app.include_router(submission_router, dependencies=[Depends(authorize("submissions"))])
+app.include_router(analytics_router, dependencies=[Depends(authorize("analytics"))])
+app.include_router(room_router, dependencies=[Depends(authorize("rooms"))])
+app.include_router(timeslot_router, dependencies=[Depends(authorize("timeslots"))])
+app.include_router(timetable_router, dependencies=[Depends(authorize("timetable"))])
+app.include_router(export_router, dependencies=[Depends(authorize("export"))])
+app.include_router(cache_router, dependencies=[Depends(authorize("cache"))])
+app.include_router(search_router, dependencies=[Depends(authorize("search"))])
+app.include_router(auth_router)
 
 if __name__ == '__main__':
     import uvicorn
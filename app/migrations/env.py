@@ -0,0 +1,41 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import Column, create_engine, pool
+from database import DB_URL
+import models
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+# autogenerate cannot compare expression indexes (the search indexes) and would report them
+# as changed on every run; they are written by hand in the migrations
+EXPRESSION_INDEXES = {
+    index.name
+    for table in target_metadata.tables.values()
+    for index in table.indexes
+    if any(not isinstance(expression, Column) for expression in index.expressions)
+}
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "index" and name in EXPRESSION_INDEXES)
+
+def run_migrations_offline():
+    context.configure(url=DB_URL, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # a dedicated engine without statement_timeout: index builds and backfills can run for a while
+    connectable = create_engine(DB_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, compare_type=True, include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
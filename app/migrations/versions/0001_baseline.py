@@ -0,0 +1,261 @@
+"""baseline: the schema create_all produced before migrations were introduced
+
+Databases created that way are brought under migrations with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 20:41:26.168524
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('admins',
+    sa.Column('admins_id', sa.UUID(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('admins_id')
+    )
+    op.create_index(op.f('ix_admins_created_at'), 'admins', ['created_at'], unique=False)
+    op.create_index(op.f('ix_admins_email'), 'admins', ['email'], unique=True)
+    op.create_index(op.f('ix_admins_updated_at'), 'admins', ['updated_at'], unique=False)
+    op.create_table('courses',
+    sa.Column('courses_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('courses_id')
+    )
+    op.create_index(op.f('ix_courses_created_at'), 'courses', ['created_at'], unique=False)
+    op.create_index(op.f('ix_courses_updated_at'), 'courses', ['updated_at'], unique=False)
+    op.create_table('users',
+    sa.Column('users_id', sa.UUID(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('STUDENT', 'TEACHER', 'PARENT', name='roleenum'), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('admin_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['admin_id'], ['admins.admins_id'], ),
+    sa.PrimaryKeyConstraint('users_id')
+    )
+    op.create_index(op.f('ix_users_created_at'), 'users', ['created_at'], unique=False)
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_updated_at'), 'users', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('notifications',
+    sa.Column('notifications_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.users_id'], ),
+    sa.PrimaryKeyConstraint('notifications_id')
+    )
+    op.create_index(op.f('ix_notifications_created_at'), 'notifications', ['created_at'], unique=False)
+    op.create_table('students',
+    sa.Column('students_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('dob', sa.Date(), nullable=False),
+    sa.Column('gender', sa.String(length=10), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.Column('address', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.users_id'], ),
+    sa.PrimaryKeyConstraint('students_id')
+    )
+    op.create_index(op.f('ix_students_created_at'), 'students', ['created_at'], unique=False)
+    op.create_index(op.f('ix_students_email'), 'students', ['email'], unique=True)
+    op.create_index(op.f('ix_students_updated_at'), 'students', ['updated_at'], unique=False)
+    op.create_table('teachers',
+    sa.Column('teachers_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.users_id'], ),
+    sa.PrimaryKeyConstraint('teachers_id')
+    )
+    op.create_index(op.f('ix_teachers_created_at'), 'teachers', ['created_at'], unique=False)
+    op.create_index(op.f('ix_teachers_email'), 'teachers', ['email'], unique=True)
+    op.create_index(op.f('ix_teachers_updated_at'), 'teachers', ['updated_at'], unique=False)
+    op.create_table('assignments',
+    sa.Column('assignments_id', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.courses_id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.teachers_id'], ),
+    sa.PrimaryKeyConstraint('assignments_id')
+    )
+    op.create_index(op.f('ix_assignments_created_at'), 'assignments', ['created_at'], unique=False)
+    op.create_index(op.f('ix_assignments_updated_at'), 'assignments', ['updated_at'], unique=False)
+    op.create_table('classes',
+    sa.Column('classes_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.courses_id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.teachers_id'], ),
+    sa.PrimaryKeyConstraint('classes_id')
+    )
+    op.create_index(op.f('ix_classes_created_at'), 'classes', ['created_at'], unique=False)
+    op.create_index(op.f('ix_classes_updated_at'), 'classes', ['updated_at'], unique=False)
+    op.create_table('enrollments',
+    sa.Column('enrollments_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.courses_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], ),
+    sa.PrimaryKeyConstraint('enrollments_id')
+    )
+    op.create_index(op.f('ix_enrollments_enrolled_at'), 'enrollments', ['enrolled_at'], unique=False)
+    op.create_table('fees',
+    sa.Column('fees_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], ),
+    sa.PrimaryKeyConstraint('fees_id')
+    )
+    op.create_index(op.f('ix_fees_created_at'), 'fees', ['created_at'], unique=False)
+    op.create_index(op.f('ix_fees_updated_at'), 'fees', ['updated_at'], unique=False)
+    op.create_table('parents',
+    sa.Column('parents_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.Column('relation', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.users_id'], ),
+    sa.PrimaryKeyConstraint('parents_id')
+    )
+    op.create_index(op.f('ix_parents_created_at'), 'parents', ['created_at'], unique=False)
+    op.create_index(op.f('ix_parents_email'), 'parents', ['email'], unique=True)
+    op.create_index(op.f('ix_parents_updated_at'), 'parents', ['updated_at'], unique=False)
+    op.create_table('subjects',
+    sa.Column('subjects_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.courses_id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.teachers_id'], ),
+    sa.PrimaryKeyConstraint('subjects_id')
+    )
+    op.create_index(op.f('ix_subjects_created_at'), 'subjects', ['created_at'], unique=False)
+    op.create_index(op.f('ix_subjects_updated_at'), 'subjects', ['updated_at'], unique=False)
+    op.create_table('attendances',
+    sa.Column('attendance_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=True),
+    sa.Column('class_id', sa.UUID(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.classes_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], ),
+    sa.PrimaryKeyConstraint('attendance_id')
+    )
+    op.create_table('class_subject_link',
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('subject_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.classes_id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.subjects_id'], ),
+    sa.PrimaryKeyConstraint('class_id', 'subject_id')
+    )
+    op.create_table('submissions',
+    sa.Column('submissions_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('assignment_id', sa.UUID(), nullable=False),
+    sa.Column('submission_date', sa.DateTime(), nullable=True),
+    sa.Column('grade', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.assignments_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], ),
+    sa.PrimaryKeyConstraint('submissions_id')
+    )
+    op.create_index(op.f('ix_submissions_submission_date'), 'submissions', ['submission_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_submissions_submission_date'), table_name='submissions')
+    op.drop_table('submissions')
+    op.drop_table('class_subject_link')
+    op.drop_table('attendances')
+    op.drop_index(op.f('ix_subjects_updated_at'), table_name='subjects')
+    op.drop_index(op.f('ix_subjects_created_at'), table_name='subjects')
+    op.drop_table('subjects')
+    op.drop_index(op.f('ix_parents_updated_at'), table_name='parents')
+    op.drop_index(op.f('ix_parents_email'), table_name='parents')
+    op.drop_index(op.f('ix_parents_created_at'), table_name='parents')
+    op.drop_table('parents')
+    op.drop_index(op.f('ix_fees_updated_at'), table_name='fees')
+    op.drop_index(op.f('ix_fees_created_at'), table_name='fees')
+    op.drop_table('fees')
+    op.drop_index(op.f('ix_enrollments_enrolled_at'), table_name='enrollments')
+    op.drop_table('enrollments')
+    op.drop_index(op.f('ix_classes_updated_at'), table_name='classes')
+    op.drop_index(op.f('ix_classes_created_at'), table_name='classes')
+    op.drop_table('classes')
+    op.drop_index(op.f('ix_assignments_updated_at'), table_name='assignments')
+    op.drop_index(op.f('ix_assignments_created_at'), table_name='assignments')
+    op.drop_table('assignments')
+    op.drop_index(op.f('ix_teachers_updated_at'), table_name='teachers')
+    op.drop_index(op.f('ix_teachers_email'), table_name='teachers')
+    op.drop_index(op.f('ix_teachers_created_at'), table_name='teachers')
+    op.drop_table('teachers')
+    op.drop_index(op.f('ix_students_updated_at'), table_name='students')
+    op.drop_index(op.f('ix_students_email'), table_name='students')
+    op.drop_index(op.f('ix_students_created_at'), table_name='students')
+    op.drop_table('students')
+    op.drop_index(op.f('ix_notifications_created_at'), table_name='notifications')
+    op.drop_table('notifications')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_updated_at'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_created_at'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_courses_updated_at'), table_name='courses')
+    op.drop_index(op.f('ix_courses_created_at'), table_name='courses')
+    op.drop_table('courses')
+    op.drop_index(op.f('ix_admins_updated_at'), table_name='admins')
+    op.drop_index(op.f('ix_admins_email'), table_name='admins')
+    op.drop_index(op.f('ix_admins_created_at'), table_name='admins')
+    op.drop_table('admins')
+    sa.Enum(name='roleenum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,128 @@
+"""rollup, ledger, inbox and broadcast tables; token versions; exact fee amounts
+
+Backfills the unread counters. Attendance rollups and the fee ledger are rebuilt
+afterwards with `python rollups.py rebuild` and `python ledger.py rebuild`, which
+work in chunks instead of one long transaction.
+
+The fees.amount type change rewrites the fees table under an exclusive lock.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 20:44:02.511087
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # if_not_exists throughout: databases made by create_all after the baseline already have some of this
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('admins', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False), if_not_exists=True)
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False), if_not_exists=True)
+    op.add_column('notifications', sa.Column('read_at', sa.DateTime(), nullable=True), if_not_exists=True)
+    op.alter_column('fees', 'amount',
+               existing_type=sa.DOUBLE_PRECISION(precision=53),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+
+    op.create_table('notification_counts',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('unread', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.users_id'], name=op.f('notification_counts_user_id_fkey')),
+    sa.PrimaryKeyConstraint('user_id'),
+    if_not_exists=True,
+    )
+    op.create_table('notification_jobs',
+    sa.Column('jobs_id', sa.UUID(), nullable=False),
+    sa.Column('target', sa.String(length=10), nullable=False),
+    sa.Column('target_id', sa.UUID(), nullable=True),
+    sa.Column('role', postgresql.ENUM('STUDENT', 'TEACHER', 'PARENT', name='roleenum', create_type=False), nullable=True),
+    sa.Column('audience', sa.String(length=10), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('recipients', sa.Integer(), nullable=False),
+    sa.Column('delivered', sa.Integer(), nullable=False),
+    sa.Column('last_user_id', sa.UUID(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('jobs_id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_notification_jobs_created_at'), 'notification_jobs', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_notification_jobs_status'), 'notification_jobs', ['status'], unique=False, if_not_exists=True)
+    op.create_table('attendance_monthly',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('present', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.classes_id'], name=op.f('attendance_monthly_class_id_fkey')),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], name=op.f('attendance_monthly_student_id_fkey')),
+    sa.PrimaryKeyConstraint('student_id', 'class_id', 'month'),
+    if_not_exists=True,
+    )
+    op.create_table('attendance_daily',
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('present', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.classes_id'], name=op.f('attendance_daily_class_id_fkey')),
+    sa.PrimaryKeyConstraint('class_id', 'date'),
+    if_not_exists=True,
+    )
+    op.create_table('fee_balances',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('pending_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('pending_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], name=op.f('fee_balances_student_id_fkey')),
+    sa.PrimaryKeyConstraint('student_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_fee_balances_pending_amount_student_id', 'fee_balances', ['pending_amount', 'student_id'], unique=False, if_not_exists=True)
+    op.create_table('fee_due_daily',
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('pending_amount', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('pending_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('due_date'),
+    if_not_exists=True,
+    )
+
+    # every notification that existed before read_at is unread
+    op.execute(
+        "INSERT INTO notification_counts (user_id, unread) "
+        "SELECT user_id, count(*) FROM notifications WHERE read_at IS NULL GROUP BY user_id "
+        "ON CONFLICT (user_id) DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('fee_due_daily')
+    op.drop_index('ix_fee_balances_pending_amount_student_id', table_name='fee_balances')
+    op.drop_table('fee_balances')
+    op.drop_table('attendance_daily')
+    op.drop_table('attendance_monthly')
+    op.drop_index(op.f('ix_notification_jobs_status'), table_name='notification_jobs')
+    op.drop_index(op.f('ix_notification_jobs_created_at'), table_name='notification_jobs')
+    op.drop_table('notification_jobs')
+    op.drop_table('notification_counts')
+    op.alter_column('fees', 'amount',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.DOUBLE_PRECISION(precision=53),
+               existing_nullable=False)
+    op.drop_column('notifications', 'read_at')
+    op.drop_column('users', 'token_version')
+    op.drop_column('admins', 'token_version')
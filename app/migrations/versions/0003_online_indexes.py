@@ -0,0 +1,102 @@
+"""indexes and unique constraints on existing tables, built without blocking writes
+
+Every index is built with CREATE INDEX CONCURRENTLY outside a transaction. The new
+unique constraints are attached to their prebuilt unique index with
+ADD CONSTRAINT ... USING INDEX, which only needs a brief lock. If existing rows
+break one of them, the index build fails and leaves an INVALID index behind.
+Remove the duplicates, drop that index and run the upgrade again.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 20:47:40.206114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TEXT = "lower(first_name || ' ' || last_name || ' ' || email || ' ' || phone)"
+
+# (name, table, columns, options)
+INDEXES = [
+    ('ix_users_admin_id', 'users', ['admin_id'], {}),
+    ('ix_users_username_pattern', 'users', ['username'], {'postgresql_ops': {'username': 'varchar_pattern_ops'}}),
+    ('ix_users_email_pattern', 'users', ['email'], {'postgresql_ops': {'email': 'varchar_pattern_ops'}}),
+    ('ix_students_email_pattern', 'students', ['email'], {'postgresql_ops': {'email': 'varchar_pattern_ops'}}),
+    ('ix_teachers_email_pattern', 'teachers', ['email'], {'postgresql_ops': {'email': 'varchar_pattern_ops'}}),
+    ('ix_parents_email_pattern', 'parents', ['email'], {'postgresql_ops': {'email': 'varchar_pattern_ops'}}),
+    ('ix_enrollments_course_id', 'enrollments', ['course_id'], {}),
+    ('ix_classes_teacher_id', 'classes', ['teacher_id'], {}),
+    ('ix_classes_course_id', 'classes', ['course_id'], {}),
+    ('ix_subjects_course_id', 'subjects', ['course_id'], {}),
+    ('ix_subjects_teacher_id', 'subjects', ['teacher_id'], {}),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at', 'notifications_id'], {}),
+    ('ix_attendances_date', 'attendances', ['date'], {}),
+    ('ix_attendances_class_id_date', 'attendances', ['class_id', 'date'], {}),
+    ('ix_fees_student_id', 'fees', ['student_id'], {}),
+    ('ix_fees_status_due_date', 'fees', ['status', 'due_date'], {}),
+    ('ix_fees_pending_student_id_due_date', 'fees', ['student_id', 'due_date'],
+     {'postgresql_where': sa.text("lower(status) = 'pending'"), 'postgresql_include': ['amount']}),
+]
+for table in ('students', 'teachers', 'parents'):
+    INDEXES += [
+        (f'ix_{table}_search_vector', table, [sa.text(f"to_tsvector('simple'::regconfig, {SEARCH_TEXT})")], {'postgresql_using': 'gin'}),
+        (f'ix_{table}_search_trgm', table, [sa.text(f"{SEARCH_TEXT} gin_trgm_ops")], {'postgresql_using': 'gin'}),
+    ]
+
+# (constraint name, table, columns)
+UNIQUE_CONSTRAINTS = [
+    ('students_user_id_key', 'students', ['user_id']),
+    ('teachers_user_id_key', 'teachers', ['user_id']),
+    ('parents_user_id_key', 'parents', ['user_id']),
+    ('parents_student_id_key', 'parents', ['student_id']),
+    ('uq_enrollments_student_id_course_id', 'enrollments', ['student_id', 'course_id']),
+    ('uq_attendances_student_class_date', 'attendances', ['student_id', 'class_id', 'date']),
+]
+
+# created by create_all in earlier versions and now covered by the unique constraints above
+SUPERSEDED_INDEXES = [
+    ('ix_students_user_id', 'students'),
+    ('ix_teachers_user_id', 'teachers'),
+    ('ix_parents_user_id', 'parents'),
+    ('ix_parents_student_id', 'parents'),
+    ('ix_enrollments_student_id_course_id', 'enrollments'),
+    ('ix_notifications_user_id', 'notifications'),
+]
+
+
+def constraint_exists(name):
+    if op.get_context().as_sql:
+        return False
+    return op.get_bind().scalar(sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}) is not None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True, **options)
+
+        for name, table, columns in UNIQUE_CONSTRAINTS:
+            if constraint_exists(name):
+                continue
+            op.create_index(name, table, columns, unique=True, postgresql_concurrently=True, if_not_exists=True)
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+        for name, table in SUPERSEDED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(UNIQUE_CONSTRAINTS):
+            op.drop_constraint(name, table, type_='unique')
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,78 @@
+"""gradebook aggregate tables; submission and assignment indexes
+
+Fill the aggregates for existing submissions afterwards with
+`python gradebook.py rebuild`. The indexes on assignments and submissions are built
+concurrently. uq_submissions_student_id_assignment_id fails to build if a student
+already has two submissions for the same assignment. Remove the duplicates, drop the
+INVALID index and upgrade again.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 21:12:37.804412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def constraint_exists(name):
+    if op.get_context().as_sql:
+        return False
+    return op.get_bind().scalar(sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}) is not None
+
+
+def upgrade() -> None:
+    op.create_table('course_grades',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('graded', sa.Integer(), nullable=False),
+    sa.Column('grade_sum', sa.Float(), nullable=False),
+    sa.Column('grade_sum_squares', sa.Float(), nullable=False),
+    sa.Column('grade_min', sa.Float(), nullable=True),
+    sa.Column('grade_max', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.courses_id'], name=op.f('course_grades_course_id_fkey')),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], name=op.f('course_grades_student_id_fkey')),
+    sa.PrimaryKeyConstraint('student_id', 'course_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_course_grades_course_id', 'course_grades', ['course_id'], unique=False, if_not_exists=True)
+    op.create_table('assignment_grades',
+    sa.Column('assignment_id', sa.UUID(), nullable=False),
+    sa.Column('graded', sa.Integer(), nullable=False),
+    sa.Column('grade_sum', sa.Float(), nullable=False),
+    sa.Column('grade_sum_squares', sa.Float(), nullable=False),
+    sa.Column('grade_min', sa.Float(), nullable=True),
+    sa.Column('grade_max', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.assignments_id'], name=op.f('assignment_grades_assignment_id_fkey')),
+    sa.PrimaryKeyConstraint('assignment_id'),
+    if_not_exists=True,
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_assignments_course_id', 'assignments', ['course_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_assignments_teacher_id', 'assignments', ['teacher_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_submissions_assignment_id_grade', 'submissions', ['assignment_id', 'grade'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        name = 'uq_submissions_student_id_assignment_id'
+        if not constraint_exists(name):
+            op.create_index(name, 'submissions', ['student_id', 'assignment_id'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+            op.execute(f"ALTER TABLE submissions ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_constraint('uq_submissions_student_id_assignment_id', 'submissions', type_='unique')
+        op.drop_index('ix_submissions_assignment_id_grade', table_name='submissions', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_assignments_teacher_id', table_name='assignments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_assignments_course_id', table_name='assignments', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('assignment_grades')
+    op.drop_index('ix_course_grades_course_id', table_name='course_grades')
+    op.drop_table('course_grades')
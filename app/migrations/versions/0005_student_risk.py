@@ -0,0 +1,44 @@
+"""student risk snapshot
+
+Fill it with `python analytics.py refresh`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 22:40:12.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('student_risk',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('attendance_rate', sa.Float(), nullable=True),
+    sa.Column('average_grade', sa.Float(), nullable=True),
+    sa.Column('overdue_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('attendance_percentile', sa.Float(), nullable=True),
+    sa.Column('grade_percentile', sa.Float(), nullable=True),
+    sa.Column('overdue_percentile', sa.Float(), nullable=False),
+    sa.Column('risk_score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['students.students_id'], name=op.f('student_risk_student_id_fkey'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_student_risk_risk_score_student_id', 'student_risk', ['risk_score', 'student_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_student_risk_risk_score_student_id', table_name='student_risk')
+    op.drop_table('student_risk')
@@ -0,0 +1,96 @@
+"""rooms, time slots and the class timetable
+
+uq_classes_classes_id_teacher_id is built concurrently, as the target of the class_sessions
+foreign key that carries a class's teacher; it adds nothing to the primary key otherwise.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 23:26:43.015873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def constraint_exists(name):
+    if op.get_context().as_sql:
+        return False
+    return op.get_bind().scalar(sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}) is not None
+
+
+def upgrade() -> None:
+    op.create_table('rooms',
+    sa.Column('rooms_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('rooms_id'),
+    sa.UniqueConstraint('name', name=op.f('rooms_name_key')),
+    if_not_exists=True,
+    )
+    op.create_index('ix_rooms_created_at', 'rooms', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_rooms_updated_at', 'rooms', ['updated_at'], unique=False, if_not_exists=True)
+    op.create_table('time_slots',
+    sa.Column('time_slots_id', sa.UUID(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    postgresql.ExcludeConstraint((sa.literal_column('int4range(weekday * 1440 + (extract(epoch FROM start_time) / 60)::int, weekday * 1440 + (extract(epoch FROM end_time) / 60)::int)'), '&&'), using='gist', name='ex_time_slots_period'),
+    sa.CheckConstraint('start_time < end_time', name='ck_time_slots_start_time_end_time'),
+    sa.CheckConstraint('weekday BETWEEN 0 AND 6', name='ck_time_slots_weekday'),
+    sa.PrimaryKeyConstraint('time_slots_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_time_slots_created_at', 'time_slots', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_time_slots_updated_at', 'time_slots', ['updated_at'], unique=False, if_not_exists=True)
+
+    with op.get_context().autocommit_block():
+        name = 'uq_classes_classes_id_teacher_id'
+        if not constraint_exists(name):
+            op.create_index(name, 'classes', ['classes_id', 'teacher_id'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+            op.execute(f"ALTER TABLE classes ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+    op.create_table('class_sessions',
+    sa.Column('class_sessions_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('room_id', sa.UUID(), nullable=False),
+    sa.Column('time_slot_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id', 'teacher_id'], ['classes.classes_id', 'classes.teacher_id'], name=op.f('class_sessions_class_id_fkey'), onupdate='CASCADE', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['room_id'], ['rooms.rooms_id'], name=op.f('class_sessions_room_id_fkey')),
+    sa.ForeignKeyConstraint(['time_slot_id'], ['time_slots.time_slots_id'], name=op.f('class_sessions_time_slot_id_fkey')),
+    sa.PrimaryKeyConstraint('class_sessions_id'),
+    sa.UniqueConstraint('class_id', 'time_slot_id', name='uq_class_sessions_class_id_time_slot_id'),
+    sa.UniqueConstraint('room_id', 'time_slot_id', name='uq_class_sessions_room_id_time_slot_id'),
+    sa.UniqueConstraint('teacher_id', 'time_slot_id', name='uq_class_sessions_teacher_id_time_slot_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_class_sessions_created_at', 'class_sessions', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_class_sessions_time_slot_id', 'class_sessions', ['time_slot_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_class_sessions_time_slot_id', table_name='class_sessions')
+    op.drop_index('ix_class_sessions_created_at', table_name='class_sessions')
+    op.drop_table('class_sessions')
+    with op.get_context().autocommit_block():
+        op.drop_constraint('uq_classes_classes_id_teacher_id', 'classes', type_='unique')
+    op.drop_index('ix_time_slots_updated_at', table_name='time_slots')
+    op.drop_index('ix_time_slots_created_at', table_name='time_slots')
+    op.drop_table('time_slots')
+    op.drop_index('ix_rooms_updated_at', table_name='rooms')
+    op.drop_index('ix_rooms_created_at', table_name='rooms')
+    op.drop_table('rooms')
@@ -0,0 +1,133 @@
+"""archive tables; ON DELETE CASCADE from students
+
+The student_id foreign keys are recreated NOT VALID and validated afterwards, outside the
+migration's transaction. Validation scans each table but does not block writes to it.
+Archive retired students with `python archive.py students`.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 23:58:02.417690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STUDENT_TABLES = ['enrollments', 'attendances', 'attendance_monthly', 'fees', 'fee_balances', 'parents', 'submissions', 'course_grades']
+
+
+def replace_student_fkey(table, on_delete):
+    # the old constraint already holds, so the new one is added without checking the rows
+    # while the table is locked; VALIDATE checks them later under a weaker lock
+    name = f"{table}_student_id_fkey"
+    op.execute(
+        f"ALTER TABLE {table} DROP CONSTRAINT {name}, "
+        f"ADD CONSTRAINT {name} FOREIGN KEY (student_id) REFERENCES students (students_id){on_delete} NOT VALID"
+    )
+
+
+def validate_student_fkeys():
+    with op.get_context().autocommit_block():
+        for table in STUDENT_TABLES:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_student_id_fkey")
+
+
+def upgrade() -> None:
+    op.create_table('archive_attendances',
+    sa.Column('attendance_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=True),
+    sa.Column('class_id', sa.UUID(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('attendance_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_archive_attendances_student_id', 'archive_attendances', ['student_id'], unique=False, if_not_exists=True)
+    op.create_table('archive_enrollments',
+    sa.Column('enrollments_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('enrollments_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_archive_enrollments_student_id', 'archive_enrollments', ['student_id'], unique=False, if_not_exists=True)
+    op.create_table('archive_fees',
+    sa.Column('fees_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('fees_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_archive_fees_student_id', 'archive_fees', ['student_id'], unique=False, if_not_exists=True)
+    op.create_table('archive_parents',
+    sa.Column('parents_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.Column('relation', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('parents_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_archive_parents_student_id', 'archive_parents', ['student_id'], unique=False, if_not_exists=True)
+    op.create_table('archive_students',
+    sa.Column('students_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('dob', sa.Date(), nullable=False),
+    sa.Column('gender', sa.String(length=10), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.Column('address', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('students_id'),
+    if_not_exists=True,
+    )
+    op.create_table('archive_submissions',
+    sa.Column('submissions_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('assignment_id', sa.UUID(), nullable=False),
+    sa.Column('submission_date', sa.DateTime(), nullable=True),
+    sa.Column('grade', sa.Float(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('submissions_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_archive_submissions_student_id', 'archive_submissions', ['student_id'], unique=False, if_not_exists=True)
+    for table in STUDENT_TABLES:
+        replace_student_fkey(table, " ON DELETE CASCADE")
+    validate_student_fkeys()
+
+
+def downgrade() -> None:
+    for table in STUDENT_TABLES:
+        replace_student_fkey(table, "")
+    validate_student_fkeys()
+    for name in ['archive_submissions', 'archive_parents', 'archive_fees', 'archive_attendances', 'archive_enrollments']:
+        op.drop_index(f'ix_{name}_student_id', table_name=name)
+        op.drop_table(name)
+    op.drop_table('archive_students')
@@ -0,0 +1,29 @@
+"""claimed_at lease on notification_jobs
+
+Jobs that were 'running' before this migration have no lease and stay as they are;
+set their status back to 'queued' to run them again.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 09:12:40.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_jobs', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('notification_jobs', 'claimed_at')
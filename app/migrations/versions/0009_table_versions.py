@@ -0,0 +1,52 @@
+"""table_versions change counters for the list ETags
+
+Statement triggers on courses, subjects and classes bump their row in table_versions.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 10:03:27.880214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ['courses', 'subjects', 'classes']
+
+
+def upgrade() -> None:
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=63), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name'),
+    if_not_exists=True,
+    )
+    op.execute("""
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+        ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+        RETURN NULL;
+    END
+    $$
+    """)
+    for table_name in VERSIONED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table_name}_bump_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+
+
+def downgrade() -> None:
+    for table_name in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table_name}_bump_version ON {table_name}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table('table_versions')
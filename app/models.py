@@ -1,9 +1,9 @@
 import sys
 import os
-from sqlalchemy import Column, String, ForeignKey, DateTime, Date, Text, Float, func, Enum
+from sqlalchemy import BigInteger, Column, String, ForeignKey, DateTime, Date, Text, Float, func, Enum, UniqueConstraint, Integer, Index, DDL, event, literal_column, text, Numeric, Time, CheckConstraint, ForeignKeyConstraint, Table
 from sqlalchemy.orm import relationship
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, ExcludeConstraint
 import enum
 from database import Base
 
@@ -21,6 +21,7 @@ class Admins(Base):
     username = Column(String(50), nullable=False)
     email = Column(String(100), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')  # bumped to revoke issued tokens
     created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
 
@@ -29,15 +30,20 @@ class Admins(Base):
 # Users table
 class Users(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index('ix_users_username_pattern', 'username', postgresql_ops={'username': 'varchar_pattern_ops'}),
+        Index('ix_users_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}),
+    )
     
     users_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
     role = Column(Enum(RoleEnum), nullable=True)  
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')  # bumped to revoke issued tokens
     created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
-    admin_id = Column(UUID(as_uuid=True), ForeignKey("admins.admins_id"), nullable=False)
+    admin_id = Column(UUID(as_uuid=True), ForeignKey("admins.admins_id"), nullable=False, index=True)
 
     student = relationship('Students', back_populates='user')
     admin = relationship('Admins', back_populates='users') 
@@ -48,9 +54,12 @@ class Users(Base):
 # Students table
 class Students(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        Index('ix_students_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}),
+    )
     
     students_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False, unique=True)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     dob = Column(Date, nullable=False)
@@ -62,18 +71,28 @@ class Students(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
 
     user = relationship('Users', back_populates='student')
-    enrollments = relationship('Enrollments', back_populates='student')
-    attendances = relationship('Attendance', back_populates='student')
-    fees = relationship('Fees', back_populates='student')
-    parents = relationship('Parents', back_populates='student')
-    submissions = relationship('Submissions', back_populates='student') 
+    # the database deletes these with the student (ON DELETE CASCADE), so the ORM leaves
+    # them unloaded instead of reading every row to null its student_id
+    enrollments = relationship('Enrollments', back_populates='student', passive_deletes=True)
+    attendances = relationship('Attendance', back_populates='student', passive_deletes=True)
+    fees = relationship('Fees', back_populates='student', passive_deletes=True)
+    parents = relationship('Parents', back_populates='student', passive_deletes=True)
+    submissions = relationship('Submissions', back_populates='student', passive_deletes=True)
+    outstanding_fees = relationship(
+        'Fees',
+        primaryjoin="and_(Students.students_id == Fees.student_id, func.lower(Fees.status) == 'pending')",
+        viewonly=True,
+    )
 
 # Teachers table
 class Teachers(Base):
     __tablename__ = "teachers"
+    __table_args__ = (
+        Index('ix_teachers_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}),
+    )
     
     teachers_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False, unique=True)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     email = Column(String(100), unique=True, nullable=False, index=True)
@@ -89,10 +108,13 @@ class Teachers(Base):
 # Parents Table
 class Parents(Base):
     __tablename__ = "parents"
+    __table_args__ = (
+        Index('ix_parents_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}),
+    )
     
     parents_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    student_id = Column(UUID(as_uuid=True), ForeignKey("students.students_id"), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("students.students_id", ondelete='CASCADE'), nullable=False, unique=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False, unique=True)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     email = Column(String(100), unique=True, nullable=False, index=True)
@@ -104,13 +126,37 @@ class Parents(Base):
     student = relationship('Students', back_populates='parents')
     user = relationship('Users', back_populates='parent')
 
+# Search documents for students, teachers and parents. search.py queries with the same
+# expressions so the planner can match them to the GIN indexes below.
+def search_text(table):
+    text = table.c.first_name
+    for column in (table.c.last_name, table.c.email, table.c.phone):
+        text = text.concat(literal_column("' '")).concat(column)
+    return func.lower(text)
+
+def search_vector(table):
+    return func.to_tsvector(text("'simple'::regconfig"), search_text(table))
+
+pg_trgm = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+event.listen(Base.metadata, 'before_create', pg_trgm)
+
+Index('ix_students_search_vector', search_vector(Students.__table__), postgresql_using='gin')
+Index('ix_students_search_trgm', search_text(Students.__table__).label('search_text'), postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+Index('ix_teachers_search_vector', search_vector(Teachers.__table__), postgresql_using='gin')
+Index('ix_teachers_search_trgm', search_text(Teachers.__table__).label('search_text'), postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+Index('ix_parents_search_vector', search_vector(Parents.__table__), postgresql_using='gin')
+Index('ix_parents_search_trgm', search_text(Parents.__table__).label('search_text'), postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+
 # Enrollments Table
 class Enrollments(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        UniqueConstraint('student_id', 'course_id', name='uq_enrollments_student_id_course_id'),
+    )
     
     enrollments_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    student_id = Column(UUID(as_uuid=True), ForeignKey("students.students_id"), nullable=False)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("students.students_id", ondelete='CASCADE'), nullable=False)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False, index=True)
     enrolled_at = Column(DateTime, default=func.now(), index=True)
     
     student = relationship('Students', back_populates='enrollments')
@@ -134,11 +180,15 @@ class Courses(Base):
 # Classes Table
 class Classes(Base):
     __tablename__ = "classes"
+    __table_args__ = (
+        # target of the class_sessions foreign key that keeps a session's teacher in step
+        UniqueConstraint('classes_id', 'teacher_id', name='uq_classes_classes_id_teacher_id'),
+    )
     
     classes_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     name = Column(String(100), nullable=False)
-    teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.teachers_id"), nullable=False)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False)
+    teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.teachers_id"), nullable=False, index=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False, index=True)
     created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
 
@@ -154,8 +204,8 @@ class Subjects(Base):
     subjects_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False)
-    teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.teachers_id"), nullable=False)  
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False, index=True)
+    teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.teachers_id"), nullable=False, index=True)  
     created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
 
@@ -171,34 +221,93 @@ class ClassSubjectLink(Base):
 # Notifications Table
 class Notifications(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # inbox pages are keyset scans over (created_at, notifications_id) within one user
+        Index('ix_notifications_user_id_created_at', 'user_id', 'created_at', 'notifications_id'),
+    )
     
     notifications_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), nullable=False)
     message = Column(Text, nullable=False)
+    read_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now(), index=True)
 
     user = relationship('Users', back_populates='notifications')
 
+# Unread notifications per user - kept in step with notifications by inbox.py
+class NotificationCounts(Base):
+    __tablename__ = "notification_counts"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.users_id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+# Broadcast jobs - queued by POST /notification/broadcast and run by broadcast.py workers
+class NotificationJobs(Base):
+    __tablename__ = "notification_jobs"
+    
+    jobs_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
+    target = Column(String(10), nullable=False)  # 'role', 'course' or 'class'
+    target_id = Column(UUID(as_uuid=True), nullable=True)
+    role = Column(Enum(RoleEnum), nullable=True)
+    audience = Column(String(10), nullable=False, default='students')  # 'students', 'parents' or 'all'
+    message = Column(Text, nullable=False)
+    status = Column(String(10), nullable=False, default='queued', index=True)  # 'queued', 'running', 'done', 'failed'
+    recipients = Column(Integer, nullable=False, default=0)
+    delivered = Column(Integer, nullable=False, default=0)
+    last_user_id = Column(UUID(as_uuid=True), nullable=True)  # resume point of the chunked insert
+    claimed_at = Column(DateTime, nullable=True)  # lease of the worker running the job, renewed while it runs
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
 # Attendance Table
 class Attendance(Base):
     __tablename__ = "attendances"
+    __table_args__ = (
+        UniqueConstraint('student_id', 'class_id', 'date', name='uq_attendances_student_class_date'),
+        Index('ix_attendances_class_id_date', 'class_id', 'date'),
+    )
     
     attendance_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id'))
+    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id', ondelete='CASCADE'))
     class_id = Column(UUID(as_uuid=True), ForeignKey('classes.classes_id'))
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     status = Column(String(10), nullable=False)  # 'Present' or 'Absent'
     
     student = relationship('Students', back_populates='attendances')
     class_ = relationship('Classes', back_populates='attendance')
 
+# Attendance rollups - kept in step with attendances by rollups.py
+class AttendanceMonthly(Base):
+    __tablename__ = "attendance_monthly"
+    
+    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id', ondelete='CASCADE'), primary_key=True)
+    class_id = Column(UUID(as_uuid=True), ForeignKey('classes.classes_id'), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    present = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+
+class AttendanceDaily(Base):
+    __tablename__ = "attendance_daily"
+    
+    class_id = Column(UUID(as_uuid=True), ForeignKey('classes.classes_id'), primary_key=True)
+    date = Column(Date, primary_key=True)
+    present = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+
 # Fees Table
 class Fees(Base):
     __tablename__ = "fees"
+    __table_args__ = (
+        Index('ix_fees_status_due_date', 'status', 'due_date'),
+        # per-student aging reads only pending rows, without touching the heap
+        Index('ix_fees_pending_student_id_due_date', 'student_id', 'due_date', postgresql_where=text("lower(status) = 'pending'"), postgresql_include=['amount']),
+    )
     
     fees_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id'), nullable=False)
-    amount = Column(Float, nullable=False)
+    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id', ondelete='CASCADE'), nullable=False, index=True)
+    amount = Column(Numeric(12, 2), nullable=False)
     status = Column(String(20), nullable=False)  # 'Paid', 'Pending', etc.
     due_date = Column(Date, nullable=False)
     created_at = Column(DateTime, default=func.now(), index=True)
@@ -206,12 +315,36 @@ class Fees(Base):
 
     student = relationship('Students', back_populates='fees')
 
+# Fee ledger - pending totals kept in step with fees by ledger.py
+class FeeBalances(Base):
+    __tablename__ = "fee_balances"
+    __table_args__ = (
+        Index('ix_fee_balances_pending_amount_student_id', 'pending_amount', 'student_id'),
+    )
+    
+    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id', ondelete='CASCADE'), primary_key=True)
+    pending_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+
+class FeeDueDaily(Base):
+    __tablename__ = "fee_due_daily"
+    
+    due_date = Column(Date, primary_key=True)
+    pending_amount = Column(Numeric(16, 2), nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+
 # Submissions Table
 class Submissions(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # one submission per student and assignment; also serves the per-student lookups
+        UniqueConstraint('student_id', 'assignment_id', name='uq_submissions_student_id_assignment_id'),
+        # min/max of an assignment's grades when the gradebook recomputes them
+        Index('ix_submissions_assignment_id_grade', 'assignment_id', 'grade'),
+    )
     
     submissions_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    student_id = Column(UUID(as_uuid=True), ForeignKey("students.students_id"), nullable=False)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("students.students_id", ondelete='CASCADE'), nullable=False)
     assignment_id = Column(UUID(as_uuid=True), ForeignKey("assignments.assignments_id"), nullable=False)
     submission_date = Column(DateTime, default=func.now(), index=True)
     grade = Column(Float, nullable=True)
@@ -226,11 +359,152 @@ class Assignments(Base):
     assignments_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     title = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False)
-    teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.teachers_id"), nullable=False)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.courses_id"), nullable=False, index=True)
+    teacher_id = Column(UUID(as_uuid=True), ForeignKey("teachers.teachers_id"), nullable=False, index=True)
     created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
 
     teacher = relationship('Teachers', back_populates='assignments')
     course = relationship('Courses', back_populates='assignments')
-    submissions = relationship('Submissions', back_populates='assignment')
\ No newline at end of file
+    submissions = relationship('Submissions', back_populates='assignment')
+
+# Gradebook aggregates over graded submissions - kept in step with submissions by gradebook.py
+class CourseGrades(Base):
+    __tablename__ = "course_grades"
+    __table_args__ = (
+        Index('ix_course_grades_course_id', 'course_id'),
+    )
+    
+    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id', ondelete='CASCADE'), primary_key=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey('courses.courses_id'), primary_key=True)
+    graded = Column(Integer, nullable=False, default=0)
+    grade_sum = Column(Float, nullable=False, default=0)
+    grade_sum_squares = Column(Float, nullable=False, default=0)
+    grade_min = Column(Float, nullable=True)
+    grade_max = Column(Float, nullable=True)
+
+class AssignmentGrades(Base):
+    __tablename__ = "assignment_grades"
+    
+    assignment_id = Column(UUID(as_uuid=True), ForeignKey('assignments.assignments_id'), primary_key=True)
+    graded = Column(Integer, nullable=False, default=0)
+    grade_sum = Column(Float, nullable=False, default=0)
+    grade_sum_squares = Column(Float, nullable=False, default=0)
+    grade_min = Column(Float, nullable=True)
+    grade_max = Column(Float, nullable=True)
+
+# Risk snapshot - one row per student, rebuilt by analytics.py
+class StudentRisk(Base):
+    __tablename__ = "student_risk"
+    __table_args__ = (
+        Index('ix_student_risk_risk_score_student_id', 'risk_score', 'student_id'),
+    )
+    
+    # a derived row, so it goes with its student instead of blocking the delete
+    student_id = Column(UUID(as_uuid=True), ForeignKey('students.students_id', ondelete='CASCADE'), primary_key=True)
+    as_of = Column(Date, nullable=False)
+    attendance_rate = Column(Float, nullable=True)  # percent present over the attendance window
+    average_grade = Column(Float, nullable=True)
+    overdue_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    attendance_percentile = Column(Float, nullable=True)  # 0-1 within the student body
+    grade_percentile = Column(Float, nullable=True)
+    overdue_percentile = Column(Float, nullable=False, default=0)
+    risk_score = Column(Float, nullable=False, default=0)  # 0 (lowest risk) to 1
+    computed_at = Column(DateTime, default=func.now())
+
+# Rooms Table
+class Rooms(Base):
+    __tablename__ = "rooms"
+    
+    rooms_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
+    name = Column(String(50), nullable=False, unique=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
+
+# Time slots - the periods of the weekly timetable
+class TimeSlots(Base):
+    __tablename__ = "time_slots"
+    __table_args__ = (
+        CheckConstraint('weekday BETWEEN 0 AND 6', name='ck_time_slots_weekday'),
+        CheckConstraint('start_time < end_time', name='ck_time_slots_start_time_end_time'),
+        # no two slots overlap, so "same slot" is the whole conflict test for class_sessions.
+        # Minutes since Monday 00:00 as an int4range, which GiST indexes without btree_gist
+        ExcludeConstraint(
+            (literal_column("int4range(weekday * 1440 + (extract(epoch FROM start_time) / 60)::int, weekday * 1440 + (extract(epoch FROM end_time) / 60)::int)"), '&&'),
+            name='ex_time_slots_period', using='gist',
+        ),
+    )
+    
+    time_slots_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
+    weekday = Column(Integer, nullable=False)  # 0 is Monday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
+
+# Timetable - one row per class per weekly period, written by __timetable.py and timetable.py
+class ClassSessions(Base):
+    __tablename__ = "class_sessions"
+    __table_args__ = (
+        # each is a btree probe on insert: a class, teacher or room is in at most one session per slot
+        UniqueConstraint('class_id', 'time_slot_id', name='uq_class_sessions_class_id_time_slot_id'),
+        UniqueConstraint('teacher_id', 'time_slot_id', name='uq_class_sessions_teacher_id_time_slot_id'),
+        UniqueConstraint('room_id', 'time_slot_id', name='uq_class_sessions_room_id_time_slot_id'),
+        # teacher_id is the class's teacher, copied so it can be indexed; it follows
+        # teacher changes and the sessions go with their class
+        ForeignKeyConstraint(
+            ['class_id', 'teacher_id'], ['classes.classes_id', 'classes.teacher_id'],
+            onupdate='CASCADE', ondelete='CASCADE',
+        ),
+        Index('ix_class_sessions_time_slot_id', 'time_slot_id'),
+    )
+    
+    class_sessions_id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
+    class_id = Column(UUID(as_uuid=True), nullable=False)
+    teacher_id = Column(UUID(as_uuid=True), nullable=False)
+    room_id = Column(UUID(as_uuid=True), ForeignKey('rooms.rooms_id'), nullable=False)
+    time_slot_id = Column(UUID(as_uuid=True), ForeignKey('time_slots.time_slots_id'), nullable=False)
+    created_at = Column(DateTime, default=func.now(), index=True)
+
+# Archive of retired students and their rows - written by archive.py. The same columns as the
+# live tables, without defaults or foreign keys (what an archived row referenced may be gone
+# later), plus when the row was archived. Child rows are found by student_id
+def archive_table(model):
+    name = f"archive_{model.__tablename__}"
+    columns = [Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable) for column in model.__table__.columns]
+    indexes = [Index(f"ix_{name}_student_id", 'student_id')] if 'student_id' in model.__table__.columns else []
+    return Table(name, Base.metadata, *columns, Column('archived_at', DateTime, nullable=False), *indexes)
+
+ARCHIVE_TABLES = {model: archive_table(model) for model in (Students, Enrollments, Attendance, Fees, Parents, Submissions)}
+
+# Change counters behind the list ETags (conditional.py). A statement trigger bumps the table's
+# row inside the writing transaction, so the version moves when that transaction commits, unlike
+# max(updated_at), which is the writer's start time. Writers to one table wait on its row until
+# they commit; the versioned tables are written rarely
+class TableVersions(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(63), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+VERSIONED_TABLES = ['courses', 'subjects', 'classes']
+
+bump_table_version = DDL("""
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+    RETURN NULL;
+END
+$$
+""")
+event.listen(TableVersions.__table__, 'after_create', bump_table_version)
+
+def version_trigger(table_name):
+    return (
+        f"CREATE TRIGGER {table_name}_bump_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
+
+for table_name in VERSIONED_TABLES:
+    event.listen(Base.metadata, 'after_create', DDL(version_trigger(table_name)))
@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from typing import Annotated
+from fastapi import Depends, HTTPException, Query
+from sqlalchemy import inspect, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class PageParams:
+    def __init__(
+        self,
+        cursor: str | None = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        fields: str | None = Query(None, description="Comma separated list of columns to return"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = fields
+
+page_dependency = Annotated[PageParams, Depends()]
+
+def keyset_columns(model, order_column=None):
+    # (created_at, pk) is the default sort key; both halves are indexed in models.py
+    if order_column is None:
+        order_column = model.created_at
+    pk_column = inspect(model).primary_key[0]
+    return order_column, pk_column
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+def _from_json(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(values):
+    raw = json.dumps([_to_json(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor, columns):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(columns):
+            raise ValueError(cursor)
+        return [_from_json(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+def selected_columns(model, fields, required=(), item_model=None):
+    table_columns = model.__table__.columns
+    if item_model is not None:
+        # only the columns the response model exposes can be read or asked for
+        table_columns = {name: column for name, column in table_columns.items() if name in item_model.model_fields}
+    if not fields:
+        return list(table_columns.values())
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in table_columns]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    columns = [table_columns[name] for name in dict.fromkeys(names)]
+    # the keyset columns are always selected so the next cursor can be built
+    for column in required:
+        if column.name not in names:
+            columns.append(table_columns[column.name])
+    return columns
+
+async def paginate(db: AsyncSession, model, page: PageParams, order_column=None, query=None, item_model=None):
+    # query is an optional filters.ListQuery carrying WHERE criteria and a sort override;
+    # item_model is the response model whose fields limit the selected columns
+    descending = False
+    if query is not None and query.order_column is not None:
+        order_column, descending = query.order_column, query.descending
+    order_column, pk_column = keyset_columns(model, order_column)
+    columns = selected_columns(model, page.fields, required=(order_column, pk_column), item_model=item_model)
+
+    stmt = select(*columns)
+    if query is not None:
+        stmt = stmt.where(*query.criteria)
+    if page.cursor:
+        last_value, last_pk = decode_cursor(page.cursor, (order_column, pk_column))
+        after = tuple_(order_column, pk_column) < tuple_(last_value, last_pk) if descending else tuple_(order_column, pk_column) > tuple_(last_value, last_pk)
+        stmt = stmt.where(after)
+    if descending:
+        stmt = stmt.order_by(order_column.desc(), pk_column.desc())
+    else:
+        stmt = stmt.order_by(order_column, pk_column)
+    stmt = stmt.limit(page.limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor([last[order_column.name], last[pk_column.name]])
+
+    return {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor}
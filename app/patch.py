@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException
+from pydantic import Field, create_model, field_validator
+from pydantic.fields import FieldInfo
+from sqlalchemy import inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from integrity import execute_or_400
+
+def patch_body(request_model, versioned=True):
+    # the PUT body with every field optional and the same constraints; only the fields a
+    # client sends are applied. updated_at, when sent, must still match the stored row
+    fields = {
+        name: (Optional[field.annotation], FieldInfo.merge_field_infos(field, default=None, default_factory=None))
+        for name, field in request_model.model_fields.items()
+    }
+    if versioned:
+        fields["updated_at"] = (Optional[datetime], Field(None, description="updated_at as last read; the update fails with 409 if the row changed since"))
+    # fields the PUT body requires may be left out, but not sent as null
+    required = [name for name, field in request_model.model_fields.items() if field.is_required()]
+    validators = {"reject_null": field_validator(*required)(reject_null)} if required else {}
+    return create_model(request_model.__name__.removesuffix("Request") + "Patch", __validators__=validators, **fields)
+
+def reject_null(cls, value):
+    if value is None:
+        raise ValueError("may be left out but not null")
+    return value
+
+def patch_values(patch_request):
+    values = patch_request.model_dump(exclude_unset=True)
+    expected = values.pop("updated_at", None)
+    if expected is not None and expected.tzinfo is not None:
+        # stored timestamps are UTC without a zone
+        expected = expected.astimezone(timezone.utc).replace(tzinfo=None)
+    if not values:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='No fields to update.')
+    return values, expected
+
+async def patch_row(db: AsyncSession, model, pk, values, not_found, expected_updated_at=None, previous=()):
+    # a single UPDATE ... RETURNING that touches only the given columns. Columns listed in
+    # previous also come back with their pre-update values (as previous_<name>) for callers
+    # that maintain rollups; they are read from a row-locked self join in the same statement.
+    # Nothing is committed here, so those rollups can change in the same transaction
+    table = model.__table__
+    pk_column = inspect(model).primary_key[0]
+    stmt = update(table).values(values).returning(*table.columns)
+    if previous:
+        before = select(pk_column, *previous).where(pk_column == pk).with_for_update().subquery("before")
+        stmt = stmt.where(pk_column == before.c[pk_column.name])
+        stmt = stmt.returning(*(before.c[column.name].label(f"previous_{column.name}") for column in previous))
+    else:
+        stmt = stmt.where(pk_column == pk)
+    if expected_updated_at is not None:
+        stmt = stmt.where(table.c.updated_at == expected_updated_at)
+
+    row = (await execute_or_400(db, stmt)).first()
+    if row is None:
+        # only failed updates pay for telling a missing row from a stale one
+        if expected_updated_at is not None and await db.scalar(select(pk_column).where(pk_column == pk)) is not None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='The row was changed by another request.')
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return row
+
+def patched(row, response_model):
+    # the updated row as its response body: RETURNING brings back every column, including
+    # hashed passwords, token versions and the previous_ values, which stay out of it
+    return {name: row._mapping[name] for name in response_model.model_fields}
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+from collections import defaultdict
+from sqlalchemy import Date, cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Attendance, AttendanceDaily, AttendanceMonthly, Classes
+from database import AsyncSessionLocal
+
+PRESENT_STATUSES = ('present',)
+REBUILD_CHUNK_SIZE = 200  # classes per rebuild transaction
+
+def is_present(status):
+    return status.lower() in PRESENT_STATUSES
+
+def month_of(day):
+    return day.replace(day=1)
+
+def attendance_key(attendance):
+    return (attendance.student_id, attendance.class_id, attendance.date, attendance.status)
+
+async def apply_attendance_changes(db: AsyncSession, removed=(), added=()):
+    # removed/added are (student_id, class_id, date, status) tuples; the counters are
+    # adjusted in the caller's transaction so they commit together with the attendance rows.
+    # As in rebuild_rollups, a row without a class (its class was deleted) is in no rollup,
+    # and one without a student is in the daily rollup only
+    monthly = defaultdict(lambda: [0, 0])
+    daily = defaultdict(lambda: [0, 0])
+    for sign, rows in ((-1, removed), (1, added)):
+        for student_id, class_id, day, status in rows:
+            if class_id is None:
+                continue
+            present = sign if is_present(status) else 0
+            counters = [daily[(class_id, day)]]
+            if student_id is not None:
+                counters.append(monthly[(student_id, class_id, month_of(day))])
+            for counter in counters:
+                counter[0] += present
+                counter[1] += sign
+
+    monthly_rows = [
+        {"student_id": student_id, "class_id": class_id, "month": month, "present": present, "total": total}
+        for (student_id, class_id, month), (present, total) in sorted(monthly.items()) if present or total
+    ]
+    daily_rows = [
+        {"class_id": class_id, "date": day, "present": present, "total": total}
+        for (class_id, day), (present, total) in sorted(daily.items()) if present or total
+    ]
+    await _increment(db, AttendanceMonthly, monthly_rows)
+    await _increment(db, AttendanceDaily, daily_rows)
+
+async def _increment(db: AsyncSession, model, rows):
+    if not rows:
+        return
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[column.name for column in model.__table__.primary_key],
+        set_={"present": model.present + stmt.excluded.present, "total": model.total + stmt.excluded.total},
+    )
+    await db.execute(stmt)
+
+def present_count():
+    return func.count().filter(func.lower(Attendance.status).in_(PRESENT_STATUSES))
+
+async def subtract_students(db: AsyncSession, student_ids):
+    # takes the students' attendance out of the per-class daily totals before they are
+    # deleted; their monthly rows go with them through ON DELETE CASCADE
+    removed = (
+        select(Attendance.class_id, Attendance.date, present_count().label("present"), func.count().label("total"))
+        .where(Attendance.student_id.in_(student_ids), Attendance.class_id.is_not(None))
+        .group_by(Attendance.class_id, Attendance.date)
+        .subquery()
+    )
+    await db.execute(
+        update(AttendanceDaily)
+        .where(AttendanceDaily.class_id == removed.c.class_id, AttendanceDaily.date == removed.c.date)
+        .values(present=AttendanceDaily.present - removed.c.present, total=AttendanceDaily.total - removed.c.total)
+        .execution_options(synchronize_session=False)
+    )
+
+async def remove_class(db: AsyncSession, class_id):
+    # deleting a class sets class_id to NULL on its attendance rows, which no rollup counts,
+    # so its rollup rows go, in the caller's transaction, before the class does
+    await db.execute(delete(AttendanceMonthly).where(AttendanceMonthly.class_id == class_id))
+    await db.execute(delete(AttendanceDaily).where(AttendanceDaily.class_id == class_id))
+
+async def rebuild_rollups(chunk_size=REBUILD_CHUNK_SIZE):
+    # recomputes both rollup tables from attendances, one chunk of classes per transaction
+    last_class_id = None
+    rebuilt = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            stmt = select(Classes.classes_id).order_by(Classes.classes_id).limit(chunk_size)
+            if last_class_id is not None:
+                stmt = stmt.where(Classes.classes_id > last_class_id)
+            class_ids = list(await db.scalars(stmt))
+            if not class_ids:
+                return rebuilt
+
+            await db.execute(delete(AttendanceMonthly).where(AttendanceMonthly.class_id.in_(class_ids)))
+            await db.execute(delete(AttendanceDaily).where(AttendanceDaily.class_id.in_(class_ids)))
+
+            month = cast(func.date_trunc('month', Attendance.date), Date)
+            await db.execute(insert(AttendanceMonthly).from_select(
+                ["student_id", "class_id", "month", "present", "total"],
+                select(Attendance.student_id, Attendance.class_id, month, present_count(), func.count())
+                .where(Attendance.class_id.in_(class_ids), Attendance.student_id.is_not(None))
+                .group_by(Attendance.student_id, Attendance.class_id, month),
+            ))
+            await db.execute(insert(AttendanceDaily).from_select(
+                ["class_id", "date", "present", "total"],
+                select(Attendance.class_id, Attendance.date, present_count(), func.count())
+                .where(Attendance.class_id.in_(class_ids))
+                .group_by(Attendance.class_id, Attendance.date),
+            ))
+            await db.commit()
+
+        rebuilt += len(class_ids)
+        last_class_id = class_ids[-1]
+        print(f"rebuilt attendance rollups for {rebuilt} classes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Attendance rollup maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(rebuild_rollups(args.chunk_size))
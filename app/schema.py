@@ -1,11 +1,16 @@
 from uuid import UUID
+from typing import Generic, Literal, TypeVar
 from pydantic import BaseModel, Field, EmailStr
 from datetime import date, datetime
+from decimal import Decimal
+import datetime as dt
+
+DEFAULT_PERIODS_PER_WEEK = 3  # sessions per class when a timetable solve does not say
 
 class AdminRequest(BaseModel):
     username: str = Field(min_length=2, max_length=50, description="Username must be between 2 and 50 characters")
     email: EmailStr = Field(description="Valid email address")
-    hashed_password: str = Field(min_length=8, max_length=255, description="Password must be between 8 and 255 characters")
+    hashed_password: str = Field(min_length=8, max_length=255, description="Password must be between 8 and 255 characters; the server hashes it before storing")
 
     class Config:
         json_schema_extra = {
@@ -16,11 +21,23 @@ class AdminRequest(BaseModel):
             }
         }
         
+class LoginRequest(BaseModel):
+    username: str = Field(min_length=2, max_length=100, description="Username, or email for admins")
+    password: str = Field(min_length=1, max_length=255)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "username": "jon0106",
+                "password": "jingoes0102",
+            }
+        }
+
 class UserRequest(BaseModel):
     admin_id: UUID  
     username: str = Field(min_length=3, max_length=50, description="Username must be between 3 and 50 characters")
     email: EmailStr = Field(description="Valid email address")
-    hashed_password: str = Field(min_length=8, max_length=255, description="Password must be between 8 and 255 characters")
+    hashed_password: str = Field(min_length=8, max_length=255, description="Password must be between 8 and 255 characters; the server hashes it before storing")
     role: str = Field(description="Role must be one of the following: 'Admin', 'User', or 'Teacher'")
     class Config:
         json_schema_extra = {
@@ -163,35 +180,335 @@ class NotificationRequest(BaseModel):
             }
         }
     
-#! pending..!
+class BroadcastRequest(BaseModel):
+    target: Literal['role', 'course', 'class'] = Field(description="Send to every user with a role, or to the people in a course or class")
+    role: str | None = Field(None, description="Role to notify when target is 'role'")
+    target_id: UUID | None = Field(None, description="Course or class ID when target is 'course' or 'class'")
+    audience: Literal['students', 'parents', 'all'] = Field('students', description="For courses and classes: the students, their parents or both")
+    message: str = Field(min_length=2, max_length=255, description="Message must be between 2 and 255 characters")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "target": "course",
+                "target_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16",
+                "audience": "all",
+                "message": "Classes are cancelled tomorrow."
+            }
+        }
+    
 class AttendanceRequest(BaseModel):
-    student_id_: UUID
-    class_id_: UUID
-    date: datetime = Field(default_factory=date.today, description="Date of attendance in YYYY-MM-DD format")
+    student_id: UUID
+    class_id: UUID
+    date: dt.date = Field(default_factory=dt.date.today, description="Date of attendance in YYYY-MM-DD format")
     status: str = Field(min_length=2, max_length=10, description="Status must be between 2 and 10 characters")
     
     class Config:
         json_schema_extra = {
             "example": {
-                "student_id_": "d4a1a0b1-114c-4268-9e67-091af22dbc16", 
-                "class_id_": "d4a1a0b1-114c-4268-9e67-091af22dbc16", 
+                "student_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16", 
+                "class_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16", 
                 "date": "2001-02-15", 
                 "status": "present", 
             }
         }
+
+class AttendanceRecord(BaseModel):
+    student_id: UUID
+    status: str = Field(min_length=2, max_length=10, description="Status must be between 2 and 10 characters")
+
+class RollCallRequest(BaseModel):
+    date: dt.date = Field(default_factory=dt.date.today, description="Date of attendance in YYYY-MM-DD format")
+    records: list[AttendanceRecord] = Field(min_length=1, description="One entry per student in the class")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "date": "2001-02-15",
+                "records": [
+                    {"student_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16", "status": "present"},
+                    {"student_id": "a702a426-b019-4497-be30-9c75bb5d8665", "status": "absent"},
+                ]
+            }
+        }
         
 class FeeRequest(BaseModel):
     student_id: UUID
-    amount: float = Field(gt=0, description="Amount must be greater than 0")
+    amount: Decimal = Field(gt=0, max_digits=12, decimal_places=2, description="Amount must be greater than 0, with at most 2 decimal places")
     status: str = Field(min_length=2, max_length=10, description="Status must be between 2 and 10 characters")
-    due_date: str = Field(min_length=2, max_length=10, description="Due date in YYYY-MM-DD format")
+    due_date: date = Field(description="Due date in YYYY-MM-DD format")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "student_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16",
-                "amount": 100.0,
+                "amount": "100.00",
                 "status": "pending",
                 "due_date": "2022-01-31",
             }
-        }
\ No newline at end of file
+        }
+        
+class AssignmentRequest(BaseModel):
+    title: str = Field(min_length=2, max_length=100, description="Title must be between 2 and 100 characters")
+    description: str | None = Field(None, description="Instructions for the assignment")
+    course_id: UUID
+    teacher_id: UUID
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "title": "Algebra worksheet 3",
+                "description": "Exercises 1 to 20",
+                "course_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16",
+                "teacher_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16"
+            }
+        }
+        
+class SubmissionRequest(BaseModel):
+    student_id: UUID
+    assignment_id: UUID
+    grade: float | None = Field(None, ge=0, description="Grade, or null while the submission is ungraded")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "student_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16",
+                "assignment_id": "a702a426-b019-4497-be30-9c75bb5d8665",
+                "grade": 87.5
+            }
+        }
+
+class GradeRecord(BaseModel):
+    student_id: UUID
+    grade: float | None = Field(ge=0, description="Grade, or null to clear it")
+
+class GradeUploadRequest(BaseModel):
+    grades: list[GradeRecord] = Field(min_length=1, description="One entry per student")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "grades": [
+                    {"student_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16", "grade": 87.5},
+                    {"student_id": "a702a426-b019-4497-be30-9c75bb5d8665", "grade": 92},
+                ]
+            }
+        }
+
+class RoomRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=50, description="Name must be between 1 and 50 characters")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "B-204"
+            }
+        }
+
+class TimeSlotRequest(BaseModel):
+    weekday: int = Field(ge=0, le=6, description="0 is Monday")
+    start_time: dt.time
+    end_time: dt.time = Field(description="Must be after start_time; slots may not overlap")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "weekday": 0,
+                "start_time": "09:00",
+                "end_time": "09:45"
+            }
+        }
+
+class ClassSessionRequest(BaseModel):
+    class_id: UUID
+    room_id: UUID
+    time_slot_id: UUID
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "class_id": "d4a1a0b1-114c-4268-9e67-091af22dbc16",
+                "room_id": "a702a426-b019-4497-be30-9c75bb5d8665",
+                "time_slot_id": "5b1f6c2e-9a43-4f0e-8d2b-3c7e1a9d4f60"
+            }
+        }
+
+class TimetableSolveRequest(BaseModel):
+    class_ids: list[UUID] | None = Field(None, min_length=1, description="Classes to schedule; all classes when left out")
+    periods_per_week: int = Field(DEFAULT_PERIODS_PER_WEEK, ge=1, description="Sessions each class should have")
+    replace: bool = Field(False, description="Drop the classes' current sessions first; otherwise only the missing periods are added")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "periods_per_week": 5,
+                "replace": True
+            }
+        }
+
+# Response bodies. Each lists the columns a client may see; list endpoints select exactly
+# these columns (or the ?fields= subset of them), so hashed passwords and token versions
+# are never read for a page.
+
+class AdminResponse(BaseModel):
+    admins_id: UUID
+    username: str
+    email: str
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class UserResponse(BaseModel):
+    users_id: UUID
+    username: str
+    email: str
+    role: str | None
+    admin_id: UUID
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class StudentResponse(BaseModel):
+    students_id: UUID
+    user_id: UUID
+    first_name: str
+    last_name: str
+    dob: date
+    gender: str
+    email: str
+    phone: str
+    address: str | None
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class TeacherResponse(BaseModel):
+    teachers_id: UUID
+    user_id: UUID
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class ParentsResponse(BaseModel):
+    parents_id: UUID
+    student_id: UUID
+    user_id: UUID
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    relation: str
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class CourseResponse(BaseModel):
+    courses_id: UUID
+    name: str
+    description: str | None
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class ClassResponse(BaseModel):
+    classes_id: UUID
+    name: str
+    teacher_id: UUID
+    course_id: UUID
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class SubjectResponse(BaseModel):
+    subjects_id: UUID
+    name: str
+    description: str | None
+    course_id: UUID
+    teacher_id: UUID
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class EnrollmentResponse(BaseModel):
+    enrollments_id: UUID
+    student_id: UUID
+    course_id: UUID
+    enrolled_at: datetime | None
+
+class NotificationResponse(BaseModel):
+    notifications_id: UUID
+    user_id: UUID
+    message: str
+    read_at: datetime | None
+    created_at: datetime | None
+
+class FeeResponse(BaseModel):
+    fees_id: UUID
+    student_id: UUID
+    amount: Decimal
+    status: str
+    due_date: date
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class AttendanceResponse(BaseModel):
+    attendance_id: UUID
+    student_id: UUID | None
+    class_id: UUID | None
+    date: dt.date
+    status: str
+
+class AssignmentResponse(BaseModel):
+    assignments_id: UUID
+    title: str
+    description: str | None
+    course_id: UUID
+    teacher_id: UUID
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class SubmissionResponse(BaseModel):
+    submissions_id: UUID
+    student_id: UUID
+    assignment_id: UUID
+    submission_date: datetime | None
+    grade: float | None
+
+class StudentRiskResponse(BaseModel):
+    student_id: UUID
+    as_of: dt.date
+    attendance_rate: float | None
+    average_grade: float | None
+    overdue_amount: Decimal
+    attendance_percentile: float | None
+    grade_percentile: float | None
+    overdue_percentile: float
+    risk_score: float
+    flags: list[str] = Field(default_factory=list, description="Thresholds the student is past: attendance, grades, fees")
+
+class RoomResponse(BaseModel):
+    rooms_id: UUID
+    name: str
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class TimeSlotResponse(BaseModel):
+    time_slots_id: UUID
+    weekday: int
+    start_time: dt.time
+    end_time: dt.time
+    created_at: datetime | None
+    updated_at: datetime | None
+
+class ClassSessionResponse(BaseModel):
+    class_sessions_id: UUID
+    class_id: UUID
+    teacher_id: UUID
+    room_id: UUID
+    time_slot_id: UUID
+    created_at: datetime | None
+
+Item = TypeVar("Item")
+
+class Page(BaseModel, Generic[Item]):
+    items: list[Item] = Field(description="Only the requested columns when ?fields= is given")
+    next_cursor: str | None = Field(description="Pass as ?cursor= for the next page; null on the last page")
+
+class InboxPage(Page[NotificationResponse]):
+    unread: int
\ No newline at end of file
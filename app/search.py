@@ -0,0 +1,52 @@
+import re
+from sqlalchemy import func, literal, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Parents, Students, Teachers, search_text, search_vector
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# pg_trgm's default of 0.6 misses single-letter typos in short names ("jonh" vs "john" is 0.4)
+WORD_SIMILARITY_THRESHOLD = 0.4
+
+SEARCHABLE = {
+    "student": Students,
+    "teacher": Teachers,
+    "parent": Parents,
+}
+
+def prefix_query(q):
+    # "ann smi" -> "ann:* & smi:*" so partially typed words still hit the tsvector index
+    terms = re.findall(r"[^\W_]+", q.lower())
+    return " & ".join(f"{term}:*" for term in terms)
+
+def search_statement(model, needle, tsquery, limit):
+    table = model.__table__
+    document = search_text(table)
+    # substring match for email and phone fragments, word similarity for typos; both use the trigram index
+    conditions = [document.contains(needle, autoescape=True), literal(needle).op("<%")(document)]
+    score = func.word_similarity(needle, document)
+    if tsquery:
+        query = func.to_tsquery(text("'simple'::regconfig"), tsquery)
+        vector = search_vector(table)
+        conditions.append(vector.op("@@")(query))
+        score = score + func.ts_rank(vector, query)
+
+    pk_column = table.primary_key.columns.values()[0]
+    return (
+        select(pk_column.label("id"), table.c.first_name, table.c.last_name, table.c.email, table.c.phone, score.label("score"))
+        .where(or_(*conditions))
+        .order_by(score.desc(), pk_column)
+        .limit(limit)
+    )
+
+async def search_people(db: AsyncSession, q, types=None, limit=DEFAULT_SEARCH_LIMIT):
+    needle = q.strip().lower()
+    tsquery = prefix_query(needle)
+    await db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(WORD_SIMILARITY_THRESHOLD), True)))
+
+    items = []
+    for kind in types or SEARCHABLE:
+        rows = (await db.execute(search_statement(SEARCHABLE[kind], needle, tsquery, limit))).all()
+        items += [{"type": kind, **row._asdict()} for row in rows]
+    items.sort(key=lambda item: item["score"], reverse=True)
+    return items[:limit]
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from sqlalchemy import text
+from database import AsyncSessionLocal, engine
+from models import Students
+from search import search_people, search_statement, prefix_query
+
+# Seeds a synthetic population and times /search queries against it:
+#   python search_benchmark.py seed --people 1000000
+#   python search_benchmark.py run --queries 200 --explain
+# Seeded rows use the bench- prefix; "seed --clear" removes them.
+
+FIRST_NAMES = [
+    "james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda", "david", "elizabeth",
+    "william", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "charles", "karen",
+    "aarav", "priya", "rohan", "ananya", "vivek", "kavya", "arjun", "meera", "ishaan", "diya",
+    "mateo", "sofia", "lucas", "valentina", "hugo", "camille", "noah", "emma", "liam", "olivia",
+]
+LAST_NAMES = [
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+    "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+    "sharma", "verma", "gupta", "iyer", "reddy", "nair", "patel", "mehta", "kapoor", "joshi",
+    "dubois", "moreau", "rossi", "ferrari", "schmidt", "schneider", "kowalski", "novak", "silva", "santos",
+]
+
+def name_sql(names, seed):
+    return f"(ARRAY[{', '.join(repr(name) for name in names)}])[1 + (g::bigint * {seed}) % {len(names)}]"
+
+def seed(people):
+    # 60% students, 30% parents, 10% teachers, each with its own user row
+    students, parents = people * 6 // 10, people * 3 // 10
+    teachers = people - students - parents
+    first_name, last_name = name_sql(FIRST_NAMES, 7919), name_sql(LAST_NAMES, 104729)
+    person = f"{first_name} AS first_name, {last_name} AS last_name, lpad(((g::bigint * 2654435761) % 10000000000)::text, 10, '0') AS phone"
+
+    with engine.begin() as conn:
+        admin_id = conn.execute(text(
+            "INSERT INTO admins (admins_id, username, email, hashed_password, created_at, updated_at) "
+            "VALUES (gen_random_uuid(), 'bench', 'bench-admin@bench.example', 'x', now(), now()) "
+            "ON CONFLICT (email) DO UPDATE SET username = excluded.username RETURNING admins_id"
+        )).scalar_one()
+        conn.execute(text(
+            "INSERT INTO users (users_id, username, email, hashed_password, role, admin_id, created_at, updated_at) "
+            "SELECT md5('bench-user-' || g)::uuid, 'bench-' || g, 'bench-' || g || '@bench.example', 'x', "
+            "CASE WHEN g <= :students THEN 'STUDENT' WHEN g <= :students + :parents THEN 'PARENT' ELSE 'TEACHER' END::roleenum, "
+            ":admin_id, now(), now() FROM generate_series(1, :people) g"
+        ), {"students": students, "parents": parents, "people": people, "admin_id": admin_id})
+        conn.execute(text(
+            "INSERT INTO students (students_id, user_id, first_name, last_name, dob, gender, email, phone, address, created_at, updated_at) "
+            "SELECT md5('bench-student-' || g)::uuid, md5('bench-user-' || g)::uuid, p.first_name, p.last_name, "
+            "date '2005-01-01' + (g % 3650), 'X', p.first_name || '.' || p.last_name || '.' || g || '@bench.example', p.phone, NULL, now(), now() "
+            f"FROM generate_series(1, :students) g, LATERAL (SELECT {person}) p"
+        ), {"students": students})
+        conn.execute(text(
+            "INSERT INTO parents (parents_id, student_id, user_id, first_name, last_name, email, phone, relation, created_at, updated_at) "
+            "SELECT gen_random_uuid(), md5('bench-student-' || (1 + g % :students))::uuid, md5('bench-user-' || g)::uuid, "
+            "p.first_name, p.last_name, p.first_name || '.' || p.last_name || '.' || g || '@bench.example', p.phone, 'guardian', now(), now() "
+            f"FROM generate_series(:students + 1, :students + :parents) g, LATERAL (SELECT {person}) p"
+        ), {"students": students, "parents": parents})
+        conn.execute(text(
+            "INSERT INTO teachers (teachers_id, user_id, first_name, last_name, email, phone, created_at, updated_at) "
+            "SELECT gen_random_uuid(), md5('bench-user-' || g)::uuid, "
+            "p.first_name, p.last_name, p.first_name || '.' || p.last_name || '.' || g || '@bench.example', p.phone, now(), now() "
+            f"FROM generate_series(:students + :parents + 1, :people) g, LATERAL (SELECT {person}) p"
+        ), {"students": students, "parents": parents, "people": people})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE admins, users, students, parents, teachers"))
+    print(f"seeded {students} students, {parents} parents, {teachers} teachers")
+
+def clear():
+    with engine.begin() as conn:
+        for table in ("parents", "teachers", "students"):
+            conn.execute(text(f"DELETE FROM {table} WHERE email LIKE '%@bench.example'"))
+        conn.execute(text("DELETE FROM users WHERE email LIKE '%@bench.example'"))
+        conn.execute(text("DELETE FROM admins WHERE email LIKE '%@bench.example'"))
+    print("removed benchmark rows")
+
+def typo(word):
+    # swap two neighbouring letters: "garcia" -> "gacria"
+    if len(word) < 4:
+        return word
+    i = random.randrange(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+async def sample_queries(db, count):
+    rows = (await db.execute(text(
+        "SELECT first_name, last_name, email, phone FROM students ORDER BY random() LIMIT :count"
+    ), {"count": count})).all()
+    if not rows:
+        raise SystemExit("no students found, run the seed command first")
+    kinds = {
+        "full name": lambda row: f"{row.first_name} {row.last_name}",
+        "prefix": lambda row: f"{row.first_name[:4]} {row.last_name[:3]}",
+        "typo": lambda row: typo(row.last_name),
+        "email": lambda row: row.email.split("@")[0][-8:],
+        "phone": lambda row: row.phone[2:8],
+    }
+    return {kind: [build(random.choice(rows)) for _ in range(count)] for kind, build in kinds.items()}
+
+async def explain(db, q):
+    needle = q.lower()
+    stmt = search_statement(Students, needle, prefix_query(needle), 20)
+    compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}"))).scalars().all()
+    print(f"\nplan for {q!r}:")
+    print("\n".join(plan))
+
+async def run(queries, show_plan):
+    async with AsyncSessionLocal() as db:
+        samples = await sample_queries(db, queries)
+        for kind, terms in samples.items():
+            latencies, hits = [], 0
+            for q in terms:
+                start = time.perf_counter()
+                items = await search_people(db, q)
+                latencies.append(time.perf_counter() - start)
+                hits += bool(items)
+            latencies.sort()
+            print(
+                f"{kind:<10} queries {len(terms):>5}  with results {hits * 100 / len(terms):5.1f}%  "
+                f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms"
+            )
+        if show_plan:
+            for kind in ("prefix", "typo", "phone"):
+                await explain(db, samples[kind][0])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed_parser = commands.add_parser("seed", help="insert a synthetic population")
+    seed_parser.add_argument("--people", type=int, default=1000000)
+    seed_parser.add_argument("--clear", action="store_true", help="remove benchmark rows instead")
+    run_parser = commands.add_parser("run", help="time search queries")
+    run_parser.add_argument("--queries", type=int, default=200, help="queries per query kind")
+    run_parser.add_argument("--explain", action="store_true", help="print EXPLAIN ANALYZE for a few queries")
+    args = parser.parse_args()
+
+    if args.command == "seed" and args.clear:
+        clear()
+    elif args.command == "seed":
+        seed(args.people)
+    else:
+        asyncio.run(run(args.queries, args.explain))
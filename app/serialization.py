@@ -0,0 +1,21 @@
+from decimal import Decimal
+from uuid import UUID
+import orjson
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import JSONResponse
+
+def _default(value):
+    # orjson handles uuid.UUID, date, datetime and Enum itself. asyncpg returns its own UUID
+    # subclass, which orjson does not accept; Decimal is encoded the way jsonable_encoder does it
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)
+    raise TypeError
+
+class ORJSONResponse(JSONResponse):
+    # for handlers that already return plain dicts of column values (Row._mapping), so
+    # FastAPI's jsonable_encoder walk over every value can be skipped. A route still
+    # declares response_model for the docs; returning a Response bypasses its validation
+    def render(self, content):
+        return orjson.dumps(content, default=_default)
@@ -0,0 +1,103 @@
+import os
+import sys
+from uuid import uuid4
+import pytest
+from sqlalchemy import event, text
+
+# The tests drive the app against a scratch Postgres database, which they drop and recreate:
+#   TEST_DB_URL=postgresql://postgres@localhost/sms_test python -m pytest tests
+# Without TEST_DB_URL every test that needs the database is skipped.
+TEST_DB_URL = os.getenv('TEST_DB_URL')
+if TEST_DB_URL:
+    os.environ['DB_URL'] = TEST_DB_URL
+    os.environ['ASYNC_DB_URL'] = TEST_DB_URL.replace('postgresql://', 'postgresql+asyncpg://', 1)
+os.environ.setdefault('AUTH_ENFORCE', 'false')
+os.environ.setdefault('NOTIFY_QUEUE_BACKEND', 'memory')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope='session')
+def test_database():
+    if not TEST_DB_URL:
+        pytest.skip('set TEST_DB_URL to a scratch Postgres database')
+    import database
+    import models
+    with database.engine.begin() as conn:
+        conn.execute(text('DROP SCHEMA public CASCADE'))
+        conn.execute(text('CREATE SCHEMA public'))
+    models.Base.metadata.create_all(bind=database.engine)
+    return database
+
+@pytest.fixture(scope='session')
+def client(test_database):
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture
+def statements(test_database):
+    # SQL statements the app sends while the test runs
+    executed = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    engine = test_database.async_engine.sync_engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+def unique(prefix):
+    return f"{prefix}{uuid4().hex[:12]}"
+
+@pytest.fixture
+def admin_id(client):
+    name = unique('admin')
+    response = client.post('/admin', json={"username": name, "email": f"{name}@example.com", "hashed_password": "password123"})
+    assert response.status_code == 201, response.text
+    return response.json()["admins_id"]
+
+@pytest.fixture
+def create_user(client, admin_id):
+    def create(role):
+        name = unique(role)
+        response = client.post('/user', json={
+            "admin_id": admin_id, "username": name, "email": f"{name}@example.com", "hashed_password": "password123", "role": role,
+        })
+        assert response.status_code == 201, response.text
+        return response.json()["users_id"]
+    return create
+
+@pytest.fixture
+def create_student(client, create_user):
+    def create():
+        name = unique('student')
+        response = client.post('/student', json={
+            "user_id": create_user('student'), "first_name": "Test", "last_name": "Student", "dob": "2010-01-01",
+            "gender": "F", "email": f"{name}@example.com", "phone": "5550001111", "address": "1 Test Street",
+        })
+        assert response.status_code == 201, response.text
+        return response.json()["students_id"]
+    return create
+
+@pytest.fixture
+def create_course(client):
+    def create():
+        response = client.post('/course', json={"name": unique('Course '), "description": "Test course"})
+        assert response.status_code == 201, response.text
+        return response.json()["courses_id"]
+    return create
+
+@pytest.fixture
+def create_class(client, create_user, create_course):
+    # a class of a new teacher in a new course; returns (class_id, course_id)
+    def create():
+        name = unique('teacher')
+        teacher = client.post('/teacher', json={
+            "user_id": create_user('teacher'), "first_name": "Test", "last_name": "Teacher",
+            "email": f"{name}@example.com", "phone": "5550004444",
+        })
+        assert teacher.status_code == 201, teacher.text
+        course_id = create_course()
+        response = client.post('/class', json={"name": "Test class", "teacher_id": teacher.json()["teachers_id"], "course_id": course_id})
+        assert response.status_code == 201, response.text
+        return response.json()["classes_id"], course_id
+    return create
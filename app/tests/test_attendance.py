@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def enrolled_students(client, create_student, course_id, n):
+    student_ids = [create_student() for _ in range(n)]
+    for student_id in student_ids:
+        response = client.post('/enrollment', json={"student_id": student_id, "course_id": course_id})
+        assert response.status_code == 201, response.text
+    return student_ids
+
+def roll_call(client, class_id, day, statuses):
+    return client.post(f"/class/{class_id}/attendance", json={
+        "date": day, "records": [{"student_id": student_id, "status": status} for student_id, status in statuses.items()],
+    })
+
+def test_delete_class_with_attendance(client, create_student, create_class):
+    class_id, course_id = create_class()
+    student_id, = enrolled_students(client, create_student, course_id, 1)
+    assert roll_call(client, class_id, "2030-01-07", {student_id: "Present"}).status_code == 200
+
+    response = client.delete(f"/class/{class_id}")
+    assert response.status_code == 200, response.text
+    assert client.get(f"/class/{class_id}").status_code == 404
+
+def test_edit_and_delete_attendance_of_a_deleted_class(client, create_student, create_class):
+    class_id, course_id = create_class()
+    student_id, = enrolled_students(client, create_student, course_id, 1)
+    assert roll_call(client, class_id, "2030-02-04", {student_id: "Present"}).status_code == 200
+    assert client.delete(f"/class/{class_id}").status_code == 200
+    attendance = client.get(f"/attendance?student_id={student_id}&date=2030-02-04").json()["items"][0]
+    assert attendance["class_id"] is None
+
+    response = client.patch(f"/attendance/{attendance['attendance_id']}", json={"status": "Absent"})
+    assert response.status_code == 200, response.text
+
+    # moved to a live class, the row is counted there again
+    other_class_id, _ = create_class()
+    body = {"student_id": student_id, "class_id": other_class_id, "date": "2030-02-04", "status": "Present"}
+    response = client.put(f"/attendance/{attendance['attendance_id']}", json=body)
+    assert response.status_code == 200, response.text
+    summary = client.get(f"/class/{other_class_id}/attendance/summary?month=2030-02").json()
+    assert summary["total"] == 1 and summary["present"] == 1
+
+    response = client.delete(f"/attendance/{attendance['attendance_id']}")
+    assert response.status_code == 200, response.text
+    assert client.get(f"/class/{other_class_id}/attendance/summary?month=2030-02").json()["total"] == 0
+
+def test_concurrent_roll_calls_count_each_student_once(client, create_student, create_class):
+    class_id, course_id = create_class()
+    student_ids = enrolled_students(client, create_student, course_id, 3)
+
+    def record(i):
+        status = "Present" if i % 2 else "Absent"
+        return roll_call(client, class_id, "2030-01-08", {student_id: status for student_id in student_ids}).status_code
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert set(pool.map(record, range(16))) == {200}
+
+    summary = client.get(f"/class/{class_id}/attendance/summary?month=2030-01").json()
+    assert summary["total"] == 3
+    assert summary["present"] in (0, 3)
+
+def test_update_attendance_to_a_taken_date_is_a_400(client, create_student, create_class):
+    class_id, course_id = create_class()
+    student_id, = enrolled_students(client, create_student, course_id, 1)
+    assert roll_call(client, class_id, "2030-01-09", {student_id: "Present"}).status_code == 200
+    assert roll_call(client, class_id, "2030-01-10", {student_id: "Present"}).status_code == 200
+    attendance = client.get(f"/attendance?student_id={student_id}&date=2030-01-10").json()["items"][0]
+
+    body = {"student_id": student_id, "class_id": class_id, "date": "2030-01-09", "status": "Absent"}
+    assert client.put(f"/attendance/{attendance['attendance_id']}", json=body).status_code == 400
+    assert client.get(f"/class/{class_id}/attendance/summary?month=2030-01").json()["total"] == 2
+
+def test_concurrent_creates_for_one_date_are_400s(client, create_student, create_class):
+    class_id, course_id = create_class()
+    student_id, = enrolled_students(client, create_student, course_id, 1)
+    body = {"student_id": student_id, "class_id": class_id, "date": "2030-01-11", "status": "Present"}
+
+    def create(_):
+        return client.post('/attendance', json=body)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(create, range(8)))
+    assert sorted(response.status_code for response in responses) == [201] + [400] * 7
+    assert {response.json()["detail"] for response in responses if response.status_code == 400} == {"Attendance already recorded for this date."}
+    assert client.get(f"/class/{class_id}/attendance/summary?month=2030-01").json()["total"] == 1
+
+def test_create_attendance_for_unknown_student_is_a_400(client, create_class):
+    class_id, _ = create_class()
+    body = {"student_id": "00000000-0000-0000-0000-000000000000", "class_id": class_id, "date": "2030-01-12", "status": "Present"}
+    response = client.post('/attendance', json=body)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid student ID"
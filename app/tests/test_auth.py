@@ -0,0 +1,25 @@
+import auth
+from conftest import unique
+
+def token(client, path, username, password="password123"):
+    response = client.post(path, json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_requests_without_a_token_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_ENFORCE", True)
+    assert client.get('/class').status_code == 401
+    assert client.get('/auth/stats').status_code == 401
+
+def test_auth_stats_are_for_admins(client, admin_id):
+    name = unique('admin')
+    assert client.post('/admin', json={"username": name, "email": f"{name}@example.com", "hashed_password": "password123"}).status_code == 201
+    teacher = unique('teacher')
+    assert client.post('/user', json={
+        "admin_id": admin_id, "username": teacher, "email": f"{teacher}@example.com", "hashed_password": "password123", "role": "teacher",
+    }).status_code == 201
+
+    assert client.get('/auth/stats', headers=token(client, '/auth/token', teacher)).status_code == 403
+    response = client.get('/auth/stats', headers=token(client, '/auth/admin/token', f"{name}@example.com"))
+    assert response.status_code == 200
+    assert "token_cache" in response.json()
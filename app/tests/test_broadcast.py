@@ -0,0 +1,179 @@
+import asyncio
+import time
+from datetime import datetime
+from uuid import UUID, uuid4
+import pytest
+import broadcast
+from database import AsyncSessionLocal
+from models import NotificationJobs
+
+# The app's workers read jobs from a MemoryQueue here (NOTIFY_QUEUE_BACKEND=memory in conftest.py)
+
+@pytest.fixture
+def deliveries(monkeypatch):
+    # the user IDs of every chunk handed to the delivery handlers, per job
+    delivered = {}
+    async def record(job, rows):
+        delivered.setdefault(job.jobs_id, []).append([row.user_id for row in rows])
+    monkeypatch.setattr(broadcast, "_delivery_handlers", [*broadcast._delivery_handlers, record])
+    monkeypatch.setattr(broadcast, "BROADCAST_CHUNK_SIZE", 2)
+    return delivered
+
+@pytest.fixture
+def course_with_students(client, create_course, create_student):
+    # a course with five enrolled students; returns the course ID and the students' user IDs, sorted
+    course_id = create_course()
+    user_ids = []
+    for _ in range(5):
+        student_id = create_student()
+        assert client.post('/enrollment', json={"student_id": student_id, "course_id": course_id}).status_code == 201
+        user_ids.append(UUID(client.get(f"/student/{student_id}").json()["user_id"]))
+    return course_id, sorted(user_ids)
+
+def wait_for(client, job_id, statuses, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/notification/broadcast/{job_id}").json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} stayed {job['status']}")
+
+def test_recipients_are_expanded_in_chunks(client, deliveries, course_with_students):
+    course_id, user_ids = course_with_students
+    response = client.post('/notification/broadcast', json={"target": "course", "target_id": course_id, "message": "Chunked"})
+    assert response.status_code == 202, response.text
+    assert response.json()["status"] == "queued"
+
+    job = wait_for(client, response.json()["jobs_id"], {"done", "failed"})
+    assert job["status"] == "done" and job["error"] is None
+    assert job["recipients"] == job["delivered"] == 5
+    assert job["last_user_id"] == str(user_ids[-1])
+    assert deliveries[UUID(job["jobs_id"])] == [user_ids[0:2], user_ids[2:4], user_ids[4:5]]
+
+def test_job_resumes_after_last_user_id(client, deliveries, course_with_students):
+    # a job that stopped after its first chunk, as a worker that died would leave it
+    course_id, user_ids = course_with_students
+    async def interrupted_job():
+        async with AsyncSessionLocal() as db:
+            job = NotificationJobs(
+                target="course", target_id=UUID(course_id), audience="students", message="Resumed",
+                status="running", recipients=2, delivered=2, last_user_id=user_ids[1],
+            )
+            db.add(job)
+            await db.commit()
+            return job.jobs_id
+    job_id = client.portal.call(interrupted_job)
+    client.portal.call(broadcast.get_queue().put, job_id)
+
+    job = wait_for(client, job_id, {"done", "failed"})
+    assert job["status"] == "done"
+    assert job["recipients"] == job["delivered"] == 5
+    assert deliveries[job_id] == [user_ids[2:4], user_ids[4:5]]
+
+def test_status_goes_from_queued_through_running_to_failed(client, monkeypatch, course_with_students):
+    course_id, _ = course_with_students
+    release = asyncio.Event()
+    async def failing(job, rows):
+        await release.wait()
+        raise RuntimeError("push service down")
+    monkeypatch.setattr(broadcast, "_delivery_handlers", [failing])
+
+    response = client.post('/notification/broadcast', json={"target": "course", "target_id": course_id, "message": "Failing"})
+    assert response.json()["status"] == "queued"
+    job_id = response.json()["jobs_id"]
+    assert wait_for(client, job_id, {"running", "done", "failed"})["status"] == "running"
+
+    client.portal.call(release.set)
+    job = wait_for(client, job_id, {"done", "failed"})
+    assert job["status"] == "failed"
+    assert "push service down" in job["error"]
+    assert job["recipients"] == 5 and job["delivered"] == 0
+
+def stale_job(course_id, user_ids):
+    # a job claimed by a worker that died after the first chunk, so its lease was never renewed
+    async def create():
+        async with AsyncSessionLocal() as db:
+            job = NotificationJobs(
+                target="course", target_id=UUID(course_id), audience="students", message="Taken over",
+                status="running", recipients=2, delivered=2, last_user_id=user_ids[1],
+                created_at=datetime(2000, 1, 1), claimed_at=datetime(2000, 1, 1),
+            )
+            db.add(job)
+            await db.commit()
+            return job.jobs_id
+    return create
+
+def test_postgres_queue_takes_over_expired_lease(client, deliveries, course_with_students):
+    course_id, user_ids = course_with_students
+    job_id = client.portal.call(stale_job(course_id, user_ids))
+    queue = broadcast.PostgresQueue(poll_interval=0.05, lease=30)
+    assert client.portal.call(queue.get) == job_id
+    client.portal.call(broadcast.run_job, job_id)
+
+    job = client.get(f"/notification/broadcast/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["recipients"] == job["delivered"] == 5
+    assert deliveries[job_id] == [user_ids[2:4], user_ids[4:5]]
+
+def test_sqlite_queue_keeps_entry_until_done(tmp_path):
+    queue = broadcast.SQLiteQueue(path=str(tmp_path / "queue.sqlite3"), poll_interval=0.01, lease=0.2)
+    job_id = uuid4()
+    asyncio.run(queue.put(job_id))
+    assert asyncio.run(queue.get()) == job_id
+    # the claim is held: nothing to take until the lease runs out
+    assert queue._claim() is None
+    time.sleep(0.3)
+    assert asyncio.run(queue.get()) == job_id
+    asyncio.run(queue.done(job_id))
+    time.sleep(0.3)
+    assert queue._claim() is None
+
+class FlakyQueue(broadcast.MemoryQueue):
+    # a memory queue whose first polls fail, as the Postgres queue's do while the database is away
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.heartbeats = 0
+
+    async def get(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionResetError("connection reset by peer")
+        return await super().get()
+
+    async def heartbeat(self, job_id):
+        self.heartbeats += 1
+        if self.heartbeats == 1:
+            raise ConnectionResetError("connection reset by peer")
+
+def test_worker_outlives_queue_errors(client, monkeypatch, deliveries, course_with_students):
+    course_id, _ = course_with_students
+    queue = FlakyQueue(failures=3)
+    monkeypatch.setattr(broadcast, "_queue", queue)
+    monkeypatch.setattr(broadcast, "NOTIFY_RETRY_DELAY", 0.01)
+
+    async def start():
+        return asyncio.create_task(broadcast.worker())
+    task = client.portal.call(start)
+    try:
+        response = client.post('/notification/broadcast', json={"target": "course", "target_id": course_id, "message": "Flaky"})
+        job = wait_for(client, response.json()["jobs_id"], {"done", "failed"})
+        assert job["status"] == "done" and job["recipients"] == 5
+        assert queue.failures == 0
+    finally:
+        async def stop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        client.portal.call(stop)
+
+def test_lease_outlives_a_failed_heartbeat(monkeypatch):
+    monkeypatch.setattr(broadcast, "NOTIFY_LEASE", 0.03)
+    queue = FlakyQueue(failures=0)
+    async def renew_for_a_while():
+        lease = asyncio.create_task(broadcast.keep_lease(queue, uuid4()))
+        await asyncio.sleep(0.1)
+        assert not lease.done()
+        lease.cancel()
+    asyncio.run(renew_for_a_while())
+    assert queue.heartbeats >= 2
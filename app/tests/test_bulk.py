@@ -0,0 +1,37 @@
+from conftest import unique
+
+def student_row(user_id, email):
+    return {
+        "user_id": user_id, "first_name": "Bulk", "last_name": "Student", "dob": "2010-01-01", "gender": "M",
+        "email": email, "phone": "5550003333", "address": "2 Test Street",
+    }
+
+def test_bulk_students_cannot_take_another_students_email(client, create_user, create_student):
+    student_id = create_student()
+    student = client.get(f"/student/{student_id}").json()
+
+    response = client.post('/student/bulk', json=[student_row(create_user('student'), student["email"])])
+    assert response.status_code == 200, response.text
+    assert response.json()["failed"] == 1
+    assert client.get(f"/student/{student_id}").json()["user_id"] == student["user_id"]
+
+def test_bulk_students_update_by_email(client, create_user):
+    user_id, email = create_user('student'), f"{unique('student')}@example.com"
+    assert client.post('/student/bulk', json=[student_row(user_id, email)]).json()["created"] == 1
+
+    row = {**student_row(user_id, email), "address": "3 Other Street"}
+    result = client.post('/student/bulk', json=[row]).json()
+    assert result["updated"] == 1
+    assert client.get(f"/student/{result['results'][0]['students_id']}").json()["address"] == "3 Other Street"
+
+def test_bulk_user_update_revokes_tokens(client, admin_id):
+    name = unique('teacher')
+    row = {"admin_id": admin_id, "username": name, "email": f"{name}@example.com", "hashed_password": "password123", "role": "teacher"}
+    assert client.post('/user/bulk', json=[row]).json()["created"] == 1
+    token = client.post('/auth/token', json={"username": name, "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get('/class', headers=headers).status_code == 200
+
+    result = client.post('/user/bulk', json=[{**row, "hashed_password": "password456"}]).json()
+    assert result["updated"] == 1
+    assert client.get('/class', headers=headers).status_code == 401
@@ -0,0 +1,12 @@
+import cache
+
+def test_cached_user_leaves_out_secrets(client, create_user):
+    user_id = create_user('teacher')
+    for _ in range(2):  # the miss, then the hit
+        response = client.get(f"/user/{user_id}")
+        assert response.status_code == 200, response.text
+        assert set(response.json()) == {"users_id", "username", "email", "role", "admin_id", "created_at", "updated_at"}
+        assert response.json()["role"] == "teacher"
+
+    cached = client.portal.call(cache.get_cache().get, cache.cache_key('user', user_id))
+    assert "hashed_password" not in cached and "token_version" not in cached
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+def test_course_list_etag_changes_when_an_older_transaction_commits(client, test_database, create_course):
+    course_id = create_course()
+    with test_database.engine.connect() as writer:
+        # the writer's now() is fixed here, before the rows the list is validated against
+        writer.execute(text("SELECT now()"))
+        create_course()
+        etag = client.get('/course').headers["ETag"]
+        assert client.get('/course', headers={"If-None-Match": etag}).status_code == 304
+
+        writer.execute(text("UPDATE courses SET description = 'Changed', updated_at = now() WHERE courses_id = :id"), {"id": course_id})
+        writer.commit()
+
+    response = client.get('/course', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,51 @@
+import pytest
+
+STUDENT_EXPAND = "user,enrollments.course,fees,outstanding_fees,parents.user"
+
+@pytest.fixture
+def student_with(client, create_user, create_student):
+    # a student with a parent, n enrollments and n fees
+    def create(n):
+        student_id = create_student()
+        user_id = create_user('parent')
+        parent = client.post('/parents', json={
+            "user_id": user_id, "student_id": student_id, "first_name": "Test", "last_name": "Parent",
+            "email": f"parent-{user_id}@example.com", "phone": "5550002222", "relation": "Guardian",
+        })
+        assert parent.status_code == 201, parent.text
+        for i in range(n):
+            course = client.post('/course', json={"name": f"Course {i}", "description": "Expand test course"})
+            assert course.status_code == 201, course.text
+            enrollment = client.post('/enrollment', json={"student_id": student_id, "course_id": course.json()["courses_id"]})
+            assert enrollment.status_code == 201, enrollment.text
+            fee = client.post('/fee', json={"student_id": student_id, "amount": "10.00", "status": "Pending", "due_date": "2030-01-01"})
+            assert fee.status_code == 201, fee.text
+        return student_id
+    return create
+
+def read_counted(client, statements, path):
+    statements.clear()
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    return response.json(), len(statements)
+
+def test_query_count_does_not_grow_with_related_rows(client, statements, student_with):
+    one, one_count = read_counted(client, statements, f"/student/{student_with(1)}?expand={STUDENT_EXPAND}")
+    many, many_count = read_counted(client, statements, f"/student/{student_with(5)}?expand={STUDENT_EXPAND}")
+
+    assert len(one["enrollments"]) == 1 and len(many["enrollments"]) == 5
+    assert len(many["fees"]) == 5 and len(many["outstanding_fees"]) == 5
+    assert all(enrollment["course"]["name"].startswith("Course") for enrollment in many["enrollments"])
+    assert many_count == one_count
+
+def test_expanded_users_leave_out_secrets(client, student_with):
+    student = client.get(f"/student/{student_with(1)}?expand={STUDENT_EXPAND}").json()
+    for user in [student["user"], student["parents"][0]["user"]]:
+        assert "hashed_password" not in user and "token_version" not in user
+        assert user["username"]
+
+def test_expanded_admin_leaves_out_secrets(client, create_user):
+    user = client.get(f"/user/{create_user('teacher')}?expand=admin").json()
+    assert "hashed_password" not in user and "token_version" not in user
+    assert "hashed_password" not in user["admin"] and "token_version" not in user["admin"]
+    assert user["admin"]["username"]
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+def test_concurrent_fee_updates_keep_the_balance(client, create_student):
+    student_id = create_student()
+    fee = client.post('/fee', json={"student_id": student_id, "amount": "10.00", "status": "Pending", "due_date": "2030-01-01"})
+    assert fee.status_code == 201, fee.text
+    fee_id = fee.json()["fees_id"]
+
+    def update(amount):
+        body = {"student_id": student_id, "amount": f"{amount}.00", "status": "Pending", "due_date": "2030-01-01"}
+        return client.put(f"/fee/{fee_id}", json=body).status_code
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert set(pool.map(update, range(11, 31))) == {200}
+
+    amount = Decimal(client.get(f"/fee/{fee_id}").json()["amount"])
+    balance = client.get(f"/student/{student_id}/fees/balance").json()
+    assert Decimal(balance["pending_amount"]) == amount
+    assert balance["pending_count"] == 1
+
+def test_unknown_student_is_a_400(client, create_student):
+    unknown = "00000000-0000-0000-0000-000000000000"
+    response = client.post('/fee', json={"student_id": unknown, "amount": "10.00", "status": "Pending", "due_date": "2030-01-01"})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid student ID"
+
+    student_id = create_student()
+    fee = client.post('/fee', json={"student_id": student_id, "amount": "10.00", "status": "Pending", "due_date": "2030-01-01"}).json()
+    response = client.put(f"/fee/{fee['fees_id']}", json={"student_id": unknown, "amount": "10.00", "status": "Pending", "due_date": "2030-01-01"})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid student ID"
+    assert Decimal(client.get(f"/student/{student_id}/fees/balance").json()["pending_amount"]) == Decimal("10.00")
@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def test_concurrent_grade_uploads_count_each_student_once(client, create_student, create_class):
+    class_id, course_id = create_class()
+    teacher_id = client.get(f"/class/{class_id}").json()["teacher_id"]
+    student_ids = [create_student() for _ in range(3)]
+    for student_id in student_ids:
+        assert client.post('/enrollment', json={"student_id": student_id, "course_id": course_id}).status_code == 201
+    assignment = client.post('/assignment', json={"title": "Essay", "course_id": course_id, "teacher_id": teacher_id})
+    assert assignment.status_code == 201, assignment.text
+    assignment_id = assignment.json()["assignments_id"]
+
+    def upload(grade):
+        body = {"grades": [{"student_id": student_id, "grade": grade} for student_id in student_ids]}
+        return client.put(f"/assignment/{assignment_id}/grades", json=body).status_code
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert set(pool.map(upload, range(50, 66))) == {200}
+
+    summary = client.get(f"/assignment/{assignment_id}/grades").json()
+    assert summary["graded"] == 3
+    assert summary["min"] == summary["max"] == summary["average"]
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def test_concurrent_read_and_delete_count_each_notification_once(client, create_user):
+    user_id = create_user('student')
+    notification_ids = []
+    for i in range(10):
+        response = client.post('/notification', json={"user_id": user_id, "message": f"Message {i}"})
+        assert response.status_code == 201, response.text
+        notification_ids.append(response.json()["notifications_id"])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        deletes = pool.map(lambda notification_id: client.delete(f"/notification/{notification_id}").status_code, notification_ids)
+        reads = pool.map(lambda notification_id: client.post(f"/user/{user_id}/notifications/{notification_id}/read").status_code, notification_ids)
+        assert set(deletes) == {200}
+        assert set(reads) <= {200, 404}
+
+    assert client.get(f"/user/{user_id}/notifications/unread").json()["unread"] == 0
+
+def test_delete_notification_message(client, create_user):
+    user_id = create_user('student')
+    notification = client.post('/notification', json={"user_id": user_id, "message": "Goodbye"}).json()
+    response = client.delete(f"/notification/{notification['notifications_id']}")
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Notification deleted successfully"}
+    assert client.get(f"/user/{user_id}/notifications/unread").json()["unread"] == 0
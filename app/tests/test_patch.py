@@ -0,0 +1,18 @@
+def test_patch_admin_returns_response_body(client, admin_id):
+    response = client.patch(f"/admin/{admin_id}", json={"hashed_password": "newpassword123"})
+    assert response.status_code == 200, response.text
+    assert set(response.json()) == {"admins_id", "username", "email", "created_at", "updated_at"}
+
+def test_patch_student_returns_response_body(client, create_student):
+    student_id = create_student()
+    response = client.patch(f"/student/{student_id}", json={"address": "4 Patched Street"})
+    assert response.status_code == 200, response.text
+    assert response.json()["address"] == "4 Patched Street"
+    assert not any(name.startswith("previous_") for name in response.json())
+
+def test_patch_user_returns_response_body(client, create_user):
+    user_id = create_user('teacher')
+    response = client.patch(f"/user/{user_id}", json={"role": "parent"})
+    assert response.status_code == 200, response.text
+    assert response.json()["role"] == "parent"
+    assert set(response.json()) == {"users_id", "username", "email", "role", "admin_id", "created_at", "updated_at"}
@@ -0,0 +1,21 @@
+from conftest import unique
+
+def test_deleting_a_booked_room_or_slot_is_a_400(client, create_class):
+    class_id, _ = create_class()
+    room_id = client.post('/room', json={"name": unique('Room ')}).json()["rooms_id"]
+    slot = client.post('/timeslot', json={"weekday": 6, "start_time": "03:00", "end_time": "03:45"})
+    assert slot.status_code == 201, slot.text
+    slot_id = slot.json()["time_slots_id"]
+    session = client.post('/timetable/session', json={"class_id": class_id, "room_id": room_id, "time_slot_id": slot_id})
+    assert session.status_code == 201, session.text
+
+    response = client.delete(f"/room/{room_id}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Room is booked in the timetable."
+    response = client.delete(f"/timeslot/{slot_id}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Time slot is used in the timetable."
+
+    assert client.delete(f"/timetable/session/{session.json()['class_sessions_id']}").status_code == 200
+    assert client.delete(f"/room/{room_id}").status_code == 200
+    assert client.delete(f"/timeslot/{slot_id}").status_code == 200
@@ -0,0 +1,180 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# Weekly timetable solver. solve() runs in worker processes, so this module imports only
+# the standard library and works on plain IDs; __timetable.py loads and stores the rows.
+#   python timetable.py bench --classes 3000 --teachers 600 --rooms 400
+
+TIMETABLE_SOLVER_WORKERS = int(os.getenv('TIMETABLE_SOLVER_WORKERS', '2'))  # solves that can run at once
+
+# spawn, so a worker starts clean instead of forking the event loop and the connection pools;
+# workers are only started by the first solve, and the app's lifespan shuts them down
+solver_pool = ProcessPoolExecutor(max_workers=TIMETABLE_SOLVER_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+def solve(slots, rooms, classes, fixed):
+    # slots:   [(slot_id, weekday)]
+    # rooms:   [room_id]
+    # classes: [(class_id, teacher_id, periods)] to place
+    # fixed:   [(class_id, teacher_id, room_id, slot_id)] sessions that stay where they are
+    # Returns the new (class_id, teacher_id, room_id, slot_id) sessions and {class_id: periods
+    # left unplaced}. Slots never overlap, so a conflict is two sessions of a class, a teacher
+    # or a room in one slot. Greedy, most loaded teachers first; a period that fits nowhere
+    # moves one solver-placed session out of the way if that session fits elsewhere
+    slot_index = {slot_id: s for s, (slot_id, _) in enumerate(slots)}
+    weekdays = [weekday for _, weekday in slots]
+    teacher_at = [{} for _ in slots]  # teacher -> class in that slot
+    free_rooms = [len(rooms)] * len(slots)
+    class_slots = defaultdict(set)
+    placed = defaultdict(set)  # the solver's own sessions, the only ones it may move
+    day_load = defaultdict(lambda: [0] * 7)  # sessions per weekday of each class
+    taken_rooms = [set() for _ in slots]
+    home = {}
+
+    def occupy(class_id, teacher_id, s):
+        teacher_at[s][teacher_id] = class_id
+        class_slots[class_id].add(s)
+        day_load[class_id][weekdays[s]] += 1
+        free_rooms[s] -= 1
+
+    def vacate(class_id, teacher_id, s):
+        del teacher_at[s][teacher_id]
+        class_slots[class_id].discard(s)
+        day_load[class_id][weekdays[s]] -= 1
+        free_rooms[s] += 1
+
+    def place(class_id, teacher_id, s):
+        occupy(class_id, teacher_id, s)
+        placed[class_id].add(s)
+
+    def unplace(class_id, teacher_id, s):
+        vacate(class_id, teacher_id, s)
+        placed[class_id].discard(s)
+
+    def best_slot(class_id, teacher_id):
+        # spread a class over the week first, then fill the emptiest slots
+        best, best_key = None, None
+        days = day_load[class_id]
+        for s in range(len(slots)):
+            if free_rooms[s] == 0 or teacher_id in teacher_at[s] or s in class_slots[class_id]:
+                continue
+            key = (days[weekdays[s]], -free_rooms[s])
+            if best_key is None or key < best_key:
+                best, best_key = s, key
+        return best
+
+    def make_room(class_id, teacher_id):
+        for s in range(len(slots)):
+            if s in class_slots[class_id]:
+                continue
+            blocker = teacher_at[s].get(teacher_id)
+            if blocker is not None:
+                # the teacher's other class has this slot, and moving it also frees its room
+                movable = [(blocker, teacher_id)] if s in placed[blocker] else []
+            else:
+                movable = [(other, other_teacher) for other_teacher, other in teacher_at[s].items() if s in placed[other]]
+            for other, other_teacher in movable:
+                unplace(other, other_teacher, s)
+                place(class_id, teacher_id, s)
+                elsewhere = best_slot(other, other_teacher)
+                if elsewhere is not None:
+                    place(other, other_teacher, elsewhere)
+                    return True
+                unplace(class_id, teacher_id, s)
+                place(other, other_teacher, s)
+        return False
+
+    teacher_load = defaultdict(int)
+    for class_id, teacher_id, room_id, slot_id in fixed:
+        s = slot_index[slot_id]
+        occupy(class_id, teacher_id, s)
+        taken_rooms[s].add(room_id)
+        home.setdefault(class_id, room_id)
+        teacher_load[teacher_id] += 1
+    for class_id, teacher_id, periods in classes:
+        teacher_load[teacher_id] += periods
+
+    unscheduled = {}
+    order = sorted(classes, key=lambda item: (-teacher_load[item[1]], -item[2], str(item[0])))
+    for class_id, teacher_id, periods in order:
+        for period in range(periods):
+            s = best_slot(class_id, teacher_id)
+            if s is not None:
+                place(class_id, teacher_id, s)
+            elif not make_room(class_id, teacher_id):
+                unscheduled[class_id] = periods - period
+                break
+
+    # rooms last: a class keeps the room it already has where that room is free
+    teachers = {class_id: teacher_id for class_id, teacher_id, _ in classes}
+    by_slot = defaultdict(list)
+    for class_id in sorted(placed, key=str):
+        for s in placed[class_id]:
+            by_slot[s].append(class_id)
+    sessions = []
+    for s, class_ids in sorted(by_slot.items()):
+        taken = taken_rooms[s]
+        waiting = []
+        for class_id in class_ids:
+            room_id = home.get(class_id)
+            if room_id is not None and room_id not in taken:
+                taken.add(room_id)
+                sessions.append((class_id, teachers[class_id], room_id, slots[s][0]))
+            else:
+                waiting.append(class_id)
+        free = (room_id for room_id in rooms if room_id not in taken)
+        for class_id in waiting:
+            room_id = next(free)
+            taken.add(room_id)
+            home.setdefault(class_id, room_id)
+            sessions.append((class_id, teachers[class_id], room_id, slots[s][0]))
+    return sessions, unscheduled
+
+def conflicts(sessions):
+    # (what, id, slot) for every class, teacher or room booked twice in one slot
+    seen, clashes = set(), []
+    for class_id, teacher_id, room_id, slot_id in sessions:
+        for key in (("class", class_id, slot_id), ("teacher", teacher_id, slot_id), ("room", room_id, slot_id)):
+            if key in seen:
+                clashes.append(key)
+            seen.add(key)
+    return clashes
+
+def bench(classes, teachers, rooms, periods, days, periods_per_day, seed):
+    rng = random.Random(seed)
+    slots = [(f"slot-{day}-{period}", day) for day in range(days) for period in range(periods_per_day)]
+    room_ids = [f"room-{r}" for r in range(rooms)]
+    class_rows = [(f"class-{c}", f"teacher-{rng.randrange(teachers)}", periods) for c in range(classes)]
+    print(f"{classes} classes x {periods} periods, {teachers} teachers, {rooms} rooms, {len(slots)} slots "
+          f"({classes * periods / (rooms * len(slots)):.0%} of room-periods needed)")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        sessions, unscheduled = pool.submit(solve, slots, room_ids, class_rows, []).result()
+    elapsed = time.perf_counter() - start
+
+    load = defaultdict(int)
+    for _, teacher_id, _ in class_rows:
+        load[teacher_id] += periods
+    overloaded = sum(max(0, total - len(slots)) for total in load.values())
+    print(f"scheduled {len(sessions)} sessions in {elapsed:.2f}s, including worker start-up")
+    print(f"unscheduled {sum(unscheduled.values())} periods of {len(unscheduled)} classes "
+          f"({overloaded} periods are over their teacher's week)")
+    print(f"conflicts: {len(conflicts(sessions))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timetable solver")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--classes", type=int, default=3000)
+    parser.add_argument("--teachers", type=int, default=600)
+    parser.add_argument("--rooms", type=int, default=400)
+    parser.add_argument("--periods", type=int, default=5, help="periods per class per week")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--periods-per-day", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    bench(args.classes, args.teachers, args.rooms, args.periods, args.days, args.periods_per_day, args.seed)